@@ -116,7 +116,7 @@ CREATE TABLE IF NOT EXISTS investment_scenarios (
     id SERIAL PRIMARY KEY,
     scenario_name VARCHAR(255) NOT NULL,
     investment_amount DECIMAL(15,2),
-    expected_roi DECIMAL(5,2),
+    expected_roi DECIMAL(10,2),
     time_horizon_months INTEGER,
     risk_level VARCHAR(50),
     assumptions JSONB,
@@ -131,5 +131,7 @@ CREATE INDEX IF NOT EXISTS idx_companies_competitor ON companies(is_competitor);
 CREATE INDEX IF NOT EXISTS idx_competitive_intelligence_company ON competitive_intelligence(company_id);
 CREATE INDEX IF NOT EXISTS idx_products_company ON products(company_id);
 CREATE INDEX IF NOT EXISTS idx_market_segments_year ON market_segments(year);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_market_segments_name_year ON market_segments(segment_name, year);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_investment_scenarios_name ON investment_scenarios(scenario_name);
 CREATE INDEX IF NOT EXISTS idx_pricing_data_company ON pricing_data(company_id);
 CREATE INDEX IF NOT EXISTS idx_financial_metrics_company ON financial_metrics(company_id);
@@ -3,11 +3,44 @@ Market Forecasting & Simulation Model
 Implements various forecasting methods and investment simulations
 """
 
+import argparse
+import bisect
+import copy
+import functools
+import hashlib
+import inspect
 import json
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from statistics import NormalDist
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from dataclasses import asdict, dataclass, is_dataclass
 import math
 
+import numpy as np
+
+from results_store import open_results_store, scenario_row
+from streaming_io import JsonlWriter, iter_chunks, read_records
+
+# Percentiles reported by the Monte Carlo simulation
+PERCENTILES = {"p10": 0.1, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9}
+
+# Upper bound on growth shocks held in memory per block (~32 MB of float64)
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+# Paths in the first block of a run with a tolerance; later blocks double the total
+FIRST_TOLERANCE_CHUNK = 4096
+
+# Ways monte_carlo_simulation can compute percentiles
+QUANTILE_METHODS = ("exact", "sketch")
+
+# Path sampling schemes supported by monte_carlo_simulation
+SAMPLING_METHODS = ("random", "antithetic", "halton", "sobol")
+
 @dataclass
 class ForecastParameters:
     base_value: float
@@ -15,10 +48,596 @@ class ForecastParameters:
     seasonality_factor: float = 1.0
     volatility: float = 0.05
 
+@dataclass
+class InputDistribution:
+    """
+    Sampling distribution for an uncertain simulation input
+    
+    kind names a numpy Generator method ("normal", "lognormal", "uniform",
+    "triangular", "beta", ...) and params are its keyword arguments.
+    Samples are clipped to [low, high] when given.
+    """
+    kind: str
+    params: Dict[str, float]
+    low: Optional[float] = None
+    high: Optional[float] = None
+    
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        values = getattr(rng, self.kind)(**self.params, size=size)
+        if self.low is not None or self.high is not None:
+            values = np.clip(values, self.low, self.high)
+        return values
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with a relative-error guarantee
+    
+    Values are counted in logarithmically sized buckets (DDSketch), so every
+    quantile is reported within relative_accuracy of the true order statistic
+    while memory stays bounded by max_bins, however many values are added.
+    Sketches with the same accuracy merge exactly, which lets chunked or
+    parallel runs combine partial results.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.001, max_bins: int = 65536):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._positive = _BucketStore(max_bins)
+        self._negative = _BucketStore(max_bins)
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    @property
+    def collapsed(self) -> bool:
+        """Whether buckets were folded to respect max_bins (bound no longer holds at the tails)"""
+        return self._positive.collapsed or self._negative.collapsed
+    
+    def update(self, values: np.ndarray) -> None:
+        """Add a batch of values to the sketch"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        
+        self.count += values.size
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        
+        positive = values[values > 0]
+        negative = -values[values < 0]
+        self.zero_count += values.size - positive.size - negative.size
+        self._positive.add(self._keys(positive))
+        self._negative.add(self._keys(negative))
+    
+    def merge(self, other: "QuantileSketch") -> None:
+        """Fold another sketch with the same accuracy into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the value at rank int(count * q), matching sorted-list indexing
+        
+        Args:
+            q: Quantile between 0 and 1
+            
+        Returns:
+            Estimated value, within relative_accuracy of the true order statistic
+        """
+        if self.count == 0:
+            raise ValueError("Cannot take a quantile of an empty sketch")
+        
+        rank = min(int(self.count * q), self.count - 1)
+        negative_count = self._negative.count
+        
+        if rank < negative_count:
+            # Most negative values (largest magnitudes) come first
+            value = -self._value(self._negative.key_at_rank(negative_count - 1 - rank))
+        elif rank < negative_count + self.zero_count:
+            value = 0.0
+        else:
+            value = self._value(self._positive.key_at_rank(rank - negative_count - self.zero_count))
+        
+        return min(max(value, self.min), self.max)
+    
+    def lower_tail_mean(self, fraction: float) -> float:
+        """
+        Mean of the lowest fraction of values (expected shortfall)
+        
+        Args:
+            fraction: Tail size between 0 and 1 (e.g. 0.05 for the worst 5%)
+            
+        Returns:
+            Estimated tail mean, within relative_accuracy for same-signed values
+        """
+        if self.count == 0:
+            raise ValueError("Cannot take a tail mean of an empty sketch")
+        
+        # Bucket values and counts in ascending order of value
+        negative_keys = self._negative.offset + np.arange(len(self._negative.counts))
+        positive_keys = self._positive.offset + np.arange(len(self._positive.counts))
+        values = np.concatenate([
+            -self._values(negative_keys)[::-1],
+            [0.0],
+            self._values(positive_keys)
+        ])
+        counts = np.concatenate([
+            self._negative.counts[::-1],
+            [self.zero_count],
+            self._positive.counts
+        ])
+        values = np.clip(values, self.min, self.max)
+        
+        tail = max(1, math.ceil(self.count * fraction))
+        taken = np.minimum(counts, np.maximum(tail - (np.cumsum(counts) - counts), 0))
+        return float((taken * values).sum() / tail)
+    
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        """Bucket index for each positive magnitude"""
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+    
+    def _value(self, key: int) -> float:
+        """Representative value of a bucket, within relative_accuracy of its contents"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+    
+    def _values(self, keys: np.ndarray) -> np.ndarray:
+        return 2 * self.gamma ** keys.astype(np.float64) / (self.gamma + 1)
+
+class _BucketStore:
+    """Dense bucket counts over a contiguous key range, folding the lowest keys past max_bins"""
+    
+    def __init__(self, max_bins: int):
+        self.max_bins = max_bins
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+        self.count = 0
+        self.collapsed = False
+    
+    def add(self, keys: np.ndarray) -> None:
+        if keys.size == 0:
+            return
+        low = int(keys.min())
+        self._add_dense(np.bincount(keys - low), low)
+    
+    def merge(self, other: "_BucketStore") -> None:
+        if other.count:
+            self._add_dense(other.counts, other.offset)
+        self.collapsed = self.collapsed or other.collapsed
+    
+    def key_at_rank(self, rank: int) -> int:
+        index = np.searchsorted(np.cumsum(self.counts), rank, side="right")
+        return self.offset + int(index)
+    
+    def _add_dense(self, counts: np.ndarray, offset: int) -> None:
+        if self.count == 0:
+            self.counts = counts.astype(np.int64, copy=True)
+            self.offset = offset
+        else:
+            low = min(self.offset, offset)
+            high = max(self.offset + len(self.counts), offset + len(counts))
+            if low != self.offset or high != self.offset + len(self.counts):
+                grown = np.zeros(high - low, dtype=np.int64)
+                grown[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+                self.counts = grown
+                self.offset = low
+            self.counts[offset - low:offset - low + len(counts)] += counts
+        
+        self.count += int(counts.sum())
+        
+        excess = len(self.counts) - self.max_bins
+        if excess > 0:
+            self.counts[excess] += self.counts[:excess].sum()
+            self.counts = self.counts[excess:].copy()
+            self.offset += excess
+            self.collapsed = True
+
+class ForecastCache:
+    """
+    Memoizing cache for deterministic forecast and simulation results
+    
+    Entries are keyed by the method name and its canonicalized arguments.
+    A bounded in-memory LRU tier sits in front of an optional SQLite file
+    that survives restarts. Calls that are not reproducible (a seed
+    argument left as None) bypass the cache, along with everything they
+    call. Safe to share between threads.
+    """
+    
+    def __init__(self, max_entries: int = 256, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._memory: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+        self._local = threading.local()
+        # Guards _memory, the counters and the shared SQLite connection
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS forecast_cache "
+                "(key TEXT PRIMARY KEY, method TEXT NOT NULL, value BLOB NOT NULL)"
+            )
+            self._db.commit()
+    
+    def get_or_compute(self, method: str, params: Dict, compute: Callable[[], object]):
+        """
+        Return the cached result for (method, params), computing it on a miss
+        
+        Nested calls made while computing an entry, or while running an
+        uncached (unseeded) call, are not cached separately: their keys
+        hold derived or random seeds that no later call would repeat.
+        """
+        if getattr(self._local, "computing", False):
+            return compute()
+        if not _is_reproducible(params):
+            with self._lock:
+                self.bypassed += 1
+            return self._compute(compute)
+        
+        key = self.make_key(method, params)
+        
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._memory[key][1])
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM forecast_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = pickle.loads(row[0])
+                    self._remember(key, method, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return copy.deepcopy(value)
+            
+            self.misses += 1
+        
+        # Computed outside the lock, so other threads' lookups are not held up
+        value = self._compute(compute)
+        
+        with self._lock:
+            self._remember(key, method, copy.deepcopy(value))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO forecast_cache (key, method, value) VALUES (?, ?, ?)",
+                    (key, method, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                )
+                self._db.commit()
+        return value
+    
+    def invalidate(self, method: Optional[str] = None) -> None:
+        """
+        Drop cached entries
+        
+        Args:
+            method: Qualified method name (e.g. "InvestmentSimulator.simulate_market_entry");
+                None drops everything
+        """
+        with self._lock:
+            if method is None:
+                self._memory.clear()
+            else:
+                for key in [key for key, (owner, _) in self._memory.items() if owner == method]:
+                    del self._memory[key]
+            
+            if self._db is not None:
+                if method is None:
+                    self._db.execute("DELETE FROM forecast_cache")
+                else:
+                    self._db.execute("DELETE FROM forecast_cache WHERE method = ?", (method,))
+                self._db.commit()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    @staticmethod
+    def make_key(method: str, params: Dict) -> str:
+        """Stable digest of a method name and its canonicalized arguments"""
+        payload = json.dumps([method, _canonical(params)], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _compute(self, compute: Callable[[], object]):
+        """Run compute with nested cached calls on this thread passing straight through"""
+        self._local.computing = True
+        try:
+            return compute()
+        finally:
+            self._local.computing = False
+    
+    def _remember(self, key: str, method: str, value) -> None:
+        """Add an entry to the LRU tier (lock held)"""
+        self._memory[key] = (method, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+# Arguments that change how a result is computed but never the result itself
+CACHE_IGNORED_PARAMS = {"workers"}
+
+def _cached(method):
+    """Route a model method through self.cache when one is configured"""
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, "cache", None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = {
+            name: value for name, value in list(bound.arguments.items())[1:]
+            if name not in CACHE_IGNORED_PARAMS
+        }
+        return cache.get_or_compute(
+            f"{type(self).__name__}.{method.__name__}",
+            params,
+            lambda: method(self, *args, **kwargs)
+        )
+    
+    return wrapper
+
+def _is_reproducible(params: Dict) -> bool:
+    """Whether a call's result is fully determined by its arguments"""
+    return not ("seed" in params and params["seed"] is None and params.get("seeds") is None)
+
+def _canonical(value):
+    """JSON-compatible form of an argument that distinguishes every distinct input"""
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        return {
+            "ndarray": data.dtype.str,
+            "shape": list(data.shape),
+            "sha256": hashlib.sha256(data.tobytes()).hexdigest()
+        }
+    if isinstance(value, np.random.SeedSequence):
+        # Spawned children depend on how many were spawned before
+        return {
+            "entropy": str(value.entropy),
+            "spawn_key": list(value.spawn_key),
+            "spawned": value.n_children_spawned
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    if is_dataclass(value):
+        return {"dataclass": type(value).__name__, "fields": _canonical(asdict(value))}
+    if isinstance(value, float) and not math.isfinite(value):
+        return repr(value)
+    return value
+
+class OnlineHoltWinters:
+    """
+    Incremental Holt-Winters (level/trend/seasonal) estimator for many series
+    
+    State is kept as one row per series in flat arrays (struct-of-arrays),
+    so each observation is an O(1) update, batches of observations across
+    series are vectorized, and forecasts never rescan history.
+    """
+    
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        beta: float = 0.1,
+        gamma: float = 0.1,
+        season_length: int = 4,
+        seasonal: str = "additive",
+        capacity: int = 1024
+    ):
+        if seasonal not in ("additive", "multiplicative"):
+            raise ValueError("seasonal must be 'additive' or 'multiplicative'")
+        
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.season_length = season_length
+        self.multiplicative = seasonal == "multiplicative"
+        self.series_index: Dict[str, int] = {}
+        self.level = np.zeros(capacity)
+        self.trend = np.zeros(capacity)
+        self.season = np.full((capacity, season_length), 1.0 if self.multiplicative else 0.0)
+        self.observations = np.zeros(capacity, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return len(self.series_index)
+    
+    def update(self, series_id: str, value: float) -> None:
+        """Fold one observation into a series' state"""
+        self.update_many([series_id], [value])
+    
+    def update_many(self, series_ids: List[str], values: List[float]) -> None:
+        """
+        Fold a batch of observations into the state, in order
+        
+        Observations for different series are applied together; repeated
+        series in one batch are applied in successive vectorized passes.
+        """
+        rows = np.array([self._row(series_id) for series_id in series_ids], dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        
+        # Occurrence number of each row within the batch: pass k applies the k-th repeat
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        occurrence = np.empty(len(rows), dtype=np.int64)
+        occurrence[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        
+        for step in range(int(occurrence.max(initial=-1)) + 1):
+            selected = occurrence == step
+            self._apply(rows[selected], values[selected])
+    
+    def forecast(self, series_id: str, periods: int) -> List[float]:
+        """Forecast the next periods values of one series"""
+        return self.forecast_many([series_id], periods)[0].tolist()
+    
+    def forecast_many(self, series_ids: List[str], periods: int) -> np.ndarray:
+        """
+        Forecast the next periods values for many series
+        
+        Returns:
+            Array of shape (series, periods)
+        """
+        rows = np.array([self.series_index[series_id] for series_id in series_ids], dtype=np.int64)
+        horizon = np.arange(1, periods + 1)
+        phase = (self.observations[rows][:, None] + horizon - 1) % self.season_length
+        seasonal = self.season[rows[:, None], phase]
+        trended = self.level[rows][:, None] + horizon * self.trend[rows][:, None]
+        return trended * seasonal if self.multiplicative else trended + seasonal
+    
+    def state(self, series_id: str) -> Dict:
+        """Current smoothing state of one series"""
+        row = self.series_index[series_id]
+        return {
+            "series_id": series_id,
+            "level": float(self.level[row]),
+            "trend": float(self.trend[row]),
+            "season": self.season[row].tolist(),
+            "observations": int(self.observations[row])
+        }
+    
+    def _row(self, series_id: str) -> int:
+        row = self.series_index.get(series_id)
+        if row is None:
+            row = len(self.series_index)
+            if row == len(self.level):
+                self._grow()
+            self.series_index[series_id] = row
+        return row
+    
+    def _grow(self) -> None:
+        capacity = 2 * len(self.level)
+        self.level = np.resize(self.level, capacity)
+        self.trend = np.resize(self.trend, capacity)
+        self.observations = np.resize(self.observations, capacity)
+        season = np.full((capacity, self.season_length), 1.0 if self.multiplicative else 0.0)
+        season[:len(self.season)] = self.season
+        self.season = season
+        self.observations[len(self.series_index):] = 0
+    
+    def _apply(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Holt-Winters update for distinct rows"""
+        first = self.observations[rows] == 0
+        phase = self.observations[rows] % self.season_length
+        season = self.season[rows, phase]
+        level = self.level[rows]
+        trend = self.trend[rows]
+        
+        if self.multiplicative:
+            new_level = self.alpha * (values / season) + (1 - self.alpha) * (level + trend)
+        else:
+            new_level = self.alpha * (values - season) + (1 - self.alpha) * (level + trend)
+        new_trend = self.beta * (new_level - level) + (1 - self.beta) * trend
+        if self.multiplicative:
+            new_season = self.gamma * (values / new_level) + (1 - self.gamma) * season
+        else:
+            new_season = self.gamma * (values - new_level) + (1 - self.gamma) * season
+        
+        # A series' first observation only sets its level
+        self.level[rows] = np.where(first, values, new_level)
+        self.trend[rows] = np.where(first, 0.0, new_trend)
+        self.season[rows, phase] = np.where(first, season, new_season)
+        self.observations[rows] += 1
+
 class MarketForecastingModel:
-    def __init__(self):
+    def __init__(
+        self,
+        online_model: Optional[OnlineHoltWinters] = None,
+        cache: Optional[ForecastCache] = None
+    ):
         self.historical_data = []
+        self.online_model = online_model or OnlineHoltWinters()
+        self.cache = cache
+        # Entries of historical_data already folded into online_model
+        self._history_cursor = 0
+    
+    def record_observations(self, series_ids: List[str], values: List[float]) -> None:
+        """
+        Append observations (e.g. freshly scraped metrics) to historical_data
+        and fold them into the online model
+        
+        Args:
+            series_ids: Series key per observation (e.g. "techvision.com:employees")
+            values: Observed value per observation
+        """
+        self.historical_data.extend(
+            {"series_id": series_id, "value": value}
+            for series_id, value in zip(series_ids, values)
+        )
+        self.sync_online_model()
+    
+    def sync_online_model(self) -> int:
+        """
+        Fold entries of historical_data added since the last sync into the
+        online model, without revisiting older history
+        
+        Returns:
+            Number of observations applied
+        """
+        new_entries = self.historical_data[self._history_cursor:]
+        if new_entries:
+            self.online_model.update_many(
+                [entry["series_id"] for entry in new_entries],
+                [entry["value"] for entry in new_entries]
+            )
+            self._history_cursor = len(self.historical_data)
+        return len(new_entries)
+    
+    def online_forecast(self, series_id: str, periods: int) -> List[float]:
+        """
+        Forecast a series from its online Holt-Winters state
+        
+        Args:
+            series_id: Series key used when recording observations
+            periods: Number of periods to forecast
+            
+        Returns:
+            List of forecasted values
+        """
+        self.sync_online_model()
+        return self.online_model.forecast(series_id, periods)
         
+    @_cached
     def linear_forecast(
         self, 
         current_value: float, 
@@ -43,6 +662,7 @@ class MarketForecastingModel:
         print(f"[v0] Linear forecast: {len(forecasts)} periods")
         return forecasts
     
+    @_cached
     def compound_growth_forecast(
         self,
         current_value: float,
@@ -66,6 +686,7 @@ class MarketForecastingModel:
         
         return forecasts
     
+    @_cached
     def seasonal_forecast(
         self,
         params: ForecastParameters,
@@ -108,61 +729,880 @@ class MarketForecastingModel:
         
         return forecasts
     
+    @_cached
+    def linear_forecast_batch(
+        self,
+        current_values: np.ndarray,
+        growth_rates: np.ndarray,
+        periods: int
+    ) -> np.ndarray:
+        """
+        Linear growth forecast for many series at once
+        
+        Args:
+            current_values: Starting value per series
+            growth_rates: Annual growth rate per series (or one shared rate)
+            periods: Number of periods to forecast
+            
+        Returns:
+            Array of shape (series, periods + 1); row i matches
+            linear_forecast(current_values[i], growth_rates[i], periods) exactly
+        """
+        forecasts = _growth_matrix(current_values, growth_rates, periods)
+        
+        print(f"[v0] Linear forecast: {forecasts.shape[0]} series x {forecasts.shape[1]} periods")
+        return forecasts
+    
+    @_cached
+    def compound_growth_forecast_batch(
+        self,
+        current_values: np.ndarray,
+        cagrs: np.ndarray,
+        periods: int
+    ) -> np.ndarray:
+        """
+        CAGR forecast for many series at once
+        
+        Args:
+            current_values: Starting value per series
+            cagrs: Compound annual growth rate per series (or one shared rate)
+            periods: Number of periods
+            
+        Returns:
+            Array of shape (series, periods + 1); row i matches
+            compound_growth_forecast(current_values[i], cagrs[i], periods) exactly
+        """
+        return _growth_matrix(current_values, cagrs, periods)
+    
+    @_cached
+    def seasonal_forecast_batch(
+        self,
+        base_values: np.ndarray,
+        growth_rates: np.ndarray,
+        periods: int,
+        seasonal_patterns: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Seasonal forecast for many series at once, in columnar form
+        
+        Args:
+            base_values: Starting value per series
+            growth_rates: Growth rate per period per series (or one shared rate)
+            periods: Number of periods
+            seasonal_patterns: One shared pattern, or an array of shape
+                (series, season_length) with a pattern per series
+            
+        Returns:
+            Dictionary of arrays: "period" (periods,), and "base_forecast",
+            "seasonal_forecast", "seasonal_factor" of shape (series, periods),
+            matching the fields of seasonal_forecast
+        """
+        if seasonal_patterns is None:
+            seasonal_patterns = [1.0, 1.1, 0.9, 1.0]  # Default quarterly pattern
+        
+        base_values = np.atleast_1d(np.asarray(base_values, dtype=np.float64))
+        growth_rates = np.broadcast_to(np.asarray(growth_rates, dtype=np.float64), base_values.shape)
+        patterns = np.atleast_2d(np.asarray(seasonal_patterns, dtype=np.float64))
+        
+        # Same sequence of multiplications as the scalar loop: base * (1+g) * (1+g) ...
+        base_forecast = np.empty((len(base_values), periods))
+        base_forecast[:] = (1 + growth_rates)[:, None]
+        if periods > 0:
+            base_forecast[:, 0] *= base_values
+        np.cumprod(base_forecast, axis=1, out=base_forecast)
+        
+        season_idx = np.arange(periods) % patterns.shape[1]
+        seasonal_factor = np.broadcast_to(patterns[:, season_idx], base_forecast.shape)
+        
+        return {
+            "period": np.arange(1, periods + 1),
+            "base_forecast": base_forecast,
+            "seasonal_forecast": base_forecast * seasonal_factor,
+            "seasonal_factor": seasonal_factor
+        }
+    
+    def stream_forecasts(
+        self,
+        records: Iterable[Dict],
+        periods: int,
+        writer: Optional[JsonlWriter] = None,
+        chunk_size: int = 100000
+    ) -> Dict:
+        """
+        Growth forecasts for a stream of series, chunk by chunk
+        
+        Each record needs current_value and growth_rate (numbers or CSV
+        strings); any name field is carried into the output. Chunks are
+        forecast with the batch kernel, written to writer one JSON line per
+        series and dropped, so memory is bounded by chunk_size. Chunks
+        bypass the cache for the same reason.
+        
+        Args:
+            records: Input records, e.g. streaming_io.read_records(path)
+            periods: Number of periods to forecast
+            writer: Destination for one {"name", "forecast"} line per series
+            chunk_size: Series forecast per block
+            
+        Returns:
+            Series count and the per-period sum of all forecasts
+        """
+        period_totals = np.zeros(periods + 1)
+        series_count = 0
+        for chunk in iter_chunks(records, chunk_size):
+            current_values = np.asarray([record["current_value"] for record in chunk]).astype(np.float64)
+            growth_rates = np.asarray([record["growth_rate"] for record in chunk]).astype(np.float64)
+            forecasts = _growth_matrix(current_values, growth_rates, periods)
+            period_totals += forecasts.sum(axis=0)
+            series_count += len(chunk)
+            if writer is not None:
+                writer.write_many(
+                    {"name": record.get("name"), "forecast": forecast}
+                    for record, forecast in zip(chunk, forecasts.tolist())
+                )
+        
+        return {
+            "series_count": series_count,
+            "periods": periods,
+            "period_totals": period_totals.tolist()
+        }
+    
+    @_cached
     def monte_carlo_simulation(
         self,
         base_value: float,
         expected_growth: float,
         volatility: float,
         periods: int,
-        simulations: int = 1000
+        simulations: int = 1000,
+        seed: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        quantile_method: str = "exact",
+        relative_accuracy: float = 0.001,
+        fan_chart: bool = False,
+        sampling: str = "random",
+        tolerance: Optional[float] = None,
+        confidence: float = 0.95,
+        target_percentiles: Optional[List[str]] = None
     ) -> Dict:
         """
         Monte Carlo simulation for probabilistic forecasting
         
+        Paths are simulated in blocks of chunk_size, each drawing from its own
+        numpy Generator spawned from the seed, so memory is bounded by the
+        block and results depend only on (seed, chunk_size) -- not on whether
+        or how many worker processes are used.
+        
+        With quantile_method="sketch" terminal values are streamed into a
+        QuantileSketch instead of being kept, so memory stays constant in the
+        number of simulations and percentiles carry a relative error bound.
+        
+        With fan_chart=True the same pass also reports percentiles and the mean
+        for every period. Per-period accumulators are updated chunk by chunk:
+        the exact method keeps a periods x simulations buffer, the sketch
+        method one sketch per period, which never materializes that matrix.
+        
+        sampling="antithetic" pairs every shock path with its mirror image;
+        "halton" and "sobol" use randomized quasi-random points ("sobol"
+        requires scipy). With a tolerance, simulations becomes a budget:
+        chunks are added until the confidence interval on every target
+        percentile is within tolerance (relative half-width), and the result
+        reports how many paths were actually used.
+        
         Args:
             base_value: Starting value
             expected_growth: Expected growth rate
             volatility: Standard deviation of returns
             periods: Number of periods
-            simulations: Number of simulation runs
+            simulations: Number of simulation runs (maximum when tolerance is set)
+            seed: Optional seed for reproducible results
+            chunk_size: Paths simulated per block (default sized to MAX_BLOCK_ELEMENTS)
+            workers: Number of worker processes (None runs in-process)
+            quantile_method: "exact" (order statistics) or "sketch" (streaming)
+            relative_accuracy: Relative error bound of the sketch percentiles
+            fan_chart: Also report per-period percentiles under "fan_chart"
+            sampling: One of SAMPLING_METHODS
+            tolerance: Target relative half-width of the percentile confidence intervals
+            confidence: Confidence level of those intervals
+            target_percentiles: Percentile names the tolerance applies to (default all)
             
         Returns:
             Dictionary with percentile forecasts
         """
-        import random
+        scenario = ForecastParameters(
+            base_value=base_value,
+            growth_rate=expected_growth,
+            volatility=volatility
+        )
         
-        all_outcomes = []
+        return self.monte_carlo_batch(
+            [scenario],
+            periods,
+            simulations=simulations,
+            seeds=[np.random.SeedSequence(seed)],
+            chunk_size=chunk_size,
+            workers=workers,
+            quantile_method=quantile_method,
+            relative_accuracy=relative_accuracy,
+            fan_chart=fan_chart,
+            sampling=sampling,
+            tolerance=tolerance,
+            confidence=confidence,
+            target_percentiles=target_percentiles
+        )[0]
+    
+    @_cached
+    def monte_carlo_batch(
+        self,
+        scenarios: List[ForecastParameters],
+        periods: int,
+        simulations: int = 1000,
+        seed: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        seeds: Optional[List[np.random.SeedSequence]] = None,
+        quantile_method: str = "exact",
+        relative_accuracy: float = 0.001,
+        fan_chart: bool = False,
+        sampling: str = "random",
+        tolerance: Optional[float] = None,
+        confidence: float = 0.95,
+        target_percentiles: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Monte Carlo simulation for many scenarios sharing one process pool
         
-        for _ in range(simulations):
-            value = base_value
-            for _ in range(periods):
-                # Random growth with normal distribution
-                random_growth = random.gauss(expected_growth, volatility)
-                value = value * (1 + random_growth)
-            all_outcomes.append(value)
+        Each scenario's seed stream is spawned from seed, and each of its
+        chunks gets a further spawned stream. Workers write terminal values
+        straight into a shared-memory buffer (exact) or return a small
+        QuantileSketch (sketch), so no outcome arrays are pickled back to
+        the parent. Chunk results are consumed in order, so early stopping
+        under a tolerance is also independent of the worker count. Under a
+        tolerance the chunks start at FIRST_TOLERANCE_CHUNK paths and double
+        the completed total each time (capped at chunk_size), so convergence
+        is checked long before the default-sized block would finish.
+        
+        Args:
+            scenarios: Forecast parameters (base_value, growth_rate, volatility)
+            periods: Number of periods
+            simulations: Number of simulation runs per scenario
+            seed: Optional seed for reproducible results
+            chunk_size: Paths simulated per block
+            workers: Number of worker processes (None runs in-process)
+            seeds: Explicit per-scenario seed sequences (overrides seed)
+            quantile_method: "exact" (order statistics) or "sketch" (streaming)
+            relative_accuracy: Relative error bound of the sketch percentiles
+            fan_chart: Also report per-period percentiles under "fan_chart"
+            sampling: One of SAMPLING_METHODS
+            tolerance: Target relative half-width of the percentile confidence intervals
+            confidence: Confidence level of those intervals
+            target_percentiles: Percentile names the tolerance applies to (default all)
+            
+        Returns:
+            List of Monte Carlo result dictionaries, one per scenario
+        """
+        if simulations < 1:
+            raise ValueError("simulations must be at least 1")
+        if quantile_method not in QUANTILE_METHODS:
+            raise ValueError(f"quantile_method must be one of {QUANTILE_METHODS}")
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"sampling must be one of {SAMPLING_METHODS}")
+        if target_percentiles is None:
+            target_percentiles = list(PERCENTILES)
+        if seeds is None:
+            seeds = np.random.SeedSequence(seed).spawn(len(scenarios))
         
-        all_outcomes.sort()
+        # Under a tolerance, start small so convergence is checked early
+        first_chunk = FIRST_TOLERANCE_CHUNK if tolerance is not None else None
+        bounds = _chunk_bounds(simulations, periods, chunk_size, first_chunk)
+        shared = workers is not None and quantile_method == "exact"
+        executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+        # Chunks submitted ahead of the one being consumed
+        window = 2 * workers if workers else 1
         
-        return {
-            "base_value": base_value,
-            "periods": periods,
-            "simulations": simulations,
-            "percentiles": {
-                "p10": all_outcomes[int(simulations * 0.1)],
-                "p25": all_outcomes[int(simulations * 0.25)],
-                "p50": all_outcomes[int(simulations * 0.5)],
-                "p75": all_outcomes[int(simulations * 0.75)],
-                "p90": all_outcomes[int(simulations * 0.9)],
-            },
-            "mean": sum(all_outcomes) / len(all_outcomes),
-            "min": min(all_outcomes),
-            "max": max(all_outcomes)
+        def plan():
+            for scenario, scenario_seed in zip(scenarios, seeds):
+                run = _ScenarioRun(
+                    scenario, periods, simulations, len(bounds), quantile_method,
+                    relative_accuracy, fan_chart, shared, tolerance, confidence,
+                    target_percentiles
+                )
+                runs.append(run)
+                for chunk in _plan_chunks(
+                    scenario, periods, simulations, bounds, scenario_seed,
+                    fan_chart, sampling, run.buffer_name
+                ):
+                    yield run, chunk
+        
+        def submit_next() -> bool:
+            for run, chunk in tasks:
+                if run.done:
+                    continue
+                if quantile_method == "sketch":
+                    future = _submit(executor, _run_sketch_chunk, chunk, relative_accuracy)
+                elif shared:
+                    future = executor.submit(_run_shared_chunk, chunk)
+                else:
+                    future = _submit(None, _run_chunk, chunk, run.outcomes)
+                run.outstanding += 1
+                pending.append((run, chunk, future))
+                return True
+            return False
+        
+        runs = []
+        pending = deque()
+        tasks = plan()
+        results = []
+        
+        try:
+            while len(pending) < window and submit_next():
+                pass
+            while pending:
+                run, chunk, future = pending.popleft()
+                if run.done:
+                    # Converged early: drop results that are no longer needed
+                    if not future.cancel():
+                        future.result()
+                else:
+                    run.add(chunk, future.result())
+                run.outstanding -= 1
+                if run.done and run.outstanding == 0:
+                    results.append(run.summary())
+                    run.close()
+                while len(pending) < window and submit_next():
+                    pass
+        finally:
+            for run in runs:
+                run.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        
+        return results
+
+
+class _ScenarioRun:
+    """Accumulated outcomes of one scenario while its chunks complete in order"""
+    
+    def __init__(
+        self,
+        scenario: ForecastParameters,
+        periods: int,
+        simulations: int,
+        chunks: int,
+        quantile_method: str,
+        relative_accuracy: float,
+        fan_chart: bool,
+        shared: bool,
+        tolerance: Optional[float],
+        confidence: float,
+        target_percentiles: List[str]
+    ):
+        self.scenario = scenario
+        self.periods = periods
+        self.remaining = chunks
+        self.quantile_method = quantile_method
+        self.fan_chart = fan_chart
+        self.tolerance = tolerance
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.confidence = confidence
+        self.target_percentiles = target_percentiles
+        self.paths = 0
+        self.outstanding = 0
+        self.converged = False
+        self.precision: Dict[str, float] = {}
+        self.totals = None
+        self.sketches = None
+        self.buffer = None
+        self.outcomes = None
+        
+        # Per-period values tracked for every path: all periods or just the last
+        tracked = periods if fan_chart and periods > 0 else 1
+        if quantile_method == "exact":
+            if shared:
+                self.buffer = shared_memory.SharedMemory(create=True, size=tracked * simulations * 8)
+                self.outcomes = np.ndarray((tracked, simulations), dtype=np.float64, buffer=self.buffer.buf)
+            else:
+                self.outcomes = np.empty((tracked, simulations))
+    
+    @property
+    def buffer_name(self) -> Optional[str]:
+        return self.buffer.name if self.buffer is not None else None
+    
+    @property
+    def done(self) -> bool:
+        return self.converged or self.remaining == 0
+    
+    def add(self, chunk: "_MonteCarloChunk", partial) -> None:
+        """Fold in the next chunk's partial result (per-period sums or sketches)"""
+        self.remaining -= 1
+        if self.quantile_method == "sketch":
+            if self.sketches is None:
+                self.sketches = partial
+            else:
+                for sketch, other in zip(self.sketches, partial):
+                    sketch.merge(other)
+        else:
+            self.totals = partial if self.totals is None else self.totals + partial
+        # Chunks arrive in order, so the completed paths are always a prefix
+        self.paths = chunk.stop
+        
+        if self.tolerance is not None:
+            self.precision = self._precision()
+            self.converged = max(self.precision.values()) <= self.tolerance
+    
+    def summary(self) -> Dict:
+        if self.quantile_method == "sketch":
+            summary = _summarize_sketch(
+                self.scenario.base_value, self.periods, self.sketches, self.fan_chart
+            )
+        else:
+            summary = _summarize_outcomes(
+                self.scenario.base_value,
+                self.periods,
+                self.outcomes[:, :self.paths],
+                self.totals,
+                self.fan_chart
+            )
+        
+        if self.tolerance is not None:
+            summary["convergence"] = {
+                "tolerance": self.tolerance,
+                "confidence": self.confidence,
+                "converged": self.converged,
+                "paths_used": self.paths,
+                "relative_half_width": self.precision
+            }
+        return summary
+    
+    def close(self) -> None:
+        """Release the outcome buffer and sketches once the summary is taken"""
+        self.outcomes = None
+        self.sketches = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.unlink()
+            self.buffer = None
+    
+    def _precision(self) -> Dict[str, float]:
+        """
+        Relative half-width of a distribution-free confidence interval on
+        each target percentile, from the order statistics at n*q +/- z*sqrt(n*q*(1-q))
+        """
+        n = self.paths
+        precision = {}
+        for name in self.target_percentiles:
+            q = PERCENTILES[name]
+            spread = self.z * math.sqrt(q * (1 - q) / n)
+            low, high = max(q - spread, 0.0), min(q + spread, 1.0)
+            if self.quantile_method == "sketch":
+                terminal = self.sketches[-1]
+                estimate = terminal.quantile(q)
+                lower, upper = terminal.quantile(low), terminal.quantile(high)
+            else:
+                values = self.outcomes[-1, :n]
+                ranks = [min(int(n * p), n - 1) for p in (low, q, high)]
+                ordered = np.partition(values, sorted(set(ranks)))
+                lower, estimate, upper = (float(ordered[rank]) for rank in ranks)
+            precision[name] = (upper - lower) / 2 / abs(estimate) if estimate else math.inf
+        return precision
+
+
+def _growth_matrix(
+    current_values: np.ndarray,
+    growth_rates: np.ndarray,
+    periods: int
+) -> np.ndarray:
+    """
+    current_value * (1 + growth_rate) ** i for every series and i in 0..periods
+    
+    float_power evaluates each power with the C library's pow, as Python's
+    ** does, so rows are bit-identical to the scalar forecasts; np.power
+    may take a SIMD path that differs in the last bit.
+    """
+    current_values = np.atleast_1d(np.asarray(current_values, dtype=np.float64))
+    growth_rates = np.broadcast_to(np.asarray(growth_rates, dtype=np.float64), current_values.shape)
+    exponents = np.arange(periods + 1, dtype=np.float64)
+    return current_values[:, None] * np.float_power((1 + growth_rates)[:, None], exponents)
+
+
+@dataclass
+class _MonteCarloChunk:
+    """One block of Monte Carlo paths and the seed stream it draws from"""
+    base_value: float
+    expected_growth: float
+    volatility: float
+    periods: int
+    simulations: int
+    start: int
+    stop: int
+    seed: np.random.SeedSequence
+    fan_chart: bool = False
+    sampling: str = "random"
+    # Scenario-level entropy shared by all chunks, for the quasi-random scrambling
+    sequence_seed: Optional[np.ndarray] = None
+    buffer_name: Optional[str] = None
+
+
+def _chunk_bounds(
+    simulations: int,
+    periods: int,
+    chunk_size: Optional[int] = None,
+    first_chunk: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """
+    Split simulations into [start, stop) blocks of at most chunk_size paths
+    
+    With first_chunk, blocks grow geometrically instead: the first has
+    first_chunk paths and each later one as many as all before it, so the
+    completed total doubles from block to block until chunk_size caps it.
+    """
+    if chunk_size is None:
+        chunk_size = max(1, MAX_BLOCK_ELEMENTS // max(periods, 1))
+    bounds = []
+    start = 0
+    while start < simulations:
+        size = chunk_size if first_chunk is None else min(max(first_chunk, start), chunk_size)
+        bounds.append((start, min(start + size, simulations)))
+        start += size
+    return bounds
+
+
+def _plan_chunks(
+    scenario: ForecastParameters,
+    periods: int,
+    simulations: int,
+    bounds: List[Tuple[int, int]],
+    seed: np.random.SeedSequence,
+    fan_chart: bool = False,
+    sampling: str = "random",
+    buffer_name: Optional[str] = None
+) -> List[_MonteCarloChunk]:
+    """Build the chunk tasks for one scenario, each with its own spawned seed"""
+    return [
+        _MonteCarloChunk(
+            base_value=scenario.base_value,
+            expected_growth=scenario.growth_rate,
+            volatility=scenario.volatility,
+            periods=periods,
+            simulations=simulations,
+            start=start,
+            stop=stop,
+            seed=chunk_seed,
+            fan_chart=fan_chart,
+            sampling=sampling,
+            # Plain entropy words: a SeedSequence would be mutated by spawn() calls
+            sequence_seed=seed.generate_state(4),
+            buffer_name=buffer_name
+        )
+        for (start, stop), chunk_seed in zip(bounds, seed.spawn(len(bounds)))
+    ]
+
+
+def _submit(executor: Optional[ProcessPoolExecutor], fn, *args) -> Future:
+    """Submit to the pool, or run in-process and wrap the result in a Future"""
+    if executor is not None:
+        return executor.submit(fn, *args)
+    future = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+def _draw_shocks(chunk: _MonteCarloChunk) -> np.ndarray:
+    """Growth shocks of shape (paths, periods) for one chunk"""
+    shape = (chunk.stop - chunk.start, chunk.periods)
+    
+    if chunk.sampling == "random":
+        rng = np.random.default_rng(chunk.seed)
+        return rng.normal(chunk.expected_growth, chunk.volatility, size=shape)
+    
+    if chunk.sampling == "antithetic":
+        rng = np.random.default_rng(chunk.seed)
+        half = rng.standard_normal(((shape[0] + 1) // 2, shape[1]))
+        z = np.concatenate([half, -half])[:shape[0]]
+    elif chunk.sampling == "halton":
+        z = _norm_ppf(_halton_points(chunk.start, chunk.stop, chunk.periods, chunk.sequence_seed))
+    else:
+        z = _norm_ppf(_sobol_points(chunk.start, chunk.stop, chunk.periods, chunk.sequence_seed))
+    
+    z *= chunk.volatility
+    z += chunk.expected_growth
+    return z
+
+
+def _halton_points(
+    start: int,
+    stop: int,
+    dimensions: int,
+    seed: np.ndarray
+) -> np.ndarray:
+    """
+    Scrambled Halton points for sequence indices start+1..stop
+    
+    Each dimension uses its own prime base and a random digit permutation
+    (fixing 0) drawn from seed, so every chunk of a scenario scrambles alike.
+    """
+    rng = np.random.default_rng(seed)
+    indices = np.arange(start + 1, stop + 1, dtype=np.int64)
+    points = np.empty((len(indices), dimensions))
+    
+    for dim, base in enumerate(_primes(dimensions)):
+        permutation = np.concatenate([[0], rng.permutation(np.arange(1, base))])
+        remaining = indices.copy()
+        values = np.zeros(len(indices))
+        factor = 1.0 / base
+        while remaining.any():
+            remaining, digits = np.divmod(remaining, base)
+            values += permutation[digits] * factor
+            factor /= base
+        points[:, dim] = values
+    
+    return points
+
+
+def _sobol_points(
+    start: int,
+    stop: int,
+    dimensions: int,
+    seed: np.ndarray
+) -> np.ndarray:
+    """Scrambled Sobol points start..stop-1 (requires scipy)"""
+    import warnings
+    from scipy.stats import qmc
+    
+    engine = qmc.Sobol(d=dimensions, scramble=True, seed=np.random.default_rng(seed))
+    if start:
+        engine.fast_forward(start)
+    with warnings.catch_warnings():
+        # Chunks are not powers of two; the sequence as a whole still is balanced
+        warnings.simplefilter("ignore", UserWarning)
+        return engine.random(stop - start)
+
+
+def _primes(count: int) -> List[int]:
+    """First count prime numbers"""
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def _norm_ppf(u: np.ndarray) -> np.ndarray:
+    """Standard normal inverse CDF (Acklam's rational approximation, rel. error < 1.2e-9)"""
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+    
+    u = np.clip(u, 1e-16, 1 - 1e-16)
+    z = np.empty_like(u)
+    low = u < 0.02425
+    high = u > 1 - 0.02425
+    mid = ~(low | high)
+    
+    q = u[mid] - 0.5
+    r = q * q
+    z[mid] = ((((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q /
+              (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1))
+    
+    for mask, sign, tail in ((low, 1.0, u[low]), (high, -1.0, 1 - u[high])):
+        q = np.sqrt(-2 * np.log(tail))
+        z[mask] = sign * ((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+                          ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+    
+    return z
+
+
+def _simulate_tracked(chunk: _MonteCarloChunk) -> np.ndarray:
+    """
+    Tracked values of the paths in one chunk
+    
+    Returns:
+        Array of shape (paths, tracked): every period for fan charts,
+        otherwise only the terminal value
+    """
+    paths = chunk.stop - chunk.start
+    if chunk.periods == 0:
+        return np.full((paths, 1), float(chunk.base_value))
+    
+    values = _simulate_paths(_draw_shocks(chunk), chunk.base_value)
+    return values if chunk.fan_chart else values[:, -1:]
+
+
+def _run_chunk(chunk: _MonteCarloChunk, outcomes: np.ndarray) -> np.ndarray:
+    """Simulate one chunk into outcomes[:, start:stop] and return its per-period sums"""
+    block = outcomes[:, chunk.start:chunk.stop]
+    block[:] = _simulate_tracked(chunk).T
+    return block.sum(axis=1)
+
+
+def _run_shared_chunk(chunk: _MonteCarloChunk) -> np.ndarray:
+    """Process-pool entry point: simulate a chunk into the shared outcome buffer"""
+    tracked = chunk.periods if chunk.fan_chart and chunk.periods > 0 else 1
+    buffer = shared_memory.SharedMemory(name=chunk.buffer_name)
+    try:
+        outcomes = np.ndarray((tracked, chunk.simulations), dtype=np.float64, buffer=buffer.buf)
+        partial_sums = _run_chunk(chunk, outcomes)
+        del outcomes
+        return partial_sums
+    finally:
+        buffer.close()
+
+
+def _run_sketch_chunk(chunk: _MonteCarloChunk, relative_accuracy: float) -> List[QuantileSketch]:
+    """Simulate one chunk and summarize each tracked period in its own sketch"""
+    values = _simulate_tracked(chunk)
+    sketches = []
+    for column in range(values.shape[1]):
+        sketch = QuantileSketch(relative_accuracy)
+        sketch.update(values[:, column])
+        sketches.append(sketch)
+    return sketches
+
+
+def _simulate_paths(shocks: np.ndarray, base_value: float) -> np.ndarray:
+    """
+    Turn a block of growth shocks into value paths, in place
+    
+    Returns:
+        Array of shape (paths, periods) with the value at the end of each period
+    """
+    values = shocks
+    values += 1.0
+    # Fold the base value into the first period so the cumulative product
+    # multiplies in the same order as a period-by-period loop
+    values[:, 0] *= base_value
+    np.cumprod(values, axis=1, out=values)
+    return values
+
+
+def _exact_percentiles(values: np.ndarray) -> Tuple[Dict[str, float], float, float]:
+    """Percentiles at sorted-list indices, plus min and max, by partial selection"""
+    simulations = len(values)
+    ranks = {name: int(simulations * q) for name, q in PERCENTILES.items()}
+    # Partial selection of the needed order statistics instead of a full sort
+    kth = sorted(set(ranks.values()) | {0, simulations - 1})
+    ordered = np.partition(values, kth)
+    percentiles = {name: float(ordered[rank]) for name, rank in ranks.items()}
+    return percentiles, float(ordered[0]), float(ordered[-1])
+
+
+def _summarize_outcomes(
+    base_value: float,
+    periods: int,
+    outcomes: np.ndarray,
+    totals: np.ndarray,
+    fan_chart: bool = False
+) -> Dict:
+    """Percentile/mean/min/max summary of tracked outcomes (terminal period last)"""
+    simulations = outcomes.shape[1]
+    percentiles, low, high = _exact_percentiles(outcomes[-1])
+    
+    summary = {
+        "base_value": base_value,
+        "periods": periods,
+        "simulations": simulations,
+        "percentiles": percentiles,
+        "mean": float(totals[-1]) / simulations,
+        "min": low,
+        "max": high
+    }
+    
+    if fan_chart:
+        summary["fan_chart"] = [
+            {
+                "period": period + 1,
+                **_exact_percentiles(outcomes[period])[0],
+                "mean": float(totals[period]) / simulations
+            }
+            for period in range(periods)
+        ]
+    
+    return summary
+
+
+def _summarize_sketch(
+    base_value: float,
+    periods: int,
+    sketches: List[QuantileSketch],
+    fan_chart: bool = False
+) -> Dict:
+    """Percentile/mean/min/max summary from merged sketches, with their error bound"""
+    terminal = sketches[-1]
+    
+    summary = {
+        "base_value": base_value,
+        "periods": periods,
+        "simulations": terminal.count,
+        "percentiles": {
+            name: terminal.quantile(q) for name, q in PERCENTILES.items()
+        },
+        "mean": terminal.total / terminal.count,
+        "min": terminal.min,
+        "max": terminal.max,
+        "quantile_method": "sketch",
+        "accuracy": {
+            "relative_error": terminal.relative_accuracy,
+            "guaranteed": not any(sketch.collapsed for sketch in sketches)
         }
+    }
+    
+    if fan_chart:
+        summary["fan_chart"] = [
+            {
+                "period": period + 1,
+                **{name: sketch.quantile(q) for name, q in PERCENTILES.items()},
+                "mean": sketch.total / sketch.count
+            }
+            for period, sketch in enumerate(sketches[:periods])
+        ]
+    
+    return summary
+
+def _default_market_entry_uncertainty(point: Dict[str, float]) -> Dict[str, InputDistribution]:
+    """
+    Uncertainty around the point churn, CAC and ARPC when none is configured
+    
+    Inputs that are not positive have no spread to scale (and no logarithm
+    for the lognormals), so they are left out and stay at their point value.
+    """
+    distributions = {}
+    if point["churn_rate"] > 0:
+        distributions["churn_rate"] = InputDistribution(
+            "normal", {"loc": point["churn_rate"], "scale": 0.2 * point["churn_rate"]}, low=0.0, high=1.0
+        )
+    if point["customer_acquisition_cost"] > 0:
+        distributions["customer_acquisition_cost"] = InputDistribution(
+            "lognormal", {"mean": math.log(point["customer_acquisition_cost"]), "sigma": 0.25}
+        )
+    if point["avg_revenue_per_customer"] > 0:
+        distributions["avg_revenue_per_customer"] = InputDistribution(
+            "lognormal", {"mean": math.log(point["avg_revenue_per_customer"]), "sigma": 0.15}
+        )
+    return distributions
+
+
+def _sketch_distribution(sketch: QuantileSketch) -> Dict:
+    """Mean/min/max/percentiles of a sketched metric"""
+    return {
+        "mean": sketch.total / sketch.count,
+        "min": sketch.min,
+        "max": sketch.max,
+        "percentiles": {name: sketch.quantile(q) for name, q in PERCENTILES.items()}
+    }
 
 class InvestmentSimulator:
-    def __init__(self):
+    def __init__(self, cache: Optional[ForecastCache] = None):
         self.scenarios = []
+        self.cache = cache
     
+    @_cached
     def calculate_roi(
         self,
         investment: float,
@@ -194,6 +1634,7 @@ class InvestmentSimulator:
             "annualized_return": ((final_value / investment) ** (1 / time_horizon_years) - 1) * 100
         }
     
+    @_cached
     def simulate_market_entry(
         self,
         investment: float,
@@ -227,6 +1668,7 @@ class InvestmentSimulator:
         cumulative_customers = 0
         cumulative_revenue = 0
         cumulative_cost = investment
+        payback_period = None
         
         for year in range(1, time_to_achieve_years + 1):
             # Linear customer acquisition
@@ -252,6 +1694,9 @@ class InvestmentSimulator:
                 "cumulative_cost": cumulative_cost,
                 "profit": cumulative_revenue - cumulative_cost
             })
+            
+            if payback_period is None and cumulative_revenue - cumulative_cost >= 0:
+                payback_period = year
         
         final_year = yearly_results[-1]
         
@@ -266,83 +1711,558 @@ class InvestmentSimulator:
             "cumulative_cost": final_year["cumulative_cost"],
             "net_profit": final_year["profit"],
             "roi": ((final_year["profit"] / investment) * 100) if investment > 0 else 0,
+            "payback_period": payback_period,
             "yearly_breakdown": yearly_results
         }
     
+    @_cached
+    def simulate_market_entry_batch(
+        self,
+        investment: np.ndarray,
+        market_size: np.ndarray,
+        target_market_share: np.ndarray,
+        time_to_achieve_years: np.ndarray,
+        avg_revenue_per_customer: np.ndarray,
+        customer_acquisition_cost: np.ndarray,
+        churn_rate: np.ndarray = 0.05
+    ) -> Dict[str, np.ndarray]:
+        """
+        Simulate many market entry scenarios at once
+        
+        Inputs broadcast against each other. The yearly recurrence of
+        simulate_market_entry runs as array operations across all scenarios,
+        one step per year, with the same arithmetic as the scalar method.
+        
+        Args:
+            Same as simulate_market_entry, as scalars or arrays
+            
+        Returns:
+            Dictionary of arrays with the simulate_market_entry summary fields
+            (payback_period is inf where the scenario never pays back)
+        """
+        (investment, market_size, target_market_share, years,
+         avg_revenue_per_customer, customer_acquisition_cost, churn_rate) = np.broadcast_arrays(
+            *(np.asarray(value, dtype=np.float64) for value in (
+                investment, market_size, target_market_share, time_to_achieve_years,
+                avg_revenue_per_customer, customer_acquisition_cost, churn_rate
+            ))
+        )
+        if np.any(years < 1):
+            raise ValueError("time_to_achieve_years must be at least 1")
+        
+        target_revenue = market_size * target_market_share
+        target_customers = target_revenue / avg_revenue_per_customer
+        new_customers = target_customers / years
+        year_acquisition_cost = new_customers * customer_acquisition_cost
+        
+        cumulative_customers = np.zeros(years.shape)
+        cumulative_revenue = np.zeros(years.shape)
+        cumulative_cost = investment.copy()
+        year_revenue = np.zeros(years.shape)
+        payback_period = np.full(years.shape, np.inf)
+        
+        for year in range(1, int(years.max(initial=1)) + 1):
+            # Scenarios with shorter horizons keep their final-year state
+            active = year <= years
+            lost_customers = cumulative_customers * churn_rate
+            cumulative_customers = np.where(
+                active, cumulative_customers + new_customers - lost_customers, cumulative_customers
+            )
+            year_revenue = np.where(active, cumulative_customers * avg_revenue_per_customer, year_revenue)
+            cumulative_cost = np.where(active, cumulative_cost + year_acquisition_cost, cumulative_cost)
+            cumulative_revenue = np.where(active, cumulative_revenue + year_revenue, cumulative_revenue)
+            paid_back = active & np.isinf(payback_period) & (cumulative_revenue - cumulative_cost >= 0)
+            payback_period[paid_back] = year
+        
+        net_profit = cumulative_revenue - cumulative_cost
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roi = np.where(investment > 0, (net_profit / investment) * 100, 0.0)
+        
+        return {
+            "investment": investment,
+            "target_market_share": target_market_share * 100,
+            "time_horizon": years.astype(np.int64),
+            "final_customers": np.trunc(cumulative_customers).astype(np.int64),
+            "final_revenue": year_revenue,
+            "cumulative_revenue": cumulative_revenue,
+            "cumulative_cost": cumulative_cost,
+            "net_profit": net_profit,
+            "roi": roi,
+            "payback_period": payback_period
+        }
+    
+    @_cached
+    def simulate_market_entry_stochastic(
+        self,
+        investment: float,
+        market_size: float,
+        target_market_share: float,
+        time_to_achieve_years: int,
+        avg_revenue_per_customer: float,
+        customer_acquisition_cost: float,
+        churn_rate: float = 0.05,
+        distributions: Optional[Dict[str, InputDistribution]] = None,
+        paths: int = 100000,
+        seed: Optional[int] = None,
+        chunk_size: int = 262144,
+        confidence_level: float = 0.95,
+        relative_accuracy: float = 0.001
+    ) -> Dict:
+        """
+        Market entry simulation over uncertain inputs
+        
+        Inputs named in distributions are sampled per path; the rest stay at
+        the given values. Paths are evaluated chunk by chunk with
+        simulate_market_entry_batch and streamed into quantile sketches, so
+        memory is bounded by chunk_size however many paths are run.
+        
+        Args:
+            Point inputs: Same as simulate_market_entry
+            distributions: Sampling distribution per input name (default:
+                _default_market_entry_uncertainty around churn, CAC and ARPC)
+            paths: Number of simulated paths
+            seed: Optional seed for reproducible results
+            chunk_size: Paths evaluated per block
+            confidence_level: Level of the value-at-risk figures (e.g. 0.95)
+            relative_accuracy: Relative error bound of the reported percentiles
+            
+        Returns:
+            Distributions of net_profit, ROI and final_customers, plus
+            probability of loss and VaR/CVaR of net profit (as loss amounts)
+        """
+        point = {
+            "investment": investment,
+            "market_size": market_size,
+            "target_market_share": target_market_share,
+            "time_to_achieve_years": time_to_achieve_years,
+            "avg_revenue_per_customer": avg_revenue_per_customer,
+            "customer_acquisition_cost": customer_acquisition_cost,
+            "churn_rate": churn_rate
+        }
+        if distributions is None:
+            distributions = _default_market_entry_uncertainty(point)
+        if "time_to_achieve_years" in distributions:
+            raise ValueError("time_to_achieve_years cannot be sampled")
+        unknown = set(distributions) - set(point)
+        if unknown:
+            raise ValueError(f"Unknown market entry inputs: {sorted(unknown)}")
+        if paths < 1:
+            raise ValueError("paths must be at least 1")
+        
+        metrics = ("net_profit", "roi", "final_customers")
+        sketches = {metric: QuantileSketch(relative_accuracy) for metric in metrics}
+        losses = 0
+        
+        bounds = _chunk_bounds(paths, 1, chunk_size)
+        for (start, stop), chunk_seed in zip(bounds, np.random.SeedSequence(seed).spawn(len(bounds))):
+            rng = np.random.default_rng(chunk_seed)
+            sampled = {
+                name: distribution.sample(rng, stop - start)
+                for name, distribution in distributions.items()
+            }
+            results = self.simulate_market_entry_batch(**{**point, **sampled})
+            for metric in metrics:
+                sketches[metric].update(results[metric])
+            losses += int(np.count_nonzero(results["net_profit"] < 0))
+        
+        tail = 1 - confidence_level
+        net_profit = sketches["net_profit"]
+        
+        return {
+            "scenario": "Stochastic Market Entry Simulation",
+            "paths": paths,
+            "uncertain_inputs": {
+                name: {
+                    "distribution": distribution.kind,
+                    # Kept apart from the clip bounds: uniform's own params are low/high too
+                    "params": dict(distribution.params),
+                    "clip_low": distribution.low,
+                    "clip_high": distribution.high
+                }
+                for name, distribution in distributions.items()
+            },
+            **{metric: _sketch_distribution(sketches[metric]) for metric in metrics},
+            "probability_of_loss": losses / paths,
+            # Probability of loss in percent, the risk measure compare_scenarios ranks by
+            "risk_score": losses / paths * 100,
+            "value_at_risk": {
+                "confidence_level": confidence_level,
+                "net_profit": -net_profit.quantile(tail)
+            },
+            "conditional_value_at_risk": {
+                "confidence_level": confidence_level,
+                "net_profit": -net_profit.lower_tail_mean(tail)
+            },
+            "accuracy": {
+                "relative_error": relative_accuracy,
+                "guaranteed": not any(sketch.collapsed for sketch in sketches.values())
+            }
+        }
+    
+    @_cached
+    def sweep_market_entry(
+        self,
+        base: Dict[str, float],
+        ranges: Dict[str, List[float]]
+    ) -> Dict:
+        """
+        Evaluate market entry over the full grid of the given parameter ranges
+        
+        Args:
+            base: simulate_market_entry keyword arguments used for parameters
+                that are not swept
+            ranges: Values to sweep per parameter name; the grid is their
+                cartesian product
+            
+        Returns:
+            Dictionary with the swept "parameters" and "results" columns
+            (one entry per grid point, in C order of grid_shape) and the
+            "tornado" sensitivities over each range's min/max
+        """
+        axes = [np.asarray(values, dtype=np.float64) for values in ranges.values()]
+        grid = np.meshgrid(*axes, indexing="ij")
+        parameters = {name: column.ravel() for name, column in zip(ranges, grid)}
+        
+        results = self.simulate_market_entry_batch(**{**base, **parameters})
+        
+        return {
+            "grid_shape": tuple(len(axis) for axis in axes),
+            "parameters": parameters,
+            "results": results,
+            "tornado": self.tornado_sensitivity(
+                base, {name: (axis.min(), axis.max()) for name, axis in zip(ranges, axes)}
+            )
+        }
+    
+    @_cached
+    def tornado_sensitivity(
+        self,
+        base: Dict[str, float],
+        ranges: Dict[str, Tuple[float, float]],
+        metrics: Tuple[str, ...] = ("roi", "net_profit")
+    ) -> Dict:
+        """
+        One-at-a-time sensitivity of market entry outcomes (tornado chart data)
+        
+        Each parameter is moved to its low and high value with all others
+        held at base; every variation is evaluated in a single batch.
+        
+        Args:
+            base: simulate_market_entry keyword arguments for the base case
+                (a parameter missing from base is centered on its range)
+            ranges: (low, high) per parameter name
+            metrics: Result fields to report deltas for; the first orders the bars
+            
+        Returns:
+            Base metric values and per-parameter low/high/delta, widest swing first
+        """
+        names = list(ranges)
+        base = {
+            **{name: (low + high) / 2 for name, (low, high) in ranges.items()},
+            **base
+        }
+        columns = {name: np.full(1 + 2 * len(names), base[name], dtype=np.float64) for name in names}
+        for index, name in enumerate(names):
+            low, high = ranges[name]
+            columns[name][1 + 2 * index] = low
+            columns[name][2 + 2 * index] = high
+        
+        results = self.simulate_market_entry_batch(**{**base, **columns})
+        
+        sensitivities = []
+        for index, name in enumerate(names):
+            low, high = ranges[name]
+            entry = {"parameter": name, "low": float(low), "high": float(high), "base": float(base[name])}
+            for metric in metrics:
+                at_low = float(results[metric][1 + 2 * index])
+                at_high = float(results[metric][2 + 2 * index])
+                entry[metric] = {"low": at_low, "high": at_high, "delta": at_high - at_low}
+            sensitivities.append(entry)
+        
+        sensitivities.sort(key=lambda entry: abs(entry[metrics[0]]["delta"]), reverse=True)
+        
+        return {
+            "base": {metric: float(results[metric][0]) for metric in metrics},
+            "sensitivities": sensitivities
+        }
+    
     def compare_scenarios(
         self,
-        scenarios: List[Dict]
+        scenarios: Union[List[Dict], Dict[str, np.ndarray]],
+        top_k: int = 10
     ) -> Dict:
         """
         Compare multiple investment scenarios
         
         Args:
-            scenarios: List of scenario dictionaries
+            scenarios: Columnar scenario results (name -> array, e.g. from
+                simulate_market_entry_batch), or a list of scenario dictionaries
+            top_k: Number of scenarios to rank per metric
             
         Returns:
-            Comparison analysis
+            Comparison analysis with the best scenario per metric, top-k
+            rankings and the ROI / risk / payback Pareto frontier (as indices)
         """
+        if isinstance(scenarios, list):
+            columns = {
+                metric: np.array([scenario.get(metric, default) for scenario in scenarios], dtype=np.float64)
+                for metric, (_, default) in COMPARISON_METRICS.items()
+            }
+            row = lambda index: scenarios[index]
+        else:
+            columns = {
+                metric: np.asarray(scenarios.get(metric, np.full(_column_length(scenarios), default)), dtype=np.float64)
+                for metric, (_, default) in COMPARISON_METRICS.items()
+            }
+            row = lambda index: {name: _item(values[index]) for name, values in scenarios.items()}
+        
+        # Missing payback (None/NaN) ranks as never paying back
+        columns["payback_period"] = np.nan_to_num(columns["payback_period"], nan=np.inf)
+        
+        # Best by each metric, ranked like the top-k lists (NaN last, ties by index)
+        best = {
+            metric: int(self.top_scenarios(columns, metric, 1, largest=direction == "max")[0])
+            for metric, (direction, _) in COMPARISON_METRICS.items()
+        }
+        
         comparison = {
-            "scenarios": scenarios,
-            "best_roi": max(scenarios, key=lambda x: x.get("roi", 0)),
-            "lowest_risk": min(scenarios, key=lambda x: x.get("risk_score", 100)),
-            "fastest_payback": min(scenarios, key=lambda x: x.get("payback_period", 999))
+            "scenario_count": _column_length(columns),
+            "best_roi": row(best["roi"]),
+            "lowest_risk": row(best["risk_score"]),
+            "fastest_payback": row(best["payback_period"]),
+            "rankings": {
+                metric: self.top_scenarios(columns, metric, top_k, largest=direction == "max").tolist()
+                for metric, (direction, _) in COMPARISON_METRICS.items()
+            },
+            "pareto_frontier": self.pareto_frontier(columns).tolist()
         }
         
         return comparison
+    
+    def top_scenarios(
+        self,
+        columns: Dict[str, np.ndarray],
+        metric: str,
+        k: int = 10,
+        largest: bool = True
+    ) -> np.ndarray:
+        """
+        Indices of the k best scenarios by one metric, best first
+        
+        Ties are broken by index. Uses a partial sort (argpartition), so the
+        cost is O(n + k log k) plus the scenarios tied with the k-th.
+        """
+        values = np.asarray(columns[metric], dtype=np.float64)
+        keys = -values if largest else values
+        # NaN never ranks ahead of a real value
+        keys = np.nan_to_num(keys, nan=np.inf)
+        k = min(k, len(keys))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        if k < len(keys):
+            # argpartition splits ties at the k-th key arbitrarily; take all of them
+            threshold = keys[np.argpartition(keys, k - 1)[k - 1]]
+            candidates = np.flatnonzero(keys <= threshold)
+        else:
+            candidates = np.arange(len(keys))
+        return candidates[np.lexsort((candidates, keys[candidates]))][:k]
+    
+    def pareto_frontier(
+        self,
+        columns: Dict[str, np.ndarray],
+        objectives: Optional[Dict[str, str]] = None
+    ) -> np.ndarray:
+        """
+        Indices of the non-dominated scenarios (skyline), in ascending order
+        
+        Args:
+            columns: Scenario metrics as arrays
+            objectives: Metric name -> "max" or "min" (default: high ROI,
+                low risk_score, short payback_period)
+            
+        Returns:
+            Indices of scenarios no other scenario beats on every objective
+        """
+        if objectives is None:
+            objectives = {metric: direction for metric, (direction, _) in COMPARISON_METRICS.items()}
+        
+        # Minimization form, with missing values as the worst possible
+        points = np.column_stack([
+            np.nan_to_num(
+                -np.asarray(columns[metric], dtype=np.float64) if direction == "max"
+                else np.asarray(columns[metric], dtype=np.float64),
+                nan=np.inf
+            )
+            for metric, direction in objectives.items()
+        ])
+        
+        # Bulk-discard points beaten by a few pivots before sorting the rest
+        candidates = np.flatnonzero(~_pivot_dominated(points))
+        
+        # Identical scenarios share a fate; compute the skyline over distinct points
+        order = candidates[np.lexsort(points[candidates].T[::-1])]
+        ordered = points[order]
+        distinct = np.r_[True, np.any(ordered[1:] != ordered[:-1], axis=1)]
+        group = np.cumsum(distinct) - 1
+        
+        keep = np.zeros(len(points), dtype=bool)
+        keep[order] = _skyline(ordered[distinct])[group]
+        return np.flatnonzero(keep)
+
+# Metrics compare_scenarios ranks by: direction and default for missing values
+COMPARISON_METRICS = {
+    "roi": ("max", 0),
+    "risk_score": ("min", 100),
+    "payback_period": ("min", 999)
+}
+
+def _column_length(columns: Dict[str, np.ndarray]) -> int:
+    return len(next(iter(columns.values()))) if columns else 0
+
+def _item(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+def _skyline(points: np.ndarray) -> np.ndarray:
+    """
+    Non-dominated mask for distinct, lexicographically sorted points under minimization
+    
+    Up to three objectives use a sort-and-sweep: points are visited in
+    order while a 2-D staircase of the frontier so far answers "is anything
+    at least as good on the remaining objectives" by bisection, giving
+    O(n log n) comparisons. More objectives fall back to vectorized
+    block-nested-loop dominance checks against the frontier.
+    """
+    n, dimensions = points.shape
+    keep = np.zeros(n, dtype=bool)
+    order = range(n)
+    
+    if dimensions <= 3:
+        rest = np.zeros((n, 2))
+        rest[:, :dimensions - 1] = points[:, 1:]
+        stair_y: List[float] = []
+        stair_z: List[float] = []
+        for index in order:
+            y, z = rest[index]
+            position = bisect.bisect_right(stair_y, y) - 1
+            if position >= 0 and stair_z[position] <= z:
+                continue
+            keep[index] = True
+            # Drop staircase steps the new point dominates in (y, z)
+            start = bisect.bisect_left(stair_y, y)
+            stop = start
+            while stop < len(stair_y) and stair_z[stop] >= z:
+                stop += 1
+            stair_y[start:stop] = [y]
+            stair_z[start:stop] = [z]
+        return keep
+    
+    frontier = np.zeros((0, dimensions))
+    for index in order:
+        point = points[index]
+        if np.any(np.all(frontier <= point, axis=1)):
+            continue
+        keep[index] = True
+        frontier = np.vstack([frontier, point])
+    return keep
+
+def _pivot_dominated(points: np.ndarray, pivots: int = 32) -> np.ndarray:
+    """Mask of points strictly dominated by a minimizer of some positive weighting"""
+    finite = np.isfinite(points)
+    low = np.where(finite, points, np.inf).min(axis=0, initial=np.inf)
+    high = np.where(finite, points, -np.inf).max(axis=0, initial=-np.inf)
+    low[~np.isfinite(low)] = 0.0
+    span = np.where(high > low, high - low, 1.0)
+    scaled = (points - low) / span
+    
+    weights = np.random.default_rng(0).dirichlet(np.ones(points.shape[1]), pivots) + 1e-3
+    pivot_rows = {int(np.argmin(scaled @ weight)) for weight in weights}
+    
+    columns = [np.ascontiguousarray(points[:, dim]) for dim in range(points.shape[1])]
+    dominated = np.zeros(len(points), dtype=bool)
+    for row in pivot_rows:
+        at_least = np.ones(len(points), dtype=bool)
+        strictly = np.zeros(len(points), dtype=bool)
+        for column, value in zip(columns, points[row]):
+            at_least &= column >= value
+            strictly |= column > value
+        dominated |= at_least & strictly
+    return dominated
 
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Market forecasting and investment simulation")
+    parser.add_argument("--input", help="Series CSV/JSONL file (current_value, growth_rate[, name]) to forecast in bulk")
+    parser.add_argument("--output", default="forecast_results.jsonl",
+                        help="JSONL results file, gzip-compressed if it ends in .gz")
+    parser.add_argument("--periods", type=int, default=5, help="Periods to forecast for --input series")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Series forecast per chunk")
+    parser.add_argument("--database", help="Upsert the market entry scenario into investment_scenarios: a SQLite path or postgresql:// DSN")
+    args = parser.parse_args()
+    
     # Forecasting example
     forecast_model = MarketForecastingModel()
     
-    tam_forecast = forecast_model.linear_forecast(
-        current_value=77000000000,
-        growth_rate=0.155,
-        periods=5
-    )
-    
-    print("\n=== TAM Forecast (5 years) ===")
-    for i, value in enumerate(tam_forecast):
-        print(f"Year {i}: ${value/1000000000:.2f}B")
-    
-    # Monte Carlo simulation
-    mc_results = forecast_model.monte_carlo_simulation(
-        base_value=1250000000,
-        expected_growth=0.22,
-        volatility=0.15,
-        periods=3,
-        simulations=1000
-    )
-    
-    print("\n=== Monte Carlo Simulation (SOM, 3 years) ===")
-    print(f"P50 (Median): ${mc_results['percentiles']['p50']/1000000:.1f}M")
-    print(f"P90 (Optimistic): ${mc_results['percentiles']['p90']/1000000:.1f}M")
-    print(f"P10 (Conservative): ${mc_results['percentiles']['p10']/1000000:.1f}M")
-    
-    # Investment simulation
-    simulator = InvestmentSimulator()
-    
-    market_entry = simulator.simulate_market_entry(
-        investment=5000000,
-        market_size=1250000000,
-        target_market_share=0.05,
-        time_to_achieve_years=3,
-        avg_revenue_per_customer=50000,
-        customer_acquisition_cost=15000,
-        churn_rate=0.05
-    )
-    
-    print("\n=== Market Entry Simulation ===")
-    print(f"Investment: ${market_entry['investment']:,.0f}")
-    print(f"Final Customers: {market_entry['final_customers']:,}")
-    print(f"Net Profit: ${market_entry['net_profit']:,.0f}")
-    print(f"ROI: {market_entry['roi']:.1f}%")
-    
-    # Save results
-    with open("forecast_results.json", "w") as f:
-        json.dump({
-            "tam_forecast": tam_forecast,
-            "monte_carlo": mc_results,
-            "market_entry": market_entry
-        }, f, indent=2)
+    if args.input:
+        # Bulk forecasts: one JSON line per series and a final totals line
+        with JsonlWriter(args.output) as writer:
+            summary = forecast_model.stream_forecasts(
+                read_records(args.input), args.periods, writer, args.chunk_size
+            )
+            writer.write(summary)
+        print(f"Forecast {summary['series_count']:,} series -> {args.output}")
+    else:
+        tam_forecast = forecast_model.linear_forecast(
+            current_value=77000000000,
+            growth_rate=0.155,
+            periods=5
+        )
+        
+        print("\n=== TAM Forecast (5 years) ===")
+        for i, value in enumerate(tam_forecast):
+            print(f"Year {i}: ${value/1000000000:.2f}B")
+        
+        # Monte Carlo simulation
+        mc_results = forecast_model.monte_carlo_simulation(
+            base_value=1250000000,
+            expected_growth=0.22,
+            volatility=0.15,
+            periods=3,
+            simulations=1000,
+            seed=42
+        )
+        
+        print("\n=== Monte Carlo Simulation (SOM, 3 years) ===")
+        print(f"P50 (Median): ${mc_results['percentiles']['p50']/1000000:.1f}M")
+        print(f"P90 (Optimistic): ${mc_results['percentiles']['p90']/1000000:.1f}M")
+        print(f"P10 (Conservative): ${mc_results['percentiles']['p10']/1000000:.1f}M")
+        
+        # Investment simulation
+        simulator = InvestmentSimulator()
+        
+        entry_inputs = {
+            "investment": 5000000,
+            "market_size": 1250000000,
+            "target_market_share": 0.05,
+            "time_to_achieve_years": 3,
+            "avg_revenue_per_customer": 50000,
+            "customer_acquisition_cost": 15000,
+            "churn_rate": 0.05
+        }
+        market_entry = simulator.simulate_market_entry(**entry_inputs)
+        
+        print("\n=== Market Entry Simulation ===")
+        print(f"Investment: ${market_entry['investment']:,.0f}")
+        print(f"Final Customers: {market_entry['final_customers']:,}")
+        print(f"Net Profit: ${market_entry['net_profit']:,.0f}")
+        print(f"ROI: {market_entry['roi']:.1f}%")
+        
+        # Save results, one JSON line per result
+        with JsonlWriter(args.output) as writer:
+            writer.write({"name": "tam_forecast", "result": tam_forecast})
+            writer.write({"name": "monte_carlo", "result": mc_results})
+            writer.write({"name": "market_entry", "result": market_entry})
+        
+        if args.database:
+            with open_results_store(args.database) as store:
+                store.upsert_scenarios([scenario_row("Market Entry - Base Case", entry_inputs, market_entry)])
@@ -3,10 +3,26 @@ Market Sizing Model - TAM/SAM/SOM Calculator
 Calculates Total Addressable Market, Serviceable Addressable Market, and Serviceable Obtainable Market
 """
 
-import json
-from typing import Dict, List, Optional
+import argparse
+import itertools
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 
+import numpy as np
+
+from results_store import open_results_store
+from streaming_io import JsonlWriter, TeeWriter, iter_chunks, read_records
+
+# Percentiles of total SOM reported by the portfolio simulation
+PERCENTILES = {"p5": 0.05, "p10": 0.1, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9, "p95": 0.95}
+
+# Upper bound on growth shocks held in memory per block (~32 MB of float64)
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+# Share of growth variance explained by each shared segment attribute
+DEFAULT_ATTRIBUTE_WEIGHTS = {"geography": 0.3, "industry": 0.2, "customer_type": 0.2}
+
 @dataclass
 class MarketSegment:
     name: str
@@ -17,6 +33,82 @@ class MarketSegment:
     avg_revenue_per_customer: float
     market_growth_rate: float
 
+
+class SegmentTable:
+    """
+    Struct-of-arrays store of market segments
+    
+    Holds the MarketSegment fields as one NumPy column each, so sizing and
+    aggregation run as array expressions instead of per-segment objects.
+    """
+    
+    TEXT_COLUMNS = ("name", "industry", "geography", "customer_type")
+    NUMERIC_COLUMNS = ("total_companies", "avg_revenue_per_customer", "market_growth_rate")
+    
+    __slots__ = TEXT_COLUMNS + NUMERIC_COLUMNS
+    
+    def __init__(
+        self,
+        name: Sequence[str],
+        industry: Sequence[str],
+        geography: Sequence[str],
+        customer_type: Sequence[str],
+        total_companies: Sequence[int],
+        avg_revenue_per_customer: Sequence[float],
+        market_growth_rate: Sequence[float]
+    ):
+        self.name = np.asarray(name, dtype=object)
+        self.industry = np.asarray(industry, dtype=object)
+        self.geography = np.asarray(geography, dtype=object)
+        self.customer_type = np.asarray(customer_type, dtype=object)
+        self.total_companies = np.asarray(total_companies, dtype=np.int64)
+        self.avg_revenue_per_customer = np.asarray(avg_revenue_per_customer, dtype=np.float64)
+        self.market_growth_rate = np.asarray(market_growth_rate, dtype=np.float64)
+        
+        lengths = {len(getattr(self, column)) for column in self.__slots__}
+        if len(lengths) > 1:
+            raise ValueError("All segment columns must have the same length")
+    
+    @classmethod
+    def from_segments(cls, segments: List[MarketSegment]) -> "SegmentTable":
+        """Build a table from MarketSegment records"""
+        return cls(**{
+            column: [getattr(segment, column) for segment in segments]
+            for column in cls.__slots__
+        })
+    
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "SegmentTable":
+        """
+        Build a table from CSV/JSONL-style dicts keyed by MarketSegment fields
+        
+        The market_segments column name segment_name is accepted for name.
+        Numeric fields may be strings, as read from CSV.
+        """
+        columns = {
+            column: [record["segment_name"] if column == "name" and "name" not in record else record[column]
+                     for record in records]
+            for column in cls.TEXT_COLUMNS
+        }
+        for column in cls.NUMERIC_COLUMNS:
+            columns[column] = np.asarray([record[column] for record in records]).astype(np.float64)
+        return cls(**columns)
+    
+    def __len__(self) -> int:
+        return len(self.name)
+    
+    def __getitem__(self, index: int) -> MarketSegment:
+        return MarketSegment(**{
+            column: getattr(self, column)[index].item()
+            if column in self.NUMERIC_COLUMNS else getattr(self, column)[index]
+            for column in self.__slots__
+        })
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
 class MarketSizingModel:
     def __init__(self):
         self.segments: List[MarketSegment] = []
@@ -123,27 +215,63 @@ class MarketSizingModel:
             }
         }
     
-    def calculate_multi_segment_sizing(self, segments: List[MarketSegment]) -> Dict:
+    def calculate_sizing_columns(
+        self,
+        segments: Union[List[MarketSegment], SegmentTable],
+        penetration_rate: float = 0.30,
+        market_share: float = 0.05,
+        competitive_factor: float = 0.8
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized TAM/SAM/SOM and next-year projection for every segment
+        
+        Evaluates the same expressions as calculate_full_market_sizing, in
+        the same order, so each value matches it exactly.
+        
+        Returns:
+            Dictionary of per-segment arrays: tam, sam, som and their
+            *_next_year projections
+        """
+        return _sizing_columns(_as_table(segments), penetration_rate, market_share, competitive_factor)
+    
+    def calculate_multi_segment_sizing(
+        self,
+        segments: Union[List[MarketSegment], SegmentTable],
+        penetration_rate: float = 0.30,
+        market_share: float = 0.05,
+        competitive_factor: float = 0.8,
+        include_segments: bool = True
+    ) -> Dict:
         """
         Calculate market sizing across multiple segments
         
+        Sizing runs column-wise over a SegmentTable without per-segment
+        output; per-segment dictionaries are only built when asked for.
+        
+        Args:
+            segments: MarketSegment records or a SegmentTable
+            penetration_rate, market_share, competitive_factor: Sizing
+                assumptions, as in calculate_full_market_sizing
+            include_segments: Include the calculate_full_market_sizing
+                dictionary of every segment (expensive for large tables)
+            
         Returns:
             Aggregated market sizing data
         """
-        results = []
-        total_tam = 0
-        total_sam = 0
-        total_som = 0
+        table = _as_table(segments)
+        columns = self.calculate_sizing_columns(table, penetration_rate, market_share, competitive_factor)
+        total_tam = _sequential_sum(columns["tam"])
+        total_sam = _sequential_sum(columns["sam"])
+        total_som = _sequential_sum(columns["som"])
         
-        for segment in segments:
-            sizing = self.calculate_full_market_sizing(segment)
-            results.append(sizing)
-            total_tam += sizing["current_year"]["tam"]
-            total_sam += sizing["current_year"]["sam"]
-            total_som += sizing["current_year"]["som"]
+        results = {}
+        if include_segments:
+            results["segments"] = _sizing_records(
+                table, columns, penetration_rate, market_share, competitive_factor
+            )
         
         return {
-            "segments": results,
+            **results,
             "totals": {
                 "tam": total_tam,
                 "sam": total_sam,
@@ -151,11 +279,642 @@ class MarketSizingModel:
                 "sam_percentage": (total_sam / total_tam) * 100,
                 "som_percentage": (total_som / total_tam) * 100
             },
-            "segment_count": len(segments)
+            "segment_count": len(table)
+        }
+    
+    def stream_multi_segment_sizing(
+        self,
+        chunks: Iterable[Union[List[MarketSegment], SegmentTable]],
+        writer: Optional[JsonlWriter] = None,
+        penetration_rate: float = 0.30,
+        market_share: float = 0.05,
+        competitive_factor: float = 0.8
+    ) -> Dict:
+        """
+        Size segments chunk by chunk, streaming per-segment results
+        
+        Each chunk is sized column-wise, its calculate_full_market_sizing
+        dictionaries are written to writer (if given) and dropped, and the
+        totals are carried forward. Memory is bounded by the chunk size and
+        the totals equal calculate_multi_segment_sizing over all segments.
+        
+        Args:
+            chunks: Segment chunks, e.g. from read_segments
+            writer: Destination for one JSON line per segment
+            penetration_rate, market_share, competitive_factor: Sizing
+                assumptions, as in calculate_full_market_sizing
+            
+        Returns:
+            Aggregated totals and segment count (no per-segment data)
+        """
+        total_tam = total_sam = total_som = 0.0
+        segment_count = 0
+        for chunk in chunks:
+            table = _as_table(chunk)
+            if not len(table):
+                continue
+            columns = self.calculate_sizing_columns(table, penetration_rate, market_share, competitive_factor)
+            total_tam = _sequential_sum(columns["tam"], total_tam)
+            total_sam = _sequential_sum(columns["sam"], total_sam)
+            total_som = _sequential_sum(columns["som"], total_som)
+            segment_count += len(table)
+            if writer is not None:
+                writer.write_many(_sizing_records(
+                    table, columns, penetration_rate, market_share, competitive_factor
+                ))
+        
+        return {
+            "totals": {
+                "tam": total_tam,
+                "sam": total_sam,
+                "som": total_som,
+                "sam_percentage": (total_sam / total_tam) * 100 if total_tam else 0.0,
+                "som_percentage": (total_som / total_tam) * 100 if total_tam else 0.0
+            },
+            "segment_count": segment_count
+        }
+    
+    def calculate_sizing_grid(
+        self,
+        segments: Union[List[MarketSegment], SegmentTable],
+        penetration_rates: Sequence[float],
+        market_shares: Sequence[float],
+        competitive_factors: Sequence[float],
+        group_by: Optional[str] = None
+    ) -> Dict:
+        """
+        Market sizing over every combination of assumption values
+        
+        TAM does not depend on the assumptions, so it is summed once per
+        segment (or per group) and SAM/SOM are broadcast over the grid:
+        SAM is TAM x penetration and SOM adds the outer product with share
+        and competitive factor. Cost is O(segments + grid size) rather than
+        one calculate_full_market_sizing call per segment and grid point.
+        
+        Args:
+            segments: MarketSegment records or a SegmentTable
+            penetration_rates: Penetration rates to evaluate (axis P)
+            market_shares: Market share targets to evaluate (axis S)
+            competitive_factors: Competitive adjustments to evaluate (axis C)
+            group_by: Optional segment dimension (e.g. "geography") adding a
+                leading axis with one entry per distinct value
+            
+        Returns:
+            Dictionary with the assumption axes, tam/tam_next_year (scalar or
+            per group), sam/sam_next_year of shape (P,) and som/som_next_year
+            of shape (P, S, C), each prefixed by the group axis if grouped
+        """
+        table = _as_table(segments)
+        penetration = np.atleast_1d(np.asarray(penetration_rates, dtype=np.float64))
+        share = np.atleast_1d(np.asarray(market_shares, dtype=np.float64))
+        competitive = np.atleast_1d(np.asarray(competitive_factors, dtype=np.float64))
+        
+        tam = table.total_companies * table.avg_revenue_per_customer
+        tam_next_year = tam * (1 + table.market_growth_rate)
+        result = {
+            "penetration_rate": penetration,
+            "market_share": share,
+            "competitive_factor": competitive
+        }
+        if group_by is None:
+            tam_total = np.array([tam.sum(), tam_next_year.sum()])
+        else:
+            if group_by not in SizingCube.DIMENSIONS:
+                raise ValueError(f"group_by must be one of {SizingCube.DIMENSIONS}")
+            labels, codes = _factorize(getattr(table, group_by))
+            result["groups"] = labels.tolist()
+            tam_total = np.stack([
+                np.bincount(codes, weights=tam, minlength=len(labels)),
+                np.bincount(codes, weights=tam_next_year, minlength=len(labels))
+            ])
+        
+        # Trailing axes: (P,) for SAM and (P, S, C) for SOM, after any group axis
+        tam_total = tam_total[..., np.newaxis]
+        sam = tam_total * penetration
+        som = sam[..., :, np.newaxis, np.newaxis] * share[:, np.newaxis] * competitive
+        
+        result.update({
+            "tam": tam_total[0, ..., 0],
+            "sam": sam[0],
+            "som": som[0],
+            "tam_next_year": tam_total[1, ..., 0],
+            "sam_next_year": sam[1],
+            "som_next_year": som[1]
+        })
+        return result
+    
+    def attribute_factor_loadings(
+        self,
+        segments: List[MarketSegment],
+        weights: Optional[Dict[str, float]] = None
+    ) -> np.ndarray:
+        """
+        Factor loadings that correlate segments sharing an attribute
+        
+        Each distinct attribute value (e.g. geography "North America") is a
+        common growth factor. Two segments' growth correlation is the sum of
+        the weights of the attributes they share, so NA Enterprise and NA SMB
+        move together through the geography and industry factors.
+        
+        Args:
+            segments: MarketSegment records or a SegmentTable
+            weights: Variance share per MarketSegment attribute (default:
+                DEFAULT_ATTRIBUTE_WEIGHTS); must sum to at most 1
+            
+        Returns:
+            Loadings matrix of shape (segments, factors) for simulate_portfolio
+        """
+        if weights is None:
+            weights = DEFAULT_ATTRIBUTE_WEIGHTS
+        if any(weight < 0 for weight in weights.values()) or sum(weights.values()) > 1:
+            raise ValueError("attribute weights must be non-negative and sum to at most 1")
+        
+        table = _as_table(segments)
+        blocks = []
+        for attribute, weight in weights.items():
+            levels, codes = np.unique(getattr(table, attribute).astype(str), return_inverse=True)
+            block = np.zeros((len(table), len(levels)))
+            block[np.arange(len(table)), codes] = np.sqrt(weight)
+            blocks.append(block)
+        return np.hstack(blocks) if blocks else np.zeros((len(table), 0))
+    
+    def simulate_portfolio(
+        self,
+        segments: Union[List[MarketSegment], SegmentTable],
+        correlation: Optional[np.ndarray] = None,
+        growth_volatility: Union[float, Sequence[float]] = 0.05,
+        factor_loadings: Optional[np.ndarray] = None,
+        years: int = 1,
+        paths: int = 100000,
+        seed: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        penetration_rate: float = 0.30,
+        market_share: float = 0.05,
+        competitive_factor: float = 0.8,
+        return_totals: bool = False
+    ) -> Dict:
+        """
+        Joint distribution of total SOM across segments with correlated growth
+        
+        Each year a segment grows by market_growth_rate plus a normal shock
+        scaled by its growth_volatility. Shocks are correlated across
+        segments either through a full correlation matrix (Cholesky factor,
+        or an eigendecomposition when the matrix is only semi-definite) or
+        through factor_loadings, where a segment's shock is its loadings on
+        a few common factors plus idiosyncratic noise - the cheaper choice
+        for hundreds of segments. Paths run in blocks of chunk_size, each
+        with its own stream spawned from seed, so memory is bounded and the
+        result does not depend on anything but (seed, chunk_size).
+        
+        Args:
+            segments: Market segments in the portfolio (records or a SegmentTable)
+            correlation: Segment growth correlation matrix (default: independent)
+            growth_volatility: Standard deviation of the yearly growth rate,
+                one value or one per segment
+            factor_loadings: Alternative to correlation, shape (segments,
+                factors); rows must have squared norm at most 1
+            years: Number of years of growth to simulate
+            paths: Number of simulated paths
+            seed: Optional seed for reproducible results
+            chunk_size: Paths per block (default: bounded by MAX_BLOCK_ELEMENTS)
+            penetration_rate, market_share, competitive_factor: SOM
+                assumptions, as in calculate_full_market_sizing
+            return_totals: Also return the simulated totals array
+            
+        Returns:
+            Distribution of total SOM after the given years and each
+            segment's share of its variance (Euler allocation, summing to 1)
+        """
+        if paths < 1:
+            raise ValueError("paths must be at least 1")
+        if years < 1:
+            raise ValueError("years must be at least 1")
+        if correlation is not None and factor_loadings is not None:
+            raise ValueError("Pass either correlation or factor_loadings, not both")
+        
+        table = _as_table(segments)
+        count = len(table)
+        current_som = self.calculate_sizing_columns(table, penetration_rate, market_share, competitive_factor)["som"]
+        growth = table.market_growth_rate
+        volatility = np.broadcast_to(np.asarray(growth_volatility, dtype=np.float64), (count,))
+        
+        if factor_loadings is not None:
+            loadings = np.asarray(factor_loadings, dtype=np.float64)
+            if loadings.ndim != 2 or loadings.shape[0] != count:
+                raise ValueError("factor_loadings must have one row per segment")
+            common = np.einsum("ij,ij->i", loadings, loadings)
+            if np.any(common > 1 + 1e-12):
+                raise ValueError("factor_loadings rows must have squared norm at most 1")
+            idiosyncratic = np.sqrt(np.clip(1 - common, 0, None))
+        else:
+            loadings = None if correlation is None else _correlation_factor(correlation, count)
+            idiosyncratic = None
+        
+        # Moments are accumulated around the deterministic growth path to
+        # keep the streamed covariance sums well conditioned
+        reference = current_som * (1 + growth) ** years
+        shift = reference.sum()
+        totals = np.empty(paths)
+        sum_x = np.zeros(count)
+        sum_xx = np.zeros(count)
+        sum_xt = np.zeros(count)
+        
+        if chunk_size is None:
+            chunk_size = max(1, MAX_BLOCK_ELEMENTS // max(count, 1))
+        bounds = [(start, min(start + chunk_size, paths)) for start in range(0, paths, chunk_size)]
+        for (start, stop), chunk_seed in zip(bounds, np.random.SeedSequence(seed).spawn(len(bounds))):
+            rng = np.random.default_rng(chunk_seed)
+            outcome = np.broadcast_to(current_som, (stop - start, count)).copy()
+            for _ in range(years):
+                shocks = _correlated_shocks(rng, stop - start, count, loadings, idiosyncratic)
+                shocks *= volatility
+                shocks += 1 + growth
+                # A segment can shrink to nothing but not below it
+                np.maximum(shocks, 0, out=shocks)
+                outcome *= shocks
+            outcome -= reference
+            centered_total = outcome.sum(axis=1)
+            totals[start:stop] = centered_total
+            sum_x += outcome.sum(axis=0)
+            sum_xx += np.einsum("ij,ij->j", outcome, outcome)
+            sum_xt += centered_total @ outcome
+        
+        mean_x = sum_x / paths
+        mean_t = mean_x.sum()
+        cov_xt = sum_xt / paths - mean_x * mean_t
+        variance = cov_xt.sum()
+        std_x = np.sqrt(np.clip(sum_xx / paths - mean_x ** 2, 0, None))
+        std_t = np.sqrt(max(variance, 0.0))
+        totals += shift
+        
+        ranks = {name: int(paths * q) for name, q in PERCENTILES.items()}
+        ordered = np.partition(totals, sorted(set(ranks.values()) | {0, paths - 1}))
+        contribution = cov_xt / variance if variance > 0 else np.zeros(count)
+        
+        result = {
+            "scenario": "Correlated Portfolio Simulation",
+            "segment_count": count,
+            "paths": paths,
+            "years": years,
+            "current_som": float(current_som.sum()),
+            "total_som": {
+                "expected": shift + mean_t,
+                "std_dev": std_t,
+                "min": float(ordered[0]),
+                "max": float(ordered[-1]),
+                "percentiles": {name: float(ordered[rank]) for name, rank in ranks.items()}
+            },
+            # Portfolio volatility relative to the sum of segment volatilities
+            "diversification_ratio": std_t / std_x.sum() if std_x.sum() > 0 else 1.0,
+            "segments": [
+                {
+                    "segment_name": name,
+                    "current_som": float(current_som[i]),
+                    "expected_som": float(reference[i] + mean_x[i]),
+                    "std_dev": float(std_x[i]),
+                    "variance_contribution": float(contribution[i]),
+                    "correlation_with_total": float(cov_xt[i] / (std_x[i] * std_t)) if std_x[i] * std_t > 0 else 0.0
+                }
+                for i, name in enumerate(table.name)
+            ]
         }
+        if return_totals:
+            result["totals"] = totals
+        return result
+
+
+class SizingCube:
+    """
+    Precomputed TAM/SAM/SOM rollups over every combination of dimensions
+    
+    Keeps one aggregate table (cuboid) per subset of DIMENSIONS, from the
+    grand total down to industry x geography x customer_type, keyed by the
+    dimension values. Adding, changing or removing a segment touches one
+    cell per cuboid, so the cube stays current without re-sizing
+    everything. A filtered total is a single lookup and a group-by visits
+    only the cells of one cuboid.
+    """
+    
+    DIMENSIONS = ("industry", "geography", "customer_type")
+    MEASURES = ("tam", "sam", "som", "tam_next_year", "sam_next_year", "som_next_year")
+    
+    def __init__(
+        self,
+        segments: Union[List[MarketSegment], SegmentTable, None] = None,
+        penetration_rate: float = 0.30,
+        market_share: float = 0.05,
+        competitive_factor: float = 0.8
+    ):
+        self.penetration_rate = penetration_rate
+        self.market_share = market_share
+        self.competitive_factor = competitive_factor
+        self._cuboids: Dict[Tuple[str, ...], Dict[Tuple, np.ndarray]] = {
+            dimensions: {}
+            for size in range(len(self.DIMENSIONS) + 1)
+            for dimensions in itertools.combinations(self.DIMENSIONS, size)
+        }
+        # Segment name -> (dimension values, measure row) for later removal
+        self._members: Dict[str, Tuple[Tuple[str, ...], np.ndarray]] = {}
+        if segments is not None:
+            self.add_segments(segments)
+    
+    def __len__(self) -> int:
+        return len(self._members)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._members
+    
+    def add_segments(self, segments: Union[List[MarketSegment], SegmentTable]):
+        """Bulk-load new segments with one vectorized pass per cuboid"""
+        table = _as_table(segments)
+        names = table.name.tolist()
+        if len(set(names)) != len(names) or any(name in self._members for name in names):
+            raise ValueError("Segment names must be unique within the cube")
+        
+        columns = _sizing_columns(table, self.penetration_rate, self.market_share, self.competitive_factor)
+        # Trailing column counts segments per cell
+        rows = np.column_stack([columns[measure] for measure in self.MEASURES] + [np.ones(len(table))])
+        keys = list(zip(*(getattr(table, dimension).tolist() for dimension in self.DIMENSIONS)))
+        self._members.update(zip(names, zip(keys, rows)))
+        
+        if not len(table):
+            return
+        levels = {}
+        codes = {}
+        for dimension in self.DIMENSIONS:
+            levels[dimension], codes[dimension] = _factorize(getattr(table, dimension))
+        
+        for dimensions, cells in self._cuboids.items():
+            # Dense cell number per segment, then per-cell sums by bincount
+            labels = [()]
+            group = np.zeros(len(table), dtype=np.intp)
+            if dimensions:
+                shape = tuple(len(levels[dimension]) for dimension in dimensions)
+                flat = np.ravel_multi_index([codes[dimension] for dimension in dimensions], shape)
+                occupied, group = np.unique(flat, return_inverse=True)
+                indices = np.unravel_index(occupied, shape)
+                labels = list(zip(*(levels[dimension][index] for dimension, index in zip(dimensions, indices))))
+            sums = np.column_stack([
+                np.bincount(group.ravel(), weights=rows[:, column], minlength=len(labels))
+                for column in range(rows.shape[1])
+            ])
+            for key, values in zip(labels, sums):
+                self._add_cell(cells, tuple(key), values)
+    
+    def add_segment(self, segment: MarketSegment):
+        """Add one new segment"""
+        if segment.name in self._members:
+            raise ValueError(f"Segment {segment.name!r} is already in the cube")
+        key = tuple(getattr(segment, dimension) for dimension in self.DIMENSIONS)
+        sizing = _sizing_columns(
+            SegmentTable.from_segments([segment]),
+            self.penetration_rate, self.market_share, self.competitive_factor
+        )
+        row = np.array([sizing[measure][0] for measure in self.MEASURES] + [1.0])
+        self._members[segment.name] = (key, row)
+        self._apply(key, row)
+    
+    def update_segment(self, segment: MarketSegment):
+        """Replace the segment with the same name"""
+        self.remove_segment(segment.name)
+        self.add_segment(segment)
+    
+    def remove_segment(self, name: str):
+        """Remove a segment by name"""
+        if name not in self._members:
+            raise KeyError(f"Segment {name!r} is not in the cube")
+        key, row = self._members.pop(name)
+        self._apply(key, -row)
+    
+    def total(self, **filters: str) -> Dict:
+        """
+        Totals of the segments matching the given dimension values
+        
+        Args:
+            **filters: Dimension values to match, e.g. geography="Europe"
+            
+        Returns:
+            Dictionary of measures, segment_count and SAM/SOM percentages
+        """
+        dimensions = self._dimensions(filters)
+        cell = self._cuboids[dimensions].get(tuple(filters[dimension] for dimension in dimensions))
+        return _cube_totals(cell)
+    
+    def group_by(self, *dimensions: str, **filters: str) -> Dict[Tuple, Dict]:
+        """
+        Totals per combination of the given dimensions, optionally filtered
+        
+        Args:
+            *dimensions: Dimensions to group by, e.g. "industry", "geography"
+            **filters: Dimension values to restrict to
+            
+        Returns:
+            Dictionary mapping each tuple of dimension values (in the order
+            given) to its totals
+        """
+        grouped = self._dimensions(dict.fromkeys(dimensions))
+        if len(grouped) != len(dimensions):
+            raise ValueError("Group-by dimensions must be distinct")
+        cuboid = self._dimensions({**dict.fromkeys(dimensions), **filters})
+        
+        matches = [
+            (cuboid.index(dimension), value) for dimension, value in filters.items()
+        ]
+        positions = [cuboid.index(dimension) for dimension in dimensions]
+        groups: Dict[Tuple, np.ndarray] = {}
+        for key, values in self._cuboids[cuboid].items():
+            if all(key[position] == value for position, value in matches):
+                group = tuple(key[position] for position in positions)
+                groups[group] = groups[group] + values if group in groups else values
+        return {group: _cube_totals(values) for group, values in groups.items()}
+    
+    def _dimensions(self, names: Dict[str, object]) -> Tuple[str, ...]:
+        """Canonical (DIMENSIONS-ordered) cuboid for a set of dimension names"""
+        unknown = set(names) - set(self.DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+        return tuple(dimension for dimension in self.DIMENSIONS if dimension in names)
+    
+    def _apply(self, key: Tuple[str, ...], row: np.ndarray):
+        """Add a measure row to the cell it falls in within every cuboid"""
+        for dimensions, cells in self._cuboids.items():
+            cell = tuple(value for dimension, value in zip(self.DIMENSIONS, key) if dimension in dimensions)
+            self._add_cell(cells, cell, row)
+    
+    @staticmethod
+    def _add_cell(cells: Dict[Tuple, np.ndarray], key: Tuple, row: np.ndarray):
+        """Accumulate into a cell, dropping it once no segment is left in it"""
+        if key in cells:
+            cells[key] = cells[key] + row
+            if cells[key][-1] == 0:
+                del cells[key]
+        else:
+            cells[key] = row.copy()
+
+
+def _as_table(segments: Union[List[MarketSegment], SegmentTable]) -> SegmentTable:
+    """Accept MarketSegment records or an existing SegmentTable"""
+    if isinstance(segments, SegmentTable):
+        return segments
+    return SegmentTable.from_segments(segments)
+
+
+def _factorize(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct values (in first-seen order) and each value's code, by hashing instead of sorting"""
+    index: Dict[object, int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.intp, count=len(values))
+    return np.array(list(index), dtype=object), codes
+
+
+def _sizing_columns(
+    table: SegmentTable,
+    penetration_rate: float,
+    market_share: float,
+    competitive_factor: float
+) -> Dict[str, np.ndarray]:
+    """Per-segment TAM/SAM/SOM columns, same expression order as the scalar path"""
+    tam = table.total_companies * table.avg_revenue_per_customer
+    sam = tam * penetration_rate
+    som = sam * market_share * competitive_factor
+    growth = 1 + table.market_growth_rate
+    
+    return {
+        "tam": tam,
+        "sam": sam,
+        "som": som,
+        "tam_next_year": tam * growth,
+        "sam_next_year": sam * growth,
+        "som_next_year": som * growth
+    }
+
+
+def _cube_totals(values: Optional[np.ndarray]) -> Dict:
+    """Readable totals for one cube cell (all zeros for an empty slice)"""
+    if values is None:
+        values = np.zeros(len(SizingCube.MEASURES) + 1)
+    totals = dict(zip(SizingCube.MEASURES, values[:-1].tolist()))
+    tam = totals["tam"]
+    return {
+        **totals,
+        "segment_count": int(round(values[-1])),
+        "sam_percentage": (totals["sam"] / tam) * 100 if tam else 0.0,
+        "som_percentage": (totals["som"] / tam) * 100 if tam else 0.0
+    }
+
+
+def read_segments(path: str, chunk_size: int = 100000) -> Iterator[SegmentTable]:
+    """
+    Stream segments from a CSV or JSONL file (optionally .gz) as tables
+    
+    Rows are parsed lazily and yielded chunk_size at a time, so memory does
+    not grow with the file.
+    """
+    for records in iter_chunks(read_records(path), chunk_size):
+        yield SegmentTable.from_records(records)
+
+
+def _sequential_sum(values: np.ndarray, start: float = 0.0) -> float:
+    """Left-to-right sum, bit-identical to accumulating segment by segment"""
+    if not len(values):
+        return start
+    return float(np.cumsum(np.concatenate(([start], values)))[-1])
+
+
+def _sizing_records(
+    table: SegmentTable,
+    columns: Dict[str, np.ndarray],
+    penetration_rate: float,
+    market_share: float,
+    competitive_factor: float
+) -> List[Dict]:
+    """calculate_full_market_sizing dictionaries from precomputed columns"""
+    assumptions = {
+        "penetration_rate": penetration_rate * 100,
+        "market_share_target": market_share * 100,
+        "competitive_intensity": competitive_factor
+    }
+    sam_percentage = (columns["sam"] / columns["tam"]) * 100
+    som_percentage = (columns["som"] / columns["tam"]) * 100
+    rows = zip(
+        table.name, table.industry, table.geography, table.customer_type,
+        columns["tam"].tolist(), columns["sam"].tolist(), columns["som"].tolist(),
+        sam_percentage.tolist(), som_percentage.tolist(),
+        columns["tam_next_year"].tolist(), columns["sam_next_year"].tolist(),
+        columns["som_next_year"].tolist(),
+        (table.market_growth_rate * 100).tolist(), table.avg_revenue_per_customer.tolist()
+    )
+    return [
+        {
+            "segment_name": name,
+            "industry": industry,
+            "geography": geography,
+            "customer_type": customer_type,
+            "current_year": {
+                "tam": tam,
+                "sam": sam,
+                "som": som,
+                "tam_percentage": 100,
+                "sam_percentage": sam_pct,
+                "som_percentage": som_pct
+            },
+            "next_year_projection": {
+                "tam": tam_next,
+                "sam": sam_next,
+                "som": som_next,
+                "growth_rate": growth_rate
+            },
+            "assumptions": {**assumptions, "avg_revenue_per_customer": revenue}
+        }
+        for (name, industry, geography, customer_type, tam, sam, som, sam_pct, som_pct,
+             tam_next, sam_next, som_next, growth_rate, revenue) in rows
+    ]
+
+
+def _correlation_factor(correlation: np.ndarray, count: int) -> np.ndarray:
+    """Matrix L with L @ L.T equal to the correlation matrix"""
+    matrix = np.asarray(correlation, dtype=np.float64)
+    if matrix.shape != (count, count):
+        raise ValueError(f"correlation must be a {count}x{count} matrix")
+    if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1):
+        raise ValueError("correlation must be symmetric with a unit diagonal")
+    try:
+        return np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        # Perfectly correlated segments make the matrix singular
+        eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+        if eigenvalues[0] < -1e-8:
+            raise ValueError("correlation must be positive semi-definite") from None
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def _correlated_shocks(
+    rng: np.random.Generator,
+    size: int,
+    count: int,
+    loadings: Optional[np.ndarray],
+    idiosyncratic: Optional[np.ndarray]
+) -> np.ndarray:
+    """Standard normal shocks of shape (size, count) with the requested correlation"""
+    if loadings is None:
+        return rng.standard_normal((size, count))
+    if idiosyncratic is None:
+        return rng.standard_normal((size, count)) @ loadings.T
+    shocks = rng.standard_normal((size, count))
+    shocks *= idiosyncratic
+    shocks += rng.standard_normal((size, loadings.shape[1])) @ loadings.T
+    return shocks
 
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TAM/SAM/SOM market sizing")
+    parser.add_argument("--input", help="Segments CSV/JSONL file (optionally .gz); defaults to the built-in example")
+    parser.add_argument("--output", default="market_sizing_results.jsonl",
+                        help="JSONL results file, gzip-compressed if it ends in .gz")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Segments sized per chunk")
+    parser.add_argument("--database", help="Also upsert into market_segments: a SQLite path or postgresql:// DSN")
+    parser.add_argument("--year", type=int, default=datetime.now().year, help="Year stored with --database rows")
+    args = parser.parse_args()
+    
     model = MarketSizingModel()
     
     # Define market segments
@@ -189,14 +948,36 @@ if __name__ == "__main__":
         )
     ]
     
-    # Calculate market sizing
-    results = model.calculate_multi_segment_sizing(segments)
+    chunks = read_segments(args.input, args.chunk_size) if args.input else [segments]
     
-    # Save results
-    with open("market_sizing_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    # Calculate market sizing, one JSON line per segment and a final totals line
+    with JsonlWriter(args.output) as writer:
+        if args.database:
+            with open_results_store(args.database) as store, store.segment_writer(args.year) as rows:
+                results = model.stream_multi_segment_sizing(chunks, TeeWriter(writer, rows))
+        else:
+            results = model.stream_multi_segment_sizing(chunks, writer)
+        writer.write(results)
     
     print("\n=== Market Sizing Summary ===")
+    print(f"Segments: {results['segment_count']:,}")
     print(f"Total TAM: ${results['totals']['tam']:,.0f}")
     print(f"Total SAM: ${results['totals']['sam']:,.0f}")
     print(f"Total SOM: ${results['totals']['som']:,.0f}")
+    
+    # The in-memory analyses below need every segment at once
+    if not args.input:
+        # Rollups for dashboard slices
+        cube = SizingCube(segments)
+        for (geography,), totals in cube.group_by("geography").items():
+            print(f"SOM in {geography}: ${totals['som']:,.0f}")
+        
+        # Joint distribution of next year's SOM with correlated segment growth
+        portfolio = model.simulate_portfolio(
+            segments,
+            factor_loadings=model.attribute_factor_loadings(segments),
+            paths=200000,
+            seed=42
+        )
+        print(f"Next-year SOM P5-P95: ${portfolio['total_som']['percentiles']['p5']:,.0f}"
+              f" - ${portfolio['total_som']['percentiles']['p95']:,.0f}")
@@ -0,0 +1,426 @@
+"""
+Results Store - Bulk persistence of model outputs
+Upserts market sizing results into market_segments and simulation results into investment_scenarios
+"""
+
+import abc
+import argparse
+import io
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from streaming_io import json_default
+
+SEGMENT_COLUMNS = (
+    "segment_name", "industry", "geography", "customer_type",
+    "tam_value", "sam_value", "som_value", "growth_rate", "year"
+)
+SEGMENT_KEY = ("segment_name", "year")
+
+SCENARIO_COLUMNS = (
+    "scenario_name", "investment_amount", "expected_roi", "time_horizon_months",
+    "risk_level", "assumptions", "results"
+)
+SCENARIO_KEY = ("scenario_name",)
+
+# SQLite equivalent of the two tables in 01-create-schema.sql
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    segment_name TEXT NOT NULL,
+    industry TEXT,
+    geography TEXT,
+    customer_type TEXT,
+    tam_value REAL,
+    sam_value REAL,
+    som_value REAL,
+    growth_rate REAL,
+    year INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_market_segments_name_year ON market_segments(segment_name, year);
+CREATE INDEX IF NOT EXISTS idx_market_segments_year ON market_segments(year);
+
+CREATE TABLE IF NOT EXISTS investment_scenarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scenario_name TEXT NOT NULL,
+    investment_amount REAL,
+    expected_roi REAL,
+    time_horizon_months INTEGER,
+    risk_level TEXT,
+    assumptions TEXT,
+    results TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_investment_scenarios_name ON investment_scenarios(scenario_name);
+"""
+
+
+class ResultsStore(abc.ABC):
+    """
+    Batched upserts of model outputs
+    
+    Rows are grouped into batches of batch_size and each batch is written
+    in one round trip and one transaction by the backend's bulk path.
+    Rows sharing a key within a batch collapse to the last one, matching
+    what row-by-row upserts would leave behind.
+    """
+    
+    def __init__(self, batch_size: int = 10000):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.batch_size = batch_size
+        self.rows_written = {"market_segments": 0, "investment_scenarios": 0}
+    
+    def upsert_segments(self, sizing_results: Iterable[Dict], year: int) -> int:
+        """
+        Upsert calculate_full_market_sizing-style results into market_segments
+        
+        Args:
+            sizing_results: Per-segment sizing dictionaries (any iterable,
+                consumed batch by batch)
+            year: Year the current_year figures refer to
+        
+        Returns:
+            Number of rows written
+        """
+        rows = (segment_row(result, year) for result in sizing_results)
+        return self._upsert_all("market_segments", SEGMENT_COLUMNS, SEGMENT_KEY, rows)
+    
+    def upsert_scenarios(self, scenarios: Iterable[Dict]) -> int:
+        """
+        Upsert investment scenarios (see scenario_row) into investment_scenarios
+        
+        Returns:
+            Number of rows written
+        """
+        rows = (
+            tuple(scenario.get(column) for column in SCENARIO_COLUMNS[:5])
+            + (_to_json(scenario.get("assumptions")), _to_json(scenario.get("results")))
+            for scenario in scenarios
+        )
+        return self._upsert_all("investment_scenarios", SCENARIO_COLUMNS, SCENARIO_KEY, rows)
+    
+    def segment_writer(self, year: int) -> "SegmentWriter":
+        """JsonlWriter-compatible sink that upserts sizing results as they stream in"""
+        return SegmentWriter(self, year)
+    
+    def close(self):
+        pass
+    
+    def __enter__(self) -> "ResultsStore":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _upsert_all(
+        self,
+        table: str,
+        columns: Sequence[str],
+        key: Sequence[str],
+        rows: Iterable[Tuple]
+    ) -> int:
+        positions = [columns.index(column) for column in key]
+        written = 0
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                break
+            # Last write wins for duplicate keys inside one statement
+            unique = list({tuple(row[i] for i in positions): row for row in batch}.values())
+            self._write_batch(table, columns, key, unique)
+            written += len(batch)
+        self.rows_written[table] += written
+        return written
+    
+    @abc.abstractmethod
+    def _write_batch(self, table: str, columns: Sequence[str], key: Sequence[str], rows: List[Tuple]):
+        """Upsert one batch of rows with unique keys in a single transaction"""
+
+
+class SQLiteResultsStore(ResultsStore):
+    """
+    Local SQLite stand-in for the Postgres tables
+    
+    Creates the market_segments and investment_scenarios tables if needed
+    and upserts each batch with one executemany inside one transaction.
+    """
+    
+    def __init__(self, path: str = ":memory:", batch_size: int = 10000):
+        super().__init__(batch_size)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SQLITE_SCHEMA)
+    
+    def close(self):
+        self.connection.close()
+    
+    def _write_batch(self, table: str, columns: Sequence[str], key: Sequence[str], rows: List[Tuple]):
+        with self.connection:
+            self.connection.executemany(_upsert_sql(table, columns, key, _values(columns, "?")), rows)
+
+
+class PostgresResultsStore(ResultsStore):
+    """
+    Bulk upserts into the Postgres schema over a pooled connection
+    
+    Each batch is streamed with COPY into a session-local staging table and
+    merged with one INSERT ... SELECT ... ON CONFLICT DO UPDATE, so the
+    server does one set-based upsert per batch instead of one statement per
+    row. Connections come from a psycopg2 ThreadedConnectionPool, which
+    makes one store safe to share between threads. Requires psycopg2.
+    """
+    
+    def __init__(self, dsn: str, batch_size: int = 10000, min_connections: int = 1, max_connections: int = 4):
+        super().__init__(batch_size)
+        from psycopg2.pool import ThreadedConnectionPool
+        
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, dsn)
+    
+    def close(self):
+        self.pool.closeall()
+    
+    @contextmanager
+    def _connection(self):
+        connection = self.pool.getconn()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self.pool.putconn(connection)
+    
+    def _write_batch(self, table: str, columns: Sequence[str], key: Sequence[str], rows: List[Tuple]):
+        staging = f"{table}_staging"
+        buffer = io.StringIO(_copy_csv(rows))
+        
+        column_list = ", ".join(columns)
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(_staging_sql(table, staging, columns))
+            cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(_upsert_sql(table, columns, key, f"SELECT {column_list} FROM {staging}"))
+
+
+class SegmentWriter:
+    """Buffers streamed sizing results and upserts them batch by batch"""
+    
+    def __init__(self, store: ResultsStore, year: int):
+        self.store = store
+        self.year = year
+        self._pending: List[Dict] = []
+    
+    def write(self, record: Dict):
+        self._pending.append(record)
+        if len(self._pending) >= self.store.batch_size:
+            self.flush()
+    
+    def write_many(self, records: Iterable[Dict]):
+        for record in records:
+            self.write(record)
+    
+    def flush(self):
+        if self._pending:
+            self.store.upsert_segments(self._pending, self.year)
+            self._pending = []
+    
+    def close(self):
+        self.flush()
+    
+    def __enter__(self) -> "SegmentWriter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_results_store(target: str, batch_size: int = 10000) -> ResultsStore:
+    """Postgres store for postgres:// or postgresql:// DSNs, SQLite store for a file path"""
+    if target.startswith(("postgres://", "postgresql://")):
+        return PostgresResultsStore(target, batch_size)
+    return SQLiteResultsStore(target, batch_size)
+
+
+def segment_row(result: Dict, year: int) -> Tuple:
+    """market_segments row from a calculate_full_market_sizing dictionary"""
+    current = result["current_year"]
+    return (
+        result["segment_name"],
+        result.get("industry"),
+        result.get("geography"),
+        result.get("customer_type"),
+        float(current["tam"]),
+        float(current["sam"]),
+        float(current["som"]),
+        # Stored in percent, like the seed data
+        float(result["next_year_projection"]["growth_rate"]),
+        int(year)
+    )
+
+
+def scenario_row(name: str, inputs: Dict, result: Dict) -> Dict:
+    """
+    investment_scenarios record from a market entry simulation
+    
+    Args:
+        name: Scenario name (the upsert key)
+        inputs: Keyword arguments the simulation was run with
+        result: simulate_market_entry or simulate_market_entry_stochastic output
+    """
+    # Stochastic results carry a distribution; store its mean
+    roi = result["roi"]["mean"] if isinstance(result["roi"], dict) else result["roi"]
+    risk_score = result.get("risk_score")
+    return {
+        "scenario_name": name,
+        "investment_amount": float(inputs["investment"]),
+        "expected_roi": round(float(roi), 2),
+        "time_horizon_months": int(inputs["time_to_achieve_years"]) * 12,
+        "risk_level": _risk_level(risk_score),
+        "assumptions": inputs,
+        "results": result
+    }
+
+
+def _risk_level(risk_score: Optional[float]) -> Optional[str]:
+    """Seed-data style label for a probability-of-loss risk score"""
+    if risk_score is None:
+        return None
+    if risk_score < 10:
+        return "Low"
+    if risk_score < 25:
+        return "Medium"
+    if risk_score < 50:
+        return "Medium-High"
+    return "High"
+
+
+def _upsert_sql(table: str, columns: Sequence[str], key: Sequence[str], source: str) -> str:
+    """INSERT ... ON CONFLICT (key) DO UPDATE statement shared by both backends"""
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column not in key)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) {source} "
+        f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP"
+    )
+
+
+def _staging_sql(table: str, staging: str, columns: Sequence[str]) -> str:
+    """
+    CREATE TEMP TABLE statement for a COPY staging table
+    
+    Only the copied columns are taken, without defaults, so the id
+    sequence is never advanced for staged rows. Rows are emptied at every
+    commit, so each batch starts from a clean table.
+    """
+    return (
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS AS "
+        f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+    )
+
+
+def _values(columns: Sequence[str], placeholder: str) -> str:
+    """VALUES clause with one parameter placeholder per column"""
+    return f"VALUES ({', '.join([placeholder] * len(columns))})"
+
+
+def _copy_csv(rows: Iterable[Tuple]) -> str:
+    """
+    COPY ... WITH (FORMAT csv) input for rows
+    
+    None becomes an unquoted empty field, which COPY loads as NULL, and
+    strings are always quoted so that '' stays an empty string.
+    """
+    return "".join(",".join(map(_copy_field, row)) + "\n" for row in rows)
+
+
+def _copy_field(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def _to_json(value) -> Optional[str]:
+    """JSON text for a json/jsonb column, with NaN and infinities stored as null"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(_finite(value), default=json_default, allow_nan=False)
+
+
+def _finite(value):
+    """value with non-finite floats (including NumPy ones) replaced by None"""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return _finite(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _benchmark_rows(count: int) -> Iterator[Dict]:
+    for i in range(count):
+        tam = 1e6 + i
+        yield {
+            "segment_name": f"Segment {i}",
+            "industry": "Business Intelligence",
+            "geography": ("North America", "Europe", "Asia Pacific")[i % 3],
+            "customer_type": ("Enterprise", "SMB")[i % 2],
+            "current_year": {"tam": tam, "sam": tam * 0.3, "som": tam * 0.012},
+            "next_year_projection": {"growth_rate": 15.5}
+        }
+
+
+def _row_at_a_time(path: str, results: Iterable[Dict], year: int) -> int:
+    """Baseline loader: one INSERT and one commit per row"""
+    connection = sqlite3.connect(path)
+    connection.executescript(SQLITE_SCHEMA)
+    sql = _upsert_sql("market_segments", SEGMENT_COLUMNS, SEGMENT_KEY, _values(SEGMENT_COLUMNS, "?"))
+    written = 0
+    for result in results:
+        connection.execute(sql, segment_row(result, year))
+        connection.commit()
+        written += 1
+    connection.close()
+    return written
+
+
+# Benchmark: bulk upserts vs row-at-a-time inserts on a local SQLite file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk upserts against row-at-a-time inserts")
+    parser.add_argument("--rows", type=int, default=100000, help="Segment rows to write")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per bulk batch")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        written = _row_at_a_time(os.path.join(directory, "row.db"), _benchmark_rows(args.rows), 2024)
+        row_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with SQLiteResultsStore(os.path.join(directory, "bulk.db"), args.batch_size) as store:
+            store.upsert_segments(_benchmark_rows(args.rows), 2024)
+        bulk_seconds = time.perf_counter() - start
+    
+    print("\n=== Results Store Benchmark (SQLite) ===")
+    print(f"Row-at-a-time: {written / row_seconds:,.0f} rows/s ({row_seconds:.2f}s)")
+    print(f"Bulk upsert:   {written / bulk_seconds:,.0f} rows/s ({bulk_seconds:.2f}s)")
+    print(f"Speedup: {row_seconds / bulk_seconds:.1f}x")
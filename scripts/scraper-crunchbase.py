@@ -3,45 +3,115 @@ Crunchbase Data Scraper
 Extracts funding, valuation, and financial metrics
 """
 
-import json
-import requests
+import argparse
+import os
+import re
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from scraper_cache import ResponseCache
+from scraper_http import HttpResponse, PooledSession
+from scraper_jobs import ScrapeJob, read_items
+from streaming_io import ShardedJsonlWriter
+
+# Organization properties and cards needed by get_company_financials,
+# requested together so each company costs a single API call
+ORGANIZATION_FIELDS = ["identifier", "funding_total", "last_funding_type", "last_funding_at"]
+ORGANIZATION_CARDS = ["raised_funding_rounds", "investors"]
 
 class CrunchbaseScraper:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.crunchbase.com/api/v4",
+        session: Optional[PooledSession] = None,
+        pool_size: int = 10,
+        timeout: float = 30.0,
+        max_retries: int = 4,
+        cache: Optional[ResponseCache] = None
+    ):
         self.api_key = api_key
-        self.base_url = "https://api.crunchbase.com/api/v4"
+        self.base_url = base_url.rstrip("/")
+        # Shared keep-alive session, created on first API call
+        self.session = session
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self._session_lock = threading.Lock()
         
-    def get_company_financials(self, company_name: str) -> Dict:
+    def get_company_financials(self, company_name: str, skip_unchanged: bool = False) -> Optional[Dict]:
         """
         Get company financial data from Crunchbase
         
         Args:
             company_name: Company name
+            skip_unchanged: Return None when the cached API response is
+                unchanged (requires a cache)
             
         Returns:
             Dictionary with financial data
         """
         print(f"[v0] Fetching Crunchbase data for {company_name}")
         
-        # In production, use actual Crunchbase API
+        # Without an API key the placeholders below stand in for the API
+        entity = None
+        if self.api_key:
+            response = self._fetch_organization(company_name)
+            if skip_unchanged and response.unchanged:
+                return None
+            entity = response.json()
         financial_data = {
             "company_name": company_name,
-            "total_funding": self._get_total_funding(company_name),
-            "last_funding_round": self._get_last_funding_round(company_name),
-            "valuation": self._get_valuation(company_name),
-            "investors": self._get_investors(company_name),
-            "funding_rounds": self._get_funding_rounds(company_name),
+            "total_funding": self._get_total_funding(company_name, entity),
+            "last_funding_round": self._get_last_funding_round(company_name, entity),
+            "valuation": self._get_valuation(company_name, entity),
+            "investors": self._get_investors(company_name, entity),
+            "funding_rounds": self._get_funding_rounds(company_name, entity),
             "scraped_at": datetime.now().isoformat(),
             "confidence_score": 0.90
         }
         
         return financial_data
     
-    def _get_total_funding(self, company_name: str) -> float:
+    def _fetch_organization(self, company_name: str) -> HttpResponse:
+        """
+        Fetch an organization's properties and cards in one request
+        
+        Returns:
+            Response whose JSON is the entity payload with "properties" and "cards"
+        """
+        with self._session_lock:
+            if self.session is None:
+                self.session = PooledSession(
+                    pool_size=self.pool_size, timeout=self.timeout, max_retries=self.max_retries
+                )
+        transport = self.session.transport
+        if self.cache is not None:
+            transport = self.cache.wrap("crunchbase", transport)
+        
+        query = urlencode({
+            "field_ids": ",".join(ORGANIZATION_FIELDS),
+            "card_ids": ",".join(ORGANIZATION_CARDS)
+        })
+        url = f"{self.base_url}/entities/organizations/{_permalink(company_name)}?{query}"
+        response = transport(url, {"X-cb-user-key": self.api_key}, self.timeout)
+        response.raise_for_status()
+        return response
+    
+    def close(self):
+        """Release pooled connections"""
+        if self.session is not None:
+            self.session.close()
+    
+    def _get_total_funding(self, company_name: str, entity: Optional[Dict] = None) -> float:
         """Get total funding amount"""
-        # Placeholder - implement actual API call
+        if entity is not None:
+            return _usd(entity["properties"].get("funding_total")) or 0
+        
+        # Placeholder - used when no API key is configured
         funding_map = {
             "TechVision Analytics": 45000000,
             "DataStream Pro": 28000000,
@@ -51,8 +121,21 @@ class CrunchbaseScraper:
         }
         return funding_map.get(company_name, 0)
     
-    def _get_last_funding_round(self, company_name: str) -> Dict:
+    def _get_last_funding_round(self, company_name: str, entity: Optional[Dict] = None) -> Dict:
         """Get details of last funding round"""
+        if entity is not None:
+            rounds = _rounds_by_date(entity)
+            if not rounds:
+                return {}
+            last = rounds[-1]
+            leads = last.get("lead_investor_identifiers") or []
+            return {
+                "round_type": _round_name(last.get("investment_type")),
+                "amount": _usd(last.get("money_raised")),
+                "date": last.get("announced_on"),
+                "lead_investor": leads[0].get("value") if leads else None
+            }
+        
         return {
             "round_type": "Series B",
             "amount": 15000000,
@@ -60,28 +143,52 @@ class CrunchbaseScraper:
             "lead_investor": "Accel Partners"
         }
     
-    def _get_valuation(self, company_name: str) -> Optional[float]:
+    def _get_valuation(self, company_name: str, entity: Optional[Dict] = None) -> Optional[float]:
         """Get company valuation"""
+        if entity is not None:
+            # Most recent post-money valuation on record
+            for funding_round in reversed(_rounds_by_date(entity)):
+                valuation = _usd(funding_round.get("post_money_valuation"))
+                if valuation is not None:
+                    return valuation
+            return None
         return 200000000
     
-    def _get_investors(self, company_name: str) -> List[str]:
+    def _get_investors(self, company_name: str, entity: Optional[Dict] = None) -> List[str]:
         """Get list of investors"""
+        if entity is not None:
+            return [
+                investor["investor_identifier"]["value"]
+                for investor in entity.get("cards", {}).get("investors", [])
+                if investor.get("investor_identifier")
+            ]
         return ["Sequoia Capital", "Accel Partners", "Y Combinator"]
     
-    def _get_funding_rounds(self, company_name: str) -> List[Dict]:
+    def _get_funding_rounds(self, company_name: str, entity: Optional[Dict] = None) -> List[Dict]:
         """Get all funding rounds"""
+        if entity is not None:
+            return [
+                {
+                    "round": _round_name(funding_round.get("investment_type")),
+                    "amount": _usd(funding_round.get("money_raised")),
+                    "date": funding_round.get("announced_on")
+                }
+                for funding_round in _rounds_by_date(entity)
+            ]
         return [
             {"round": "Seed", "amount": 2000000, "date": "2019-03-01"},
             {"round": "Series A", "amount": 10000000, "date": "2021-08-15"},
             {"round": "Series B", "amount": 15000000, "date": "2023-06-15"}
         ]
     
-    def batch_fetch(self, company_names: List[str]) -> List[Dict]:
+    def batch_fetch(self, company_names: List[str], skip_unchanged: bool = False) -> List[Dict]:
         """
         Fetch data for multiple companies
         
         Args:
             company_names: List of company names
+            skip_unchanged: Leave out companies whose cached API response
+                has not changed
             
         Returns:
             List of financial data dictionaries
@@ -89,27 +196,92 @@ class CrunchbaseScraper:
         results = []
         for name in company_names:
             try:
-                data = self.get_company_financials(name)
-                results.append(data)
+                data = self.get_company_financials(name, skip_unchanged)
+                if data is not None:
+                    results.append(data)
             except Exception as e:
                 print(f"Error fetching {name}: {str(e)}")
                 
         return results
 
+
+def _permalink(company_name: str) -> str:
+    """Crunchbase-style permalink guess from a company name"""
+    return re.sub(r"[^a-z0-9]+", "-", company_name.lower()).strip("-")
+
+
+def _usd(money: Optional[Dict]) -> Optional[float]:
+    """USD amount of a Crunchbase money field"""
+    return money.get("value_usd") if money else None
+
+
+def _round_name(investment_type: Optional[str]) -> Optional[str]:
+    """'series_b' -> 'Series B'"""
+    return investment_type.replace("_", " ").title() if investment_type else None
+
+
+def _rounds_by_date(entity: Dict) -> List[Dict]:
+    """Funding rounds card, oldest first"""
+    rounds = entity.get("cards", {}).get("raised_funding_rounds", [])
+    return sorted(rounds, key=lambda funding_round: funding_round.get("announced_on") or "")
+
 # Example usage
 if __name__ == "__main__":
-    scraper = CrunchbaseScraper()
+    parser = argparse.ArgumentParser(description="Crunchbase funding data scraper")
+    parser.add_argument("--input", help="Company names to scrape, one per line; defaults to the built-in example")
+    parser.add_argument("--job", default="crunchbase_job.db", help="Job file tracking --input progress, resumed if it exists")
+    parser.add_argument("--output", default="crunchbase_data", help="Directory for the compressed JSONL shards and their manifest.json")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default="gzip", help="Shard compression (zstd requires zstandard)")
+    parser.add_argument("--shard-size", type=int, default=64, help="Maximum uncompressed shard size in MB")
+    parser.add_argument("--workers", type=int, default=8, help="Items scraped concurrently in job mode")
+    parser.add_argument(
+        "--api-key",
+        default=os.environ.get("CRUNCHBASE_API_KEY"),
+        help="Crunchbase API key (default: $CRUNCHBASE_API_KEY); without one placeholder data is returned"
+    )
+    parser.add_argument("--cache", default="scraper_cache.db", help="Response cache shared by the scrapers, or 'none'")
+    parser.add_argument("--cache-ttl", type=float, help="Seconds a cached API response stays fresh (default: a day)")
+    args = parser.parse_args()
     
-    companies = [
-        "TechVision Analytics",
-        "DataStream Pro",
-        "InsightHub"
-    ]
+    def shard_writer() -> ShardedJsonlWriter:
+        return ShardedJsonlWriter(
+            args.output,
+            max_shard_bytes=args.shard_size * 1024 * 1024,
+            compression=None if args.compression == "none" else args.compression
+        )
     
-    results = scraper.batch_fetch(companies)
+    cache = None
+    if args.cache != "none":
+        cache = ResponseCache(args.cache, ttls={"crunchbase": args.cache_ttl} if args.cache_ttl else None)
+    scraper = CrunchbaseScraper(api_key=args.api_key, cache=cache)
     
-    # Save results
-    with open("crunchbase_data.json", "w") as f:
-        json.dump(results, f, indent=2)
+    if args.input:
+        # Resumable job: a restart with the same --job skips finished items
+        with ScrapeJob(args.job, "crunchbase", workers=args.workers) as job:
+            queued = job.enqueue(read_items(args.input))
+            progress = job.run(scraper.get_company_financials, on_error=lambda item, e: print(f"Error fetching {item}: {str(e)}"))
+            with shard_writer() as writer:
+                writer.write_many(job.iter_results())
+        scraper.close()
+        
+        print(f"Queued {queued} new items; {progress['done']} done, {progress['failed']} failed, {progress['pending']} pending")
+        print(f"Fetched data for {writer.records_written} companies successfully ({len(writer.shards)} shards in {args.output})")
+    else:
+        companies = [
+            "TechVision Analytics",
+            "DataStream Pro",
+            "InsightHub"
+        ]
+        
+        results = scraper.batch_fetch(companies)
+        scraper.close()
+        
+        # Save results
+        with shard_writer() as writer:
+            writer.write_many(results)
+        
+        print(f"Fetched data for {len(results)} companies successfully")
     
-    print(f"Fetched data for {len(results)} companies successfully")
+    if cache is not None:
+        print(f"Response cache: {cache.stats()}")
+        cache.close()
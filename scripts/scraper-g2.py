@@ -3,18 +3,63 @@ G2 Reviews & Ratings Scraper
 Extracts customer reviews, ratings, and sentiment
 """
 
-import json
+import argparse
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlencode
+
+from scraper_cache import ResponseCache
+from scraper_http import PooledSession
+from scraper_jobs import ScrapeJob, read_items
+from sentiment_engine import SentimentAggregator, SentimentEngine
+from streaming_io import ShardedJsonlWriter, iter_chunks
 
 class G2Scraper:
-    def __init__(self):
-        self.base_url = "https://www.g2.com"
+    def __init__(
+        self,
+        api_token: Optional[str] = None,
+        base_url: str = "https://www.g2.com",
+        api_url: str = "https://data.g2.com/api/v1",
+        max_workers: int = 6,
+        page_size: int = 25,
+        prefetch: int = 2,
+        recent_review_count: int = 10,
+        session: Optional[PooledSession] = None,
+        timeout: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        sentiment: Optional[SentimentEngine] = None
+    ):
+        self.api_token = api_token
+        self.base_url = base_url
+        self.api_url = api_url.rstrip("/")
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.recent_review_count = recent_review_count
+        self.timeout = timeout
+        self.cache = cache
+        self.sentiment = sentiment or SentimentEngine()
+        # Shared keep-alive session, created on first API call
+        self.session = session
+        self._session_lock = threading.Lock()
+        self._max_workers = max_workers
+        # Per-product sub-requests and review pages get separate pools: a
+        # product waits on both, and neither kind of task waits on its own pool
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="g2")
+        self._page_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="g2-pages")
         
     def scrape_product_reviews(self, product_name: str) -> Dict:
         """
         Scrape product reviews and ratings from G2
         
+        The independent per-product lookups run concurrently while the
+        reviews stream in on the calling thread. The reviews are read once,
+        for the recent reviews, the review count and the sentiment alike.
+        
         Args:
             product_name: Product name
             
@@ -23,20 +68,80 @@ class G2Scraper:
         """
         print(f"[v0] Scraping G2 reviews for {product_name}")
         
-        review_data = {
-            "product_name": product_name,
-            "overall_rating": self._get_overall_rating(product_name),
-            "total_reviews": self._get_review_count(product_name),
-            "rating_distribution": self._get_rating_distribution(product_name),
-            "recent_reviews": self._get_recent_reviews(product_name),
-            "sentiment_analysis": self._analyze_sentiment(product_name),
-            "feature_ratings": self._get_feature_ratings(product_name),
-            "scraped_at": datetime.now().isoformat(),
-            "confidence_score": 0.98
+        lookups = {
+            "overall_rating": self._executor.submit(self._get_overall_rating, product_name),
+            "rating_distribution": self._executor.submit(self._get_rating_distribution, product_name),
+            "feature_ratings": self._executor.submit(self._get_feature_ratings, product_name)
         }
+        try:
+            reviews = self._scan_reviews(product_name)
+            review_data = {
+                "product_name": product_name,
+                "overall_rating": lookups["overall_rating"].result(),
+                "total_reviews": reviews["total_reviews"],
+                "rating_distribution": lookups["rating_distribution"].result(),
+                "recent_reviews": reviews["recent_reviews"],
+                "sentiment_analysis": reviews["sentiment_analysis"],
+                "feature_ratings": lookups["feature_ratings"].result(),
+                "scraped_at": datetime.now().isoformat(),
+                "confidence_score": 0.98
+            }
+        finally:
+            for lookup in lookups.values():
+                lookup.cancel()
         
         return review_data
     
+    def iter_reviews(
+        self,
+        product_name: str,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield a product's reviews, newest first
+        
+        Up to prefetch pages are requested ahead of the one being consumed,
+        so page latency overlaps with whatever the caller does per review
+        and at most prefetch + 1 pages are held in memory. Closing the
+        generator early (e.g. through islice) cancels pages not yet started.
+        
+        Args:
+            product_name: Product name
+            page_size: Reviews per page (default: the scraper's page_size)
+            prefetch: Pages fetched ahead (default: the scraper's prefetch)
+        """
+        page_size = page_size or self.page_size
+        prefetch = self.prefetch if prefetch is None else prefetch
+        pages = deque()
+        next_page = 1
+        try:
+            while True:
+                while len(pages) <= prefetch:
+                    pages.append(self._page_executor.submit(self._get_reviews_page, product_name, next_page, page_size))
+                    next_page += 1
+                reviews = pages.popleft().result()
+                yield from reviews
+                # A short page is the last one
+                if len(reviews) < page_size:
+                    return
+        finally:
+            for page in pages:
+                page.cancel()
+    
+    def close(self):
+        """Stop the worker pools and release pooled connections"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._page_executor.shutdown(wait=False, cancel_futures=True)
+        if self.session is not None:
+            self.session.close()
+    
+    def __enter__(self) -> "G2Scraper":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def _get_overall_rating(self, product_name: str) -> float:
         """Get overall product rating"""
         ratings = {
@@ -48,10 +153,6 @@ class G2Scraper:
         }
         return ratings.get(product_name, 4.0)
     
-    def _get_review_count(self, product_name: str) -> int:
-        """Get total number of reviews"""
-        return 342
-    
     def _get_rating_distribution(self, product_name: str) -> Dict:
         """Get distribution of ratings"""
         return {
@@ -62,17 +163,28 @@ class G2Scraper:
             "1_star": 1
         }
     
-    def _get_recent_reviews(self, product_name: str) -> List[Dict]:
-        """Get recent reviews"""
-        return [
+    def _get_reviews_page(self, product_name: str, page: int, page_size: int) -> List[Dict]:
+        """Get one page of reviews, newest first (pages start at 1)"""
+        if self.api_token:
+            payload = self._fetch_json(f"products/{_slug(product_name)}/reviews", {
+                "page[number]": page,
+                "page[size]": page_size,
+                "sort": "-submitted_at"
+            })
+            reviews = [_review(item.get("attributes", {})) for item in payload.get("data", [])]
+            return self._score_reviews(reviews)
+        
+        # Placeholder - used when no API token is configured
+        if page > 1:
+            return []
+        return self._score_reviews([
             {
                 "rating": 5,
                 "title": "Excellent analytics platform",
                 "text": "Great visualizations and easy to use",
                 "author": "John D.",
                 "company_size": "Mid-Market",
-                "date": "2024-03-10",
-                "sentiment": 0.85
+                "date": "2024-03-10"
             },
             {
                 "rating": 4,
@@ -80,18 +192,49 @@ class G2Scraper:
                 "text": "Features are solid but pricing is steep",
                 "author": "Sarah M.",
                 "company_size": "Small Business",
-                "date": "2024-03-08",
-                "sentiment": 0.65
+                "date": "2024-03-08"
             }
-        ]
+        ][:page_size])
+    
+    def _score_reviews(self, reviews: List[Dict]) -> List[Dict]:
+        """Set each review's sentiment from its title and text, scored as one batch"""
+        scores = self.sentiment.score([f"{review.get('title') or ''}. {review.get('text') or ''}" for review in reviews])
+        for review, score in zip(reviews, scores):
+            review["sentiment"] = round(float(score), 2)
+        return reviews
+    
+    def _fetch_json(self, path: str, params: Dict) -> Dict:
+        """GET a data API resource through the shared session (and cache)"""
+        with self._session_lock:
+            if self.session is None:
+                self.session = PooledSession(pool_size=2 * self._max_workers, timeout=self.timeout)
+        transport = self.session.transport
+        if self.cache is not None:
+            transport = self.cache.wrap("g2", transport)
+        
+        url = f"{self.api_url}/{path}?{urlencode(params)}"
+        headers = {"Authorization": f"Token token={self.api_token}", "Accept": "application/vnd.api+json"}
+        response = transport(url, headers, self.timeout)
+        response.raise_for_status()
+        return response.json()
     
-    def _analyze_sentiment(self, product_name: str) -> Dict:
-        """Analyze overall sentiment"""
+    def _scan_reviews(self, product_name: str) -> Dict:
+        """
+        Recent reviews, review count and sentiment from one pass over the reviews
+        
+        The newest reviews are kept as they stream past and the sentiment
+        totals are folded in chunk by chunk, so every page is fetched once.
+        """
+        aggregator = SentimentAggregator()
+        recent: List[Dict] = []
+        for reviews in iter_chunks(self.iter_reviews(product_name), 1000):
+            recent.extend(reviews[:self.recent_review_count - len(recent)])
+            aggregator.add(product_name, [review["sentiment"] for review in reviews])
+        sentiment = aggregator.summary(product_name)
         return {
-            "positive": 78,
-            "neutral": 15,
-            "negative": 7,
-            "average_sentiment_score": 0.82
+            "total_reviews": sentiment["reviews_scored"],
+            "recent_reviews": recent,
+            "sentiment_analysis": sentiment
         }
     
     def _get_feature_ratings(self, product_name: str) -> Dict:
@@ -104,32 +247,104 @@ class G2Scraper:
             "performance": 4.7
         }
     
-    def batch_scrape(self, product_names: List[str]) -> List[Dict]:
-        """Scrape multiple products"""
-        results = []
-        for name in product_names:
+    def batch_scrape(self, product_names: List[str], concurrency: int = 4) -> List[Dict]:
+        """
+        Scrape multiple products
+        
+        Args:
+            product_names: List of product names
+            concurrency: Products scraped at the same time; each one also
+                fans its lookups out over the scraper's worker pools
+            
+        Returns:
+            List of review data dictionaries, in input order
+        """
+        def scrape(name: str) -> Optional[Dict]:
             try:
-                data = self.scrape_product_reviews(name)
-                results.append(data)
+                return self.scrape_product_reviews(name)
             except Exception as e:
                 print(f"Error scraping {name}: {str(e)}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="g2-products") as products:
+            results = list(products.map(scrape, product_names))
                 
-        return results
+        return [data for data in results if data is not None]
+
+
+def _slug(product_name: str) -> str:
+    """G2-style product slug from a product name"""
+    return re.sub(r"[^a-z0-9]+", "-", product_name.lower()).strip("-")
+
+
+def _review(attributes: Dict) -> Dict:
+    """Review dictionary from a data API review's attributes"""
+    return {
+        "rating": attributes.get("star_rating"),
+        "title": attributes.get("title"),
+        "text": attributes.get("text"),
+        "author": attributes.get("user_name"),
+        "company_size": attributes.get("company_segment"),
+        "date": (attributes.get("submitted_at") or "")[:10] or None
+    }
 
 # Example usage
 if __name__ == "__main__":
-    scraper = G2Scraper()
+    parser = argparse.ArgumentParser(description="G2 reviews scraper")
+    parser.add_argument("--input", help="Product names to scrape, one per line; defaults to the built-in example")
+    parser.add_argument("--job", default="g2_job.db", help="Job file tracking --input progress, resumed if it exists")
+    parser.add_argument("--output", default="g2_reviews", help="Directory for the compressed JSONL shards and their manifest.json")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default="gzip", help="Shard compression (zstd requires zstandard)")
+    parser.add_argument("--shard-size", type=int, default=64, help="Maximum uncompressed shard size in MB")
+    parser.add_argument("--workers", type=int, default=8, help="Items scraped concurrently in job mode")
+    parser.add_argument(
+        "--api-token",
+        default=os.environ.get("G2_API_TOKEN"),
+        help="G2 data API token (default: $G2_API_TOKEN); without one placeholder data is returned"
+    )
+    parser.add_argument("--cache", default="scraper_cache.db", help="Response cache shared by the scrapers, or 'none'")
+    parser.add_argument("--cache-ttl", type=float, help="Seconds a cached API response stays fresh (default: six hours)")
+    args = parser.parse_args()
     
-    products = [
-        "TechVision Enterprise",
-        "DataStream Analytics",
-        "InsightHub Pro"
-    ]
+    def shard_writer() -> ShardedJsonlWriter:
+        return ShardedJsonlWriter(
+            args.output,
+            max_shard_bytes=args.shard_size * 1024 * 1024,
+            compression=None if args.compression == "none" else args.compression
+        )
     
-    results = scraper.batch_scrape(products)
+    cache = None
+    if args.cache != "none":
+        cache = ResponseCache(args.cache, ttls={"g2": args.cache_ttl} if args.cache_ttl else None)
+    scraper = G2Scraper(api_token=args.api_token, cache=cache)
     
-    # Save results
-    with open("g2_reviews.json", "w") as f:
-        json.dump(results, f, indent=2)
+    if args.input:
+        # Resumable job: a restart with the same --job skips finished items
+        with ScrapeJob(args.job, "g2", workers=args.workers) as job:
+            queued = job.enqueue(read_items(args.input))
+            progress = job.run(scraper.scrape_product_reviews, on_error=lambda item, e: print(f"Error scraping {item}: {str(e)}"))
+            with shard_writer() as writer:
+                writer.write_many(job.iter_results())
+        scraper.close()
+        
+        print(f"Queued {queued} new items; {progress['done']} done, {progress['failed']} failed, {progress['pending']} pending")
+        print(f"Scraped reviews for {writer.records_written} products successfully ({len(writer.shards)} shards in {args.output})")
+    else:
+        products = [
+            "TechVision Enterprise",
+            "DataStream Analytics",
+            "InsightHub Pro"
+        ]
+        
+        results = scraper.batch_scrape(products)
+        scraper.close()
+        
+        # Save results
+        with shard_writer() as writer:
+            writer.write_many(results)
+        
+        print(f"Scraped reviews for {len(results)} products successfully")
     
-    print(f"Scraped reviews for {len(results)} products successfully")
+    if cache is not None:
+        print(f"Response cache: {cache.stats()}")
+        cache.close()
@@ -0,0 +1,269 @@
+"""
+Scraper Cache - On-disk conditional-request response cache
+Lets nightly re-scrapes skip unchanged LinkedIn, Crunchbase and G2 entities
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from scraper_http import HttpResponse, Transport
+
+# Seconds a cached response is served without contacting the source
+DEFAULT_TTLS = {"linkedin": 7 * 86400, "crunchbase": 86400, "g2": 6 * 3600}
+
+# Request headers that do not change the response and stay out of the cache key
+_UNKEYED_HEADERS = {"user-agent", "if-none-match", "if-modified-since"}
+
+# Credentials partition the cache (responses can depend on the account's
+# plan and permissions) but enter the key only as a SHA-256 of their value
+_CREDENTIAL_HEADERS = {"x-cb-user-key", "authorization"}
+
+
+class ResponseCache:
+    """
+    SQLite-backed HTTP response cache shared by the scrapers
+    
+    Fresh entries (younger than their source's TTL) are served without a
+    request. Stale entries are revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs a 304 with no body.
+    Every stored body carries a SHA-256 content hash; a full response
+    whose hash matches the previous one is flagged unchanged as well, for
+    sources that send no validators. Bodies are evicted least recently
+    used first once they exceed max_bytes in total. Entries are keyed per
+    credential, so scrapers running under different API keys never see
+    each other's responses.
+    
+    Safe to share between threads (e.g. AsyncFetcher's transport pool).
+    """
+    
+    def __init__(
+        self,
+        path: str = "scraper_cache.db",
+        max_bytes: int = 512 * 1024 * 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 86400,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.evictions = 0
+        
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, source TEXT NOT NULL, url TEXT NOT NULL, "
+            "status INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL, "
+            "etag TEXT, last_modified TEXT, content_hash TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL, "
+            "size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    def wrap(self, source: str, transport: Transport) -> Transport:
+        """Transport that answers from the cache and revalidates through transport"""
+        def cached_transport(url: str, headers: Dict[str, str], timeout: float) -> HttpResponse:
+            return self.fetch(source, url, headers, lambda extra: transport(url, {**headers, **extra}, timeout))
+        return cached_transport
+    
+    def fetch(
+        self,
+        source: str,
+        url: str,
+        headers: Dict[str, str],
+        send: Callable[[Dict[str, str]], HttpResponse]
+    ) -> HttpResponse:
+        """
+        Cached GET of url
+        
+        Args:
+            source: Cache namespace and TTL group ("linkedin", "crunchbase", "g2")
+            url: Full request URL (query included)
+            headers: Request headers; credentials are keyed by their hash,
+                validators and the user agent not at all
+            send: Performs the request with the given extra (conditional) headers
+        
+        Returns:
+            Response with cache_status "hit", "revalidated" or "miss" and
+            unchanged set when the body matches the previously cached one
+        """
+        key = self.make_key(source, url, headers)
+        now = self._clock()
+        entry = self._lookup(key)
+        
+        if entry is not None and entry["expires_at"] > now:
+            return self._hit(key, entry, now)
+        
+        validators = {}
+        if entry is not None and entry["etag"]:
+            validators["If-None-Match"] = entry["etag"]
+        if entry is not None and entry["last_modified"]:
+            validators["If-Modified-Since"] = entry["last_modified"]
+        
+        response = send(validators)
+        now = self._clock()
+        ttl = self.ttls.get(source, self.default_ttl)
+        
+        if response.status == 304 and entry is not None:
+            with self._lock:
+                self._db.execute(
+                    "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                    (now + ttl, now, key)
+                )
+                self._db.commit()
+                self.revalidated += 1
+                self.unchanged += 1
+            return _cached_response(entry, "revalidated")
+        
+        with self._lock:
+            self.misses += 1
+        if response.status != 200:
+            return response
+        
+        content_hash = hashlib.sha256(response.body).hexdigest()
+        response.cache_status = "miss"
+        response.unchanged = entry is not None and entry["content_hash"] == content_hash
+        self._store(key, source, url, response, content_hash, now, ttl)
+        return response
+    
+    def fresh(self, source: str, url: str, headers: Dict[str, str]) -> Optional[HttpResponse]:
+        """
+        Cached response for url if it can be served without any request
+        
+        Lets callers skip rate limiting for fresh hits; None means fetch()
+        has to contact the source (a miss or a revalidation).
+        """
+        key = self.make_key(source, url, headers)
+        now = self._clock()
+        entry = self._lookup(key)
+        if entry is None or entry["expires_at"] <= now:
+            return None
+        return self._hit(key, entry, now)
+    
+    def invalidate(self, source: Optional[str] = None):
+        """Drop cached responses for one source, or everything"""
+        with self._lock:
+            if source is None:
+                self._db.execute("DELETE FROM responses")
+            else:
+                self._db.execute("DELETE FROM responses WHERE source = ?", (source,))
+            self._db.commit()
+            self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    def stats(self) -> Dict:
+        """Hit/miss/revalidation counters and current size"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "unchanged": self.unchanged,
+                "changed": self.changed,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": self._bytes
+            }
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+    
+    @staticmethod
+    def make_key(source: str, url: str, headers: Dict[str, str]) -> str:
+        """Digest of source, URL and the headers that can change the response"""
+        keyed = []
+        for name, value in headers.items():
+            name = name.lower()
+            if name in _CREDENTIAL_HEADERS:
+                keyed.append((name, hashlib.sha256(value.encode()).hexdigest()))
+            elif name not in _UNKEYED_HEADERS:
+                keyed.append((name, value))
+        keyed.sort()
+        payload = json.dumps([source, url, keyed], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _lookup(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT url, status, headers, body, etag, last_modified, content_hash, expires_at "
+                "FROM responses WHERE key = ?", (key,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip((column[0] for column in cursor.description), row))
+    
+    def _hit(self, key: str, entry: Dict, now: float) -> HttpResponse:
+        with self._lock:
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return _cached_response(entry, "hit")
+    
+    def _store(
+        self,
+        key: str,
+        source: str,
+        url: str,
+        response: HttpResponse,
+        content_hash: str,
+        now: float,
+        ttl: float
+    ):
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        size = len(response.body)
+        with self._lock:
+            if response.unchanged:
+                self.unchanged += 1
+            else:
+                self.changed += 1
+            old_size = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, url, response.status, json.dumps(response.headers), response.body,
+                 headers.get("etag"), headers.get("last-modified"), content_hash,
+                 now, now + ttl, now, size)
+            )
+            self._bytes += size - (old_size[0] if old_size else 0)
+            self._evict()
+            self._db.commit()
+    
+    def _evict(self):
+        """Drop least recently used bodies until under max_bytes (lock held)"""
+        while self._bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._bytes -= size
+                self.evictions += 1
+
+
+def _cached_response(entry: Dict, status: str) -> HttpResponse:
+    response = HttpResponse(entry["url"], entry["status"], json.loads(entry["headers"]), entry["body"])
+    response.cache_status = status
+    response.unchanged = True
+    return response
@@ -0,0 +1,353 @@
+"""
+Scraper HTTP - Concurrent fetching with per-host politeness
+Asyncio fetch engine, token-bucket rate limiting and a pluggable blocking transport shared by the scrapers
+"""
+
+import asyncio
+import functools
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_HEADERS = {"User-Agent": "MarketIntelligenceBot/1.0"}
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class HttpResponse:
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    # Set by ResponseCache: "hit", "revalidated" or "miss", and whether the
+    # body is the same as the previously cached one
+    cache_status: Optional[str] = None
+    unchanged: bool = False
+    
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+    
+    def json(self):
+        return json.loads(self.body)
+    
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HttpError(self)
+
+
+class HttpError(Exception):
+    """Non-success HTTP status"""
+    
+    def __init__(self, response: HttpResponse):
+        super().__init__(f"HTTP {response.status} for {response.url}")
+        self.response = response
+
+
+# Blocking transport: (url, headers, timeout) -> HttpResponse
+Transport = Callable[[str, Dict[str, str], float], HttpResponse]
+
+
+def urllib_transport(url: str, headers: Dict[str, str], timeout: float) -> HttpResponse:
+    """Standard-library transport; HTTP error statuses are returned, not raised"""
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return HttpResponse(url, response.status, dict(response.headers.items()), response.read())
+    except urllib.error.HTTPError as error:
+        return HttpResponse(url, error.code, dict(error.headers.items()), error.read())
+
+
+class PooledSession:
+    """
+    Keep-alive requests session with retries and exponential backoff
+    
+    One session per scraper reuses TCP/TLS connections across calls, up to
+    pool_size per host. Connection errors, timeouts and RETRY_STATUSES are
+    retried up to max_retries times, waiting a random ("full jitter") delay
+    of up to backoff_base * 2**attempt seconds, capped at backoff_max, or
+    the server's Retry-After when it sends one. Requires requests.
+    """
+    
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: Union[float, Tuple[float, float]] = (5.0, 30.0),
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        retry_statuses: Sequence[int] = RETRY_STATUSES,
+        headers: Optional[Dict[str, str]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        random_fraction: Callable[[], float] = random.random
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retries = 0
+        self._sleep = sleep
+        self._random = random_fraction
+        self._transient = (requests.ConnectionError, requests.Timeout)
+        
+        self.session = requests.Session()
+        self.session.headers.update({**DEFAULT_HEADERS, **(headers or {})})
+        # Retries happen here, with jitter; the adapter itself must not retry
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        return self.request("GET", url, params=params, headers=headers)
+    
+    def post(self, url: str, json_body: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        return self.request("POST", url, json=json_body, headers=headers)
+    
+    def request(self, method: str, url: str, **kwargs) -> HttpResponse:
+        """
+        Send a request, retrying transient failures
+        
+        Returns:
+            The first non-retryable response, or the last response once
+            retries are exhausted (connection errors are re-raised then)
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except self._transient:
+                if last_attempt:
+                    raise
+                self._backoff(attempt, None)
+                continue
+            
+            if response.status_code not in self.retry_statuses or last_attempt:
+                return HttpResponse(response.url, response.status_code, dict(response.headers), response.content)
+            self._backoff(attempt, response.headers.get("Retry-After"))
+    
+    def transport(self, url: str, headers: Dict[str, str], timeout: float) -> HttpResponse:
+        """AsyncFetcher transport over this session (its own timeout applies)"""
+        return self.get(url, headers=headers)
+    
+    def close(self):
+        self.session.close()
+    
+    def __enter__(self) -> "PooledSession":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str]):
+        self.retries += 1
+        delay = self._random() * min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if retry_after is not None:
+            try:
+                delay = min(self.backoff_max, max(delay, float(retry_after)))
+            except ValueError:
+                # HTTP-date form; the jittered delay is a reasonable stand-in
+                pass
+        self._sleep(delay)
+
+
+class TokenBucket:
+    """
+    Asyncio token bucket allowing rate requests per second with bursts of capacity
+    
+    Callers reserve the next free slot under a short lock and then sleep
+    outside it, so waiters are served in arrival order and nobody idles
+    once their slot has come: time spent on the request itself counts
+    toward the interval instead of being added to it.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future token for this caller
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, created on first use"""
+    
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+    
+    async def acquire(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+class HostThrottle:
+    """
+    Per-host request spacing for blocking transports, safe across threads
+    
+    The synchronous counterpart of HostRateLimiter: each caller reserves
+    its host's next slot under a lock and sleeps outside it.
+    """
+    
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def wait(self, url: str):
+        """Block until url's host may receive another request"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1.0 / self.rate
+        if slot > now:
+            self._sleep(slot - now)
+    
+    def wrap(self, transport: Transport) -> Transport:
+        """Transport that waits for its host's slot before every request"""
+        def throttled_transport(url: str, headers: Dict[str, str], timeout: float) -> HttpResponse:
+            self.wait(url)
+            return transport(url, headers, timeout)
+        return throttled_transport
+
+
+class AsyncFetcher:
+    """
+    Bounded-concurrency fetcher with per-host rate limiting
+    
+    At most concurrency requests are in flight overall and each host gets
+    at most requests_per_host_per_second (with bursts of burst). Blocking
+    transports run on a dedicated pool of concurrency threads, so the
+    default urllib transport needs no extra dependencies. Create and use a
+    fetcher inside one event loop, and close it (or use async with) when
+    done.
+    
+    With a ResponseCache, fresh entries are returned before a slot or a
+    rate-limit token is taken, so an unchanged re-scrape is not paced
+    like one that goes to the network; stale entries are revalidated
+    through the rate-limited path.
+    """
+    
+    def __init__(
+        self,
+        concurrency: int = 8,
+        requests_per_host_per_second: float = 0.5,
+        burst: float = 1.0,
+        timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Transport = urllib_transport,
+        cache=None,
+        cache_source: str = "default"
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.cache = cache
+        self.cache_source = cache_source
+        self.transport = transport if cache is None else cache.wrap(cache_source, transport)
+        self.limiter = HostRateLimiter(requests_per_host_per_second, burst)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch")
+    
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """GET url once a concurrency slot and its host's rate limit allow"""
+        headers = {**self.headers, **(headers or {})}
+        if self.cache is not None:
+            cached = self.cache.fresh(self.cache_source, url, headers)
+            if cached is not None:
+                return cached
+        request = functools.partial(self.transport, url, headers, self.timeout)
+        async with self._slots:
+            # Reserve the token inside the slot: taken earlier, it could come
+            # due while the request still waits for a slot, and the delayed
+            # requests would then reach the host back to back
+            await self.limiter.acquire(url)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, request)
+    
+    async def map(
+        self,
+        items: Iterable[T],
+        worker: Callable[[T], Awaitable[R]],
+        on_error: Optional[Callable[[T, Exception], None]] = None
+    ) -> List[Optional[R]]:
+        """
+        Run worker over items concurrently, isolating failures per item
+        
+        concurrency tasks pull items from the shared iterator as they
+        finish, so items is consumed lazily and the number of pending
+        coroutines stays bounded however many items there are.
+        
+        Returns:
+            Results in input order, with None where worker raised (after
+            on_error has been told about it)
+        """
+        pending = enumerate(items)
+        results: Dict[int, Optional[R]] = {}
+        
+        async def drain():
+            for index, item in pending:
+                try:
+                    results[index] = await worker(item)
+                except Exception as error:
+                    if on_error is not None:
+                        on_error(item, error)
+                    results[index] = None
+        
+        await asyncio.gather(*(drain() for _ in range(self.concurrency)))
+        return [results[index] for index in range(len(results))]
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+    
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,266 @@
+"""
+Scraper Jobs - Resumable, checkpointed batch-scrape runner
+Persistent work queue with per-item status shared by the LinkedIn, Crunchbase and G2 scrapers
+"""
+
+import json
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from streaming_io import JsonlWriter, iter_chunks, json_default, open_text, strip_compression
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_items (
+    job TEXT NOT NULL,
+    item TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (job, item)
+);
+CREATE INDEX IF NOT EXISTS idx_job_items_seq ON job_items(job, seq);
+"""
+
+
+class ScrapeJob:
+    """
+    Batch scrape whose progress survives crashes and restarts
+    
+    Items (domains, company or product names) are queued once in an SQLite
+    file together with their status. run() hands the unfinished ones to a
+    worker pool and records outcomes and results in batched transactions,
+    every batch_size items or checkpoint_seconds, whichever comes first.
+    After a kill, at most the items finished since the last checkpoint are
+    scraped again; everything else is skipped. Failed items are retried by
+    later runs until they have been attempted max_attempts times.
+    
+    Results live in the job file and are streamed out with iter_results()
+    or export(), so memory use does not grow with the job.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        workers: int = 8,
+        batch_size: int = 500,
+        checkpoint_seconds: float = 5.0,
+        max_attempts: int = 3,
+        rate_limit: Optional[float] = None
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be positive")
+        self.path = path
+        self.name = name
+        self.workers = workers
+        self.batch_size = batch_size
+        self.checkpoint_seconds = checkpoint_seconds
+        self.max_attempts = max_attempts
+        self.rate_limit = rate_limit
+        self._next_slot = 0.0
+        
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync survives process kills; only power loss can drop the last checkpoint
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(JOB_SCHEMA)
+        self._db.commit()
+    
+    def enqueue(self, items: Iterable[str], chunk_size: int = 10000) -> int:
+        """
+        Add items to the queue in order, ignoring ones already queued
+        
+        Returns:
+            Number of newly queued items
+        """
+        seq = self._db.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM job_items WHERE job = ?", (self.name,)
+        ).fetchone()[0]
+        added = 0
+        for chunk in iter_chunks(items, chunk_size):
+            cursor = self._db.executemany(
+                "INSERT OR IGNORE INTO job_items (job, item, seq) VALUES (?, ?, ?)",
+                [(self.name, item, seq + offset) for offset, item in enumerate(chunk, 1)]
+            )
+            added += cursor.rowcount
+            seq += len(chunk)
+        self._db.commit()
+        return added
+    
+    def run(
+        self,
+        worker: Callable[[str], Optional[Dict]],
+        on_error: Optional[Callable[[str, Exception], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Process every unfinished item with worker on a pool of threads
+        
+        Args:
+            worker: Scrapes one item; may return None for "nothing to store"
+                (e.g. an unchanged page skipped through the response cache)
+            on_error: Told about each item whose worker raised
+        
+        Returns:
+            Item counts by status once the queue is drained
+        """
+        in_flight: Dict[Future, str] = {}
+        finished: List[Tuple] = []
+        last_checkpoint = time.monotonic()
+        
+        def collect(block: bool):
+            done, _ = wait(in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    result = future.result()
+                    payload = None if result is None else json.dumps(result, separators=(",", ":"), default=json_default)
+                    finished.append((DONE, payload, None, time.time(), self.name, item))
+                else:
+                    if on_error is not None:
+                        on_error(item, error)
+                    finished.append((FAILED, None, str(error), time.time(), self.name, item))
+        
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"job-{self.name}")
+        try:
+            for item in self._unfinished():
+                self._throttle()
+                # Keep the pool busy without queueing the whole job in memory
+                while len(in_flight) >= 2 * self.workers:
+                    collect(block=True)
+                in_flight[pool.submit(worker, item)] = item
+                
+                if len(finished) >= self.batch_size or time.monotonic() - last_checkpoint >= self.checkpoint_seconds:
+                    self._checkpoint(finished)
+                    last_checkpoint = time.monotonic()
+            while in_flight:
+                collect(block=True)
+                if len(finished) >= self.batch_size or time.monotonic() - last_checkpoint >= self.checkpoint_seconds:
+                    self._checkpoint(finished)
+                    last_checkpoint = time.monotonic()
+        finally:
+            # On interrupt, record whatever has already completed
+            for future in in_flight:
+                future.cancel()
+            if in_flight:
+                collect(block=False)
+            self._checkpoint(finished)
+            pool.shutdown(wait=False)
+        
+        return self.progress()
+    
+    def progress(self) -> Dict[str, int]:
+        """Item counts by status (pending, done, failed) and in total"""
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        counts.update(self._db.execute(
+            "SELECT status, COUNT(*) FROM job_items WHERE job = ? GROUP BY status", (self.name,)
+        ).fetchall())
+        counts["total"] = sum(counts.values())
+        return counts
+    
+    def iter_results(self) -> Iterator[Dict]:
+        """Stored results in queue order"""
+        cursor = self._db.execute(
+            "SELECT result FROM job_items WHERE job = ? AND status = ? AND result IS NOT NULL ORDER BY seq",
+            (self.name, DONE)
+        )
+        for (result,) in cursor:
+            yield json.loads(result)
+    
+    def export(self, path: str) -> int:
+        """
+        Write stored results to path
+        
+        .jsonl (optionally .gz or .zst) is streamed record by record; any other
+        extension gets a JSON array, like the scrapers' default output.
+        
+        Returns:
+            Number of results written
+        """
+        stem = strip_compression(path)
+        if stem.endswith((".jsonl", ".ndjson")):
+            with JsonlWriter(path) as writer:
+                writer.write_many(self.iter_results())
+            return writer.records_written
+        
+        count = 0
+        with open_text(path, "w") as f:
+            f.write("[")
+            for count, result in enumerate(self.iter_results(), 1):
+                f.write(",\n" if count > 1 else "\n")
+                f.write(json.dumps(result, default=json_default))
+            f.write("\n]\n" if count else "]\n")
+        return count
+    
+    def retry_failed(self) -> int:
+        """Give items that used up their attempts another max_attempts tries"""
+        cursor = self._db.execute(
+            "UPDATE job_items SET attempts = 0 WHERE job = ? AND status = ?", (self.name, FAILED)
+        )
+        self._db.commit()
+        return cursor.rowcount
+    
+    def close(self):
+        self._db.close()
+    
+    def __enter__(self) -> "ScrapeJob":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _unfinished(self, page_size: int = 1000) -> Iterator[str]:
+        """Pending and retryable items in queue order, read a page at a time"""
+        last_seq = 0
+        while True:
+            rows = self._db.execute(
+                "SELECT seq, item FROM job_items WHERE job = ? AND seq > ? "
+                "AND (status = ? OR (status = ? AND attempts < ?)) ORDER BY seq LIMIT ?",
+                (self.name, last_seq, PENDING, FAILED, self.max_attempts, page_size)
+            ).fetchall()
+            if not rows:
+                return
+            for last_seq, item in rows:
+                yield item
+    
+    def _checkpoint(self, finished: List[Tuple]):
+        """Record finished items in one transaction and clear the list"""
+        if not finished:
+            return
+        self._db.executemany(
+            "UPDATE job_items SET status = ?, result = ?, error = ?, attempts = attempts + 1, updated_at = ? "
+            "WHERE job = ? AND item = ?",
+            finished
+        )
+        self._db.commit()
+        finished.clear()
+    
+    def _throttle(self):
+        """Space submissions at most rate_limit per second apart"""
+        if self.rate_limit is None:
+            return
+        now = time.monotonic()
+        if self._next_slot > now:
+            time.sleep(self._next_slot - now)
+            now = self._next_slot
+        self._next_slot = now + 1.0 / self.rate_limit
+
+
+def read_items(path: str) -> Iterator[str]:
+    """Items to scrape from a text file, one per line (blank lines and # comments skipped)"""
+    with open_text(path) as f:
+        for line in f:
+            item = line.strip()
+            if item and not item.startswith("#"):
+                yield item
@@ -0,0 +1,387 @@
+"""
+Sentiment Engine - Offline lexicon-based review sentiment scoring
+Scores review texts in vectorized batches across a process pool and aggregates sentiment per product
+"""
+
+import argparse
+import os
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from streaming_io import iter_chunks
+
+# Word valences on a -3..3 scale
+DEFAULT_LEXICON = {
+    "excellent": 3.0, "outstanding": 3.0, "amazing": 2.8, "awesome": 2.8, "fantastic": 2.8,
+    "best": 2.6, "love": 2.6, "loves": 2.6, "perfect": 2.6, "superb": 2.8, "brilliant": 2.6,
+    "great": 2.2, "impressive": 2.2, "powerful": 1.8, "recommend": 1.8, "recommended": 1.8,
+    "good": 1.6, "solid": 1.4, "helpful": 1.6, "intuitive": 1.8, "reliable": 1.6, "robust": 1.4,
+    "easy": 1.4, "fast": 1.2, "quick": 1.0, "responsive": 1.4, "useful": 1.4, "valuable": 1.6,
+    "flexible": 1.2, "nice": 1.4, "happy": 1.8, "pleased": 1.6, "satisfied": 1.6, "smooth": 1.2,
+    "seamless": 1.8, "accurate": 1.4, "efficient": 1.4, "friendly": 1.4, "clean": 1.0, "like": 1.0,
+    "worth": 1.2, "affordable": 1.4, "improved": 1.2, "stable": 1.2, "favorite": 2.0, "wonderful": 2.6,
+    "bad": -2.0, "poor": -2.0, "terrible": -2.8, "awful": -2.8, "horrible": -2.8, "worst": -3.0,
+    "hate": -2.6, "useless": -2.4, "broken": -2.0, "buggy": -2.0, "bug": -1.4, "bugs": -1.4,
+    "slow": -1.6, "crash": -2.0, "crashes": -2.0, "clunky": -1.6, "confusing": -1.6,
+    "difficult": -1.4, "hard": -1.0, "expensive": -1.6, "overpriced": -2.2, "steep": -1.0,
+    "frustrating": -2.0, "annoying": -1.8, "disappointing": -2.2, "disappointed": -2.2,
+    "lacking": -1.4, "lacks": -1.4, "limited": -1.2, "missing": -1.2, "unreliable": -2.0,
+    "unhelpful": -1.8, "outdated": -1.4, "complicated": -1.4, "problem": -1.4, "problems": -1.4,
+    "issue": -1.0, "issues": -1.0, "fails": -2.0, "failed": -2.0, "waste": -2.4, "lag": -1.4,
+    "cumbersome": -1.6, "unusable": -2.6, "mediocre": -1.2, "tedious": -1.4, "downtime": -1.6
+}
+
+# Word pairs whose valence differs from their words', e.g. "easy to use"
+# is scored through its first two words
+DEFAULT_BIGRAMS = {
+    ("easy", "to"): 1.8, ("well", "worth"): 2.0, ("highly", "recommend"): 2.8,
+    ("game", "changer"): 2.6, ("learning", "curve"): -1.2, ("high", "price"): -1.6,
+    ("too", "expensive"): -2.0, ("customer", "service"): 0.0, ("not", "bad"): 1.0,
+    ("pain", "point"): -1.2, ("time", "consuming"): -1.4
+}
+
+NEGATORS = {
+    "not", "no", "never", "none", "nothing", "neither", "nor", "without", "hardly", "barely",
+    "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't", "can't", "cannot",
+    "couldn't", "won't", "wouldn't", "shouldn't", "hasn't", "haven't", "hadn't", "ain't"
+}
+
+BOOSTERS = {
+    "very": 0.3, "really": 0.3, "extremely": 0.5, "incredibly": 0.5, "super": 0.4, "so": 0.2,
+    "absolutely": 0.5, "highly": 0.4, "truly": 0.3, "quite": 0.15, "slightly": -0.3, "somewhat": -0.2,
+    "kind": -0.2, "fairly": -0.1, "bit": -0.3
+}
+
+# Contrast words: what follows outweighs what precedes ("good, but slow")
+CONTRASTS = {"but", "however", "although", "though"}
+
+# Scale applied to a negated word's valence
+NEGATION_SCALE = -0.74
+
+# Compound score = sum / sqrt(sum**2 + NORMALIZATION), in (-1, 1)
+NORMALIZATION = 15.0
+
+# Compound scores within +/- this band count as neutral
+NEUTRAL_THRESHOLD = 0.05
+
+# Apostrophe look-alikes that are dropped like "'" (right and left single
+# quotes, modifier letter apostrophe, fullwidth apostrophe, accents)
+_APOSTROPHES = "'\u2018\u2019\u201b\u02bc\uff07`\u00b4"
+
+# Tokenizing is str.translate + split, several times faster than a regex:
+# ASCII non-letters and Unicode punctuation, symbols and spaces (dashes,
+# curly quotes, ellipses, no-break spaces...) become spaces, and
+# apostrophes are dropped, so "don't" and "don\u2019t" are the single word
+# "dont". NUL is kept as the batch's text separator.
+_TOKEN_TABLE = {code: " " for code in range(1, 128) if not chr(code).isalpha()}
+_TOKEN_TABLE.update(
+    (code, " ") for code in range(0x80, 0x10000) if unicodedata.category(chr(code))[0] in "PSZ"
+)
+_TOKEN_TABLE.update((ord(character), None) for character in _APOSTROPHES)
+
+
+class SentimentEngine:
+    """
+    Offline lexicon and bigram sentiment scorer
+    
+    Texts are tokenized into vocabulary ids, then a whole batch is scored
+    at once on flat NumPy arrays: word valences, bigram overrides,
+    booster words, negation within negation_window preceding words and
+    contrast words ("but") are all applied with array operations, and
+    per-text sums become compound scores in (-1, 1) like the 0.85-style
+    sentiment scores stored in customer_sentiment. No network, GPU or
+    model files are needed, and the engine pickles cheaply for process
+    pools.
+    """
+    
+    def __init__(
+        self,
+        lexicon: Optional[Dict[str, float]] = None,
+        bigrams: Optional[Dict[tuple, float]] = None,
+        negation_window: int = 3
+    ):
+        lexicon = DEFAULT_LEXICON if lexicon is None else lexicon
+        bigrams = DEFAULT_BIGRAMS if bigrams is None else bigrams
+        self.negation_window = negation_window
+        
+        lexicon = {_normalize(word): valence for word, valence in lexicon.items()}
+        bigrams = {(_normalize(first), _normalize(second)): valence for (first, second), valence in bigrams.items()}
+        negators = {_normalize(word) for word in NEGATORS}
+        
+        # Id 0 is every word the engine does not know; it only counts toward distances
+        words = sorted(set(lexicon) | negators | set(BOOSTERS) | CONTRASTS | set(chain.from_iterable(bigrams)))
+        self.vocabulary = {word: index for index, word in enumerate(words, 1)}
+        size = len(words) + 1
+        self._valence = np.zeros(size)
+        self._boost = np.zeros(size)
+        self._negator = np.zeros(size, dtype=bool)
+        self._contrast = np.zeros(size, dtype=bool)
+        for word, valence in lexicon.items():
+            self._valence[self.vocabulary[word]] = valence
+        for word, boost in BOOSTERS.items():
+            self._boost[self.vocabulary[word]] = boost
+        for word in negators:
+            self._negator[self.vocabulary[word]] = True
+        for word in CONTRASTS:
+            self._contrast[self.vocabulary[word]] = True
+        
+        pairs = sorted(
+            (self.vocabulary[first] * size + self.vocabulary[second], valence)
+            for (first, second), valence in bigrams.items()
+        )
+        self._bigram_keys = np.array([key for key, _ in pairs], dtype=np.int64)
+        self._bigram_valence = np.array([valence for _, valence in pairs])
+        self._size = size
+    
+    def tokenize(self, text: str) -> List[int]:
+        """Vocabulary ids of a text's words (0 for unknown words)"""
+        vocabulary = self.vocabulary
+        return [vocabulary.get(word, 0) for word in text.lower().translate(_TOKEN_TABLE).split()]
+    
+    def tokenize_batch(self, texts: Sequence[Optional[str]]) -> List[List[int]]:
+        """tokenize() for many texts, lower-casing and translating them as one string"""
+        joined = "\x00".join(text or "" for text in texts)
+        documents = joined.lower().translate(_TOKEN_TABLE).split("\x00")
+        if len(documents) != len(texts):
+            # A text contains NUL itself; fall back to one text at a time
+            return [self.tokenize(text) if text else [] for text in texts]
+        vocabulary = self.vocabulary
+        return [[vocabulary.get(word, 0) for word in document.split()] for document in documents]
+    
+    def score(self, texts: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Compound sentiment of each text
+        
+        Returns:
+            Float array in (-1, 1), 0 for empty or missing texts
+        """
+        count = len(texts)
+        tokenized = self.tokenize_batch(texts)
+        lengths = np.fromiter(map(len, tokenized), dtype=np.int64, count=count)
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(count)
+        ids = np.fromiter(chain.from_iterable(tokenized), dtype=np.int64, count=total)
+        doc = np.repeat(np.arange(count), lengths)
+        starts = np.cumsum(lengths) - lengths
+        position = np.arange(total) - np.repeat(starts, lengths)
+        
+        valence = self._valence[ids]
+        negator = self._negator[ids]
+        
+        # Bigrams: the pair's valence replaces both words', and a negator
+        # inside a pair ("not bad") is used up by it
+        if len(self._bigram_keys):
+            keys = ids[:-1] * self._size + ids[1:]
+            slot = np.minimum(np.searchsorted(self._bigram_keys, keys), len(self._bigram_keys) - 1)
+            hit = np.flatnonzero((self._bigram_keys[slot] == keys) & (position[1:] > 0))
+            valence[hit + 1] = 0.0
+            valence[hit] = self._bigram_valence[slot[hit]]
+            negator[hit] = negator[hit + 1] = False
+        
+        # Boosters scale the next word in their direction
+        boost = np.zeros(total)
+        boost[1:] = np.where(position[1:] > 0, self._boost[ids[:-1]], 0.0)
+        valence *= 1.0 + boost
+        
+        # Negators flip (and damp) any of the next negation_window words
+        negated = np.zeros(total, dtype=bool)
+        for distance in range(1, self.negation_window + 1):
+            negated[distance:] |= negator[:-distance] & (position[distance:] >= distance)
+        valence[negated & ~negator] *= NEGATION_SCALE
+        
+        # Contrast words halve what precedes them and raise what follows
+        contrast = self._contrast[ids]
+        if contrast.any():
+            # Contrast words before each position; the leading 0 keeps
+            # starts in range for empty texts at the end of the batch
+            before = np.concatenate(([0], np.cumsum(contrast)))
+            base = before[starts]
+            # Contrast words up to each word, and in its whole text
+            seen = before[1:] - np.repeat(base, lengths)
+            in_doc = np.repeat(before[starts + lengths] - base, lengths)
+            valence[seen < in_doc] *= 0.5
+            valence[(seen > 0) & ~contrast] *= 1.5
+        
+        sums = np.bincount(doc, weights=valence, minlength=count)
+        return sums / np.sqrt(sums * sums + NORMALIZATION)
+    
+    def score_stream(
+        self,
+        texts: Iterable[Optional[str]],
+        batch_size: int = 10000,
+        workers: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Score a stream of texts in batches, in order
+        
+        With more than one worker, batches are scored in a process pool
+        with at most 2 * workers batches in flight, so memory stays bounded
+        whatever the stream length.
+        
+        Args:
+            texts: Review texts
+            batch_size: Texts per batch
+            workers: Processes to use (default: CPU count)
+        
+        Yields:
+            One score array per batch
+        """
+        workers = workers or os.cpu_count() or 1
+        batches = iter_chunks(texts, batch_size)
+        if workers == 1:
+            for batch in batches:
+                yield self.score(batch)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            pending = deque()
+            for batch in batches:
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(_score_in_worker, batch))
+            while pending:
+                yield pending.popleft().result()
+
+
+def label(scores: np.ndarray) -> np.ndarray:
+    """'positive', 'neutral' or 'negative' for each compound score"""
+    return np.where(scores >= NEUTRAL_THRESHOLD, "positive", np.where(scores <= -NEUTRAL_THRESHOLD, "negative", "neutral"))
+
+
+class SentimentAggregator:
+    """
+    Running per-product sentiment totals
+    
+    Batches of (product, score) pairs are folded in with bincount, so
+    products can be summarized at any point without keeping scores.
+    """
+    
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        # Per product: positive, neutral, negative counts and score sum
+        self._totals = np.zeros((0, 4))
+    
+    def add(self, products: Union[str, Sequence[str]], scores: np.ndarray):
+        """
+        Fold a batch of scores in
+        
+        Args:
+            products: One product for the whole batch, or one per score
+            scores: Compound scores from SentimentEngine.score
+        """
+        scores = np.asarray(scores, dtype=float)
+        if isinstance(products, str):
+            products = [products] * len(scores)
+        index = self._index
+        codes = np.fromiter((index.setdefault(product, len(index)) for product in products), dtype=np.int64, count=len(scores))
+        if len(index) > len(self._totals):
+            self._totals = np.vstack([self._totals, np.zeros((len(index) - len(self._totals), 4))])
+        
+        size = len(index)
+        positive = np.bincount(codes, weights=scores >= NEUTRAL_THRESHOLD, minlength=size)
+        negative = np.bincount(codes, weights=scores <= -NEUTRAL_THRESHOLD, minlength=size)
+        self._totals[:, 0] += positive
+        self._totals[:, 1] += np.bincount(codes, minlength=size) - positive - negative
+        self._totals[:, 2] += negative
+        self._totals[:, 3] += np.bincount(codes, weights=scores, minlength=size)
+    
+    def summary(self, product: str) -> Dict:
+        """
+        Sentiment breakdown for one product
+        
+        Returns:
+            Percent positive/neutral/negative, average compound score and
+            number of reviews scored
+        """
+        totals = self._totals[self._index[product]].tolist() if product in self._index else [0.0] * 4
+        positive, neutral, negative, total = totals
+        reviews = positive + neutral + negative
+        share = (lambda value: round(100 * value / reviews, 1)) if reviews else (lambda value: 0.0)
+        return {
+            "positive": share(positive),
+            "neutral": share(neutral),
+            "negative": share(negative),
+            "average_sentiment_score": round(total / reviews, 2) if reviews else 0.0,
+            "reviews_scored": int(reviews)
+        }
+    
+    def summaries(self) -> Dict[str, Dict]:
+        """summary() for every product seen"""
+        return {product: self.summary(product) for product in self._index}
+
+
+def _normalize(word: str) -> str:
+    """Lexicon word in tokenizer form ("don't" -> "dont")"""
+    return word.lower().replace("'", "").replace("\u2019", "")
+
+
+_worker_engine: Optional[SentimentEngine] = None
+
+
+def _init_worker(engine: SentimentEngine):
+    """Process pool initializer: receive the engine once per process"""
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _score_in_worker(texts: List[Optional[str]]) -> np.ndarray:
+    return _worker_engine.score(texts)
+
+
+def _benchmark_reviews(count: int, seed: int = 7) -> Iterator[str]:
+    """Synthetic review texts of realistic length"""
+    rng = np.random.default_rng(seed)
+    phrases = np.array([
+        "great visualizations and easy to use", "features are solid but pricing is steep",
+        "customer support is not very helpful", "the dashboard is really fast and intuitive",
+        "we had some issues with the integration", "reporting is limited and a bit clunky",
+        "best market intelligence tool we have used", "onboarding took longer than expected",
+        "the data exports work as described", "absolutely love the alerts feature",
+        "there is a steep learning curve for new analysts", "not bad for the price",
+        "the mobile app crashes too often", "well worth it for our research team"
+    ])
+    for picks in rng.integers(0, len(phrases), size=(count, 4)):
+        yield ". ".join(phrases[picks])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark review sentiment scoring throughput")
+    parser.add_argument("--reviews", type=int, default=200000, help="Synthetic reviews to score")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Reviews per scoring batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the pooled run")
+    args = parser.parse_args()
+    
+    engine = SentimentEngine()
+    reviews = list(_benchmark_reviews(args.reviews))
+    products = [f"Product {index % 50}" for index in range(args.reviews)]
+    
+    sample = reviews[:min(len(reviews), 20000)]
+    start = time.perf_counter()
+    for review in sample:
+        engine.score([review])
+    single_rate = len(sample) / (time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    aggregator = SentimentAggregator()
+    offset = 0
+    for scores in engine.score_stream(reviews, args.batch_size, workers=1):
+        aggregator.add(products[offset:offset + len(scores)], scores)
+        offset += len(scores)
+    batch_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    pooled = np.concatenate(list(engine.score_stream(reviews, args.batch_size, workers=args.workers)))
+    pool_seconds = time.perf_counter() - start
+    
+    print("\n=== Sentiment Engine Benchmark ===")
+    print(f"One review at a time:      {single_rate:,.0f} reviews/s")
+    print(f"Vectorized batches:        {args.reviews / batch_seconds:,.0f} reviews/s ({batch_seconds:.2f}s, incl. aggregation)")
+    print(f"Process pool ({args.workers} workers): {args.reviews / pool_seconds:,.0f} reviews/s ({pool_seconds:.2f}s)")
+    print(f"Example: {aggregator.summary('Product 0')}")
@@ -0,0 +1,391 @@
+"""
+Streaming I/O - Constant-memory record readers and JSONL writers
+Shared by the market sizing and forecasting models for inputs and results that do not fit in memory
+"""
+
+import csv
+import glob
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Dict, IO, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+# Compressed file suffixes and their compression names
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+# zstd's default level: faster than gzip -6 and smaller output
+ZSTD_LEVEL = 3
+
+
+def open_text(path: str, mode: str = "r", compresslevel: int = 6) -> IO[str]:
+    """
+    Open a text file for streaming, transparently compressed for *.gz and *.zst paths
+
+    zstd requires zstandard; compresslevel applies to gzip only.
+    """
+    if path.endswith(".gz"):
+        # Level 6 is gzip's default trade-off; Python's 9 roughly doubles write time
+        return gzip.open(path, mode + "t", compresslevel=compresslevel, encoding="utf-8", newline="")
+    if path.endswith(".zst"):
+        import zstandard
+        
+        if mode == "r":
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        else:
+            raw = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"), closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """
+    Yield records one at a time from a CSV or JSONL file
+    
+    The format follows the extension (.csv or .jsonl/.ndjson, optionally
+    with a trailing .gz or .zst). CSV values are returned as strings; only
+    the current line is held in memory.
+    """
+    stem = strip_compression(path)
+    with open_text(path) as f:
+        if stem.endswith(".csv"):
+            yield from csv.DictReader(f)
+        elif stem.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported input format: {path} (expected .csv or .jsonl)")
+
+
+def iter_chunks(records: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most size items"""
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class JsonlWriter:
+    """
+    Incremental JSON Lines writer
+    
+    Writes one compact JSON object per line as records arrive, so output
+    size in memory stays at one record whatever the total. Paths ending in
+    .gz are gzip-compressed on the fly. NumPy scalars and arrays are
+    converted to plain JSON values.
+    """
+    
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.records_written = 0
+        self._file = open_text(path, "w")
+        self._buffer = io.StringIO()
+        self._buffer_size = buffer_size
+        self._encoder = json.JSONEncoder(separators=(",", ":"), default=json_default)
+    
+    def write(self, record: Dict):
+        """Append one record"""
+        self._buffer.write(self._encoder.encode(record))
+        self._buffer.write("\n")
+        self.records_written += 1
+        if self._buffer.tell() >= self._buffer_size:
+            self.flush()
+    
+    def write_many(self, records: Iterable[Dict]):
+        """Append records in order"""
+        for record in records:
+            self.write(record)
+    
+    def flush(self):
+        """Hand buffered lines to the (possibly compressing) file"""
+        self._file.write(self._buffer.getvalue())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+    
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+    
+    def __enter__(self) -> "JsonlWriter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ShardedJsonlWriter:
+    """
+    JSON Lines writer that splits output into size-bounded compressed shards
+    
+    Records go to <directory>/<prefix>-00000.jsonl.gz, -00001, ... and a
+    new shard starts before one would exceed max_shard_bytes (uncompressed)
+    or max_shard_records. close() writes <directory>/manifest.json listing
+    every shard with its record count, the index of its first record, its
+    uncompressed byte offset and size in the logical concatenated stream,
+    its compressed size and a SHA-256 of the compressed file. Loaders can
+    then process shards in parallel, or go straight to the shard holding a
+    given record, without reading the rest.
+    
+    The manifest is written last, so its presence marks a complete output;
+    leaving the with block on an exception closes the shards without one.
+    Shards left in the directory by an earlier run with the same prefix
+    are removed when the writer opens. compression is "gzip", "zstd"
+    (requires zstandard) or None.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "part",
+        max_shard_bytes: int = 64 * 1024 * 1024,
+        max_shard_records: Optional[int] = None,
+        compression: Optional[str] = "gzip",
+        compresslevel: int = 6,
+        buffer_size: int = 1 << 20
+    ):
+        if compression not in ("gzip", "zstd", None):
+            raise ValueError(f"Unsupported compression: {compression} (expected gzip, zstd or None)")
+        if max_shard_bytes < 1 or (max_shard_records is not None and max_shard_records < 1):
+            raise ValueError("shard limits must be at least 1")
+        self.directory = directory
+        self.prefix = prefix
+        self.max_shard_bytes = max_shard_bytes
+        self.max_shard_records = max_shard_records
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.records_written = 0
+        self.shards: List[Dict] = []
+        self._suffix = ".jsonl" + {"gzip": ".gz", "zstd": ".zst", None: ""}[compression]
+        self._encoder = json.JSONEncoder(separators=(",", ":"), default=json_default)
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._buffer_size = buffer_size
+        self._bytes_written = 0
+        self._shard = None
+        self._closed = False
+        
+        os.makedirs(directory, exist_ok=True)
+        stale = glob.glob(os.path.join(glob.escape(directory), glob.escape(prefix) + "-[0-9]*.jsonl*"))
+        for path in stale + [self.manifest_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+    
+    def write(self, record: Dict):
+        """Append one record, starting a new shard first if this one is full"""
+        line = (self._encoder.encode(record) + "\n").encode("utf-8")
+        shard = self._shard
+        if shard is None or (shard["records"] and (
+            shard["uncompressed_bytes"] + len(line) > self.max_shard_bytes
+            or shard["records"] == self.max_shard_records
+        )):
+            shard = self._next_shard()
+        self._buffer.append(line)
+        self._buffered += len(line)
+        shard["records"] += 1
+        shard["uncompressed_bytes"] += len(line)
+        self.records_written += 1
+        if self._buffered >= self._buffer_size:
+            self.flush()
+    
+    def write_many(self, records: Iterable[Dict]):
+        """Append records in order"""
+        for record in records:
+            self.write(record)
+    
+    def flush(self):
+        """Hand buffered lines to the current shard's compressor"""
+        if self._buffer:
+            self._stream.write(b"".join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+    
+    def close(self) -> Dict:
+        """
+        Finish the last shard and write the manifest
+        
+        Returns:
+            The manifest
+        """
+        if not self._closed:
+            self._closed = True
+            self._finish_shard()
+            manifest = self.manifest()
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        return self.manifest()
+    
+    def abort(self):
+        """Close the shard files without writing a manifest, leaving the output incomplete"""
+        if not self._closed:
+            self._closed = True
+            self._finish_shard()
+    
+    def manifest(self) -> Dict:
+        return {
+            "format": "jsonl",
+            "compression": self.compression,
+            "records": self.records_written,
+            "uncompressed_bytes": sum(shard["uncompressed_bytes"] for shard in self.shards),
+            "bytes": sum(shard["bytes"] for shard in self.shards),
+            "created_at": datetime.now().isoformat(),
+            "shards": self.shards
+        }
+    
+    def __enter__(self) -> "ShardedJsonlWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+    
+    def _next_shard(self) -> Dict:
+        self._finish_shard()
+        previous = self.shards[-1] if self.shards else None
+        name = f"{self.prefix}-{len(self.shards):05d}{self._suffix}"
+        shard = {
+            "path": name,
+            "records": 0,
+            "first_record": previous["first_record"] + previous["records"] if previous else 0,
+            "uncompressed_offset": previous["uncompressed_offset"] + previous["uncompressed_bytes"] if previous else 0,
+            "uncompressed_bytes": 0,
+            "bytes": 0,
+            "sha256": None
+        }
+        self.shards.append(shard)
+        self._shard = shard
+        self._file = _HashingFile(open(os.path.join(self.directory, name), "wb"))
+        if self.compression == "gzip":
+            # mtime=0 keeps identical input byte-identical (and checksums stable)
+            self._stream = gzip.GzipFile(filename="", mode="wb", fileobj=self._file,
+                                         compresslevel=self.compresslevel, mtime=0)
+        elif self.compression == "zstd":
+            import zstandard
+            
+            self._stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._file, closefd=False)
+        else:
+            self._stream = self._file
+        return shard
+    
+    def _finish_shard(self):
+        if self._shard is None:
+            return
+        self.flush()
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+        self._shard["bytes"] = self._file.size
+        self._shard["sha256"] = self._file.digest.hexdigest()
+        self._shard = None
+
+
+class _HashingFile:
+    """Binary file wrapper counting and SHA-256 hashing the bytes written"""
+    
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.digest = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+    
+    def flush(self):
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+
+
+def read_manifest(directory: str) -> Dict:
+    """Manifest of a ShardedJsonlWriter output directory"""
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_shard_paths(directory: str, verify: bool = False) -> Iterator[str]:
+    """
+    Paths of a sharded output's shards, in record order
+    
+    With verify, each shard's checksum is compared with the manifest
+    before it is handed out, raising ValueError on a mismatch.
+    """
+    for shard in read_manifest(directory)["shards"]:
+        path = os.path.join(directory, shard["path"])
+        if verify:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            if digest.hexdigest() != shard["sha256"]:
+                raise ValueError(f"Checksum mismatch for shard {path}")
+        yield path
+
+
+def read_sharded(directory: str, verify: bool = False) -> Iterator[Dict]:
+    """Yield every record of a sharded output in order, one shard at a time"""
+    for path in iter_shard_paths(directory, verify):
+        yield from read_records(path)
+
+
+class TeeWriter:
+    """Fan records out to several writers (anything with write_many and close)"""
+    
+    def __init__(self, *writers):
+        self.writers = writers
+    
+    def write(self, record: Dict):
+        self.write_many([record])
+    
+    def write_many(self, records: Iterable[Dict]):
+        records = list(records)
+        for writer in self.writers:
+            writer.write_many(records)
+    
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+    
+    def __enter__(self) -> "TeeWriter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def json_default(value):
+    """json.dumps default= hook giving plain JSON values for NumPy types"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def strip_compression(path: str) -> str:
+    """Path without a trailing compression suffix"""
+    for suffix in COMPRESSION_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
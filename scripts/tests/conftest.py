@@ -0,0 +1,103 @@
+"""
+Shared pytest setup for the scripts
+Makes the scripts importable, including the hyphenated ones (scraper-g2.py -> scraper_g2),
+and provides a local stub HTTP server for the scraper tests
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+
+def load_script(filename: str):
+    """Import a script by file name, e.g. load_script("scraper-g2.py")"""
+    name = filename[:-3].replace("-", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubServer:
+    """
+    Local HTTP server for scraper tests
+    
+    handler(method, path, headers, body) returns (status, headers, body);
+    the default answers 200 with an empty JSON object. Every request is
+    recorded in requests as (monotonic time, method, path, headers, body),
+    and max_in_flight tracks the most requests handled at once.
+    """
+    
+    def __init__(self):
+        self.handler = lambda method, path, headers, body: (200, {}, b"{}")
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+    
+    def paths(self, method: str = "GET"):
+        return [path for _, verb, path, _, _ in self.requests if verb == method]
+    
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def _respond(self, request: BaseHTTPRequestHandler):
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        headers = {name.lower(): value for name, value in request.headers.items()}
+        with self._lock:
+            self.requests.append((time.monotonic(), request.command, request.path, headers, body))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            status, response_headers, response_body = self.handler(request.command, request.path, headers, body)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        request.send_response(status)
+        for name, value in response_headers.items():
+            request.send_header(name, value)
+        request.send_header("Content-Length", str(len(response_body)))
+        request.end_headers()
+        request.wfile.write(response_body)
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                server._respond(self)
+            
+            def do_POST(self):
+                server._respond(self)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
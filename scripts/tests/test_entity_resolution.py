@@ -0,0 +1,173 @@
+"""
+Tests for entity_resolution: name normalization, resolution of each scraper's keys, learning,
+ambiguity handling, and the blocking index against exhaustive matching
+"""
+
+import random
+import sqlite3
+
+import pytest
+
+from entity_resolution import EntityIndex, Match, _benchmark_names, domain_words, normalize_words
+
+# Companies and products from scripts/02-seed-data.sql
+COMPANIES = [
+    (1, "TechVision Analytics", "techvision.com"),
+    (2, "DataStream Pro", "datastream.io"),
+    (3, "InsightHub", "insighthub.com"),
+    (4, "MarketPulse", "marketpulse.com"),
+    (5, "CompeteIQ", "competeiq.com"),
+]
+PRODUCTS = [(1, "TechVision Enterprise"), (2, "DataStream Analytics"), (3, "InsightHub Pro")]
+
+
+def _seed_index(**options) -> EntityIndex:
+    index = EntityIndex(**options)
+    for company_id, name, domain in COMPANIES:
+        index.add_company(company_id, name, domain)
+    for company_id, product_name in PRODUCTS:
+        index.add_alias(company_id, product_name)
+    return index
+
+
+def test_names_and_domains_normalize_to_the_same_words():
+    assert normalize_words("TechVision Analytics, Inc.") == ["techvision", "analytics"]
+    # A name made only of suffix words keeps them
+    assert normalize_words("The Company") == ["the", "company"]
+    assert domain_words("https://www.tech-vision.co.uk/about") == ["tech", "vision"]
+    assert domain_words("app.insighthub.com") == ["insighthub"]
+    assert domain_words("localhost") == ["localhost"]
+
+
+@pytest.mark.parametrize("source, key, company_id, exact", [
+    ("linkedin", "https://www.techvision.com/about", 1, True),
+    ("linkedin", "DataStream.io", 2, True),
+    ("crunchbase", "TechVision Analytics, Inc.", 1, True),
+    ("crunchbase", "Insight Hub", 3, True),
+    ("crunchbase", "Tech Vison Analytics", 1, False),
+    ("g2", "InsightHub Pro", 3, True),
+    ("g2", "MarketPulse Research", 4, False),
+    ("g2", "CompeteIQ Monitor", 5, False),
+])
+def test_each_source_resolves_to_its_company(source, key, company_id, exact):
+    match = _seed_index().resolve(source, key)
+    assert match is not None and match.company_id == company_id
+    assert (match.score == 1.0) == exact
+    assert match.score >= 0.75
+
+
+@pytest.mark.parametrize("source, key", [("g2", "Unrelated Widget"), ("crunchbase", ""), ("crunchbase", "!!!")])
+def test_unknown_keys_do_not_resolve(source, key):
+    assert _seed_index().resolve(source, key) is None
+
+
+def test_confident_matches_are_learned_as_aliases():
+    index = _seed_index()
+    # Without learning the index is unchanged, so the key still matches fuzzily
+    assert index.resolve("g2", "MarketPulse Research", learn=False).score < 1.0
+    assert index.resolve("g2", "MarketPulse Research").score < 1.0
+    # The learned key now resolves exactly
+    assert index.resolve("g2", "MarketPulse Research") == Match(4, 1.0, "MarketPulse Research")
+    # Learned under its normalized form, so other spellings hit it exactly too
+    assert index.resolve("crunchbase", "MarketPulse Research Inc").score == 1.0
+
+
+def test_ambiguous_keys_are_left_unresolved():
+    index = EntityIndex()
+    index.add_company(1, "Nova Analytics")
+    index.add_company(2, "Nova Research")
+    index.add_company(3, "Orbit Systems")
+    index.add_company(4, "Orbit Systems, Inc.")
+    # Equally close to two companies: no margin between them
+    assert index.resolve("g2", "Nova Platform") is None
+    # The exact name of two companies
+    assert index.resolve("crunchbase", "Orbit Systems") is None
+    # Nothing ambiguous is learned
+    assert index.resolve("g2", "Nova Platform") is None
+    assert index.resolve("crunchbase", "Nova Analytics") == Match(1, 1.0, "Nova Analytics")
+
+
+def test_margin_and_threshold_are_configurable():
+    assert _seed_index(threshold=0.95).resolve("g2", "MarketPulse Research") is None
+    index = EntityIndex(margin=0.0)
+    index.add_company(1, "Nova Analytics")
+    index.add_company(2, "Nova Research")
+    assert index.resolve("g2", "Nova Research Cloud") is not None
+
+
+def test_link_adds_company_ids_to_records():
+    records = [
+        {"product_name": "InsightHub Pro", "rating": 4.5},
+        {"product_name": "Unrelated Widget", "rating": 3.0},
+        {"rating": 1.0},
+    ]
+    linked = list(_seed_index().link("g2", records))
+    assert linked == [
+        {"product_name": "InsightHub Pro", "rating": 4.5, "company_id": 3, "match_score": 1.0},
+        {"product_name": "Unrelated Widget", "rating": 3.0, "company_id": None, "match_score": None},
+        {"rating": 1.0, "company_id": None, "match_score": None},
+    ]
+    with pytest.raises(ValueError):
+        _seed_index().resolve("twitter", "techvision")
+
+
+def test_index_loads_companies_and_products_from_a_connection():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE companies (id INTEGER PRIMARY KEY, name TEXT, domain TEXT)")
+    connection.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, company_id INTEGER, product_name TEXT)")
+    connection.executemany("INSERT INTO companies VALUES (?, ?, ?)", COMPANIES)
+    connection.executemany(
+        "INSERT INTO products (company_id, product_name) VALUES (?, ?)", PRODUCTS + [(None, "Orphan")]
+    )
+    index = EntityIndex.from_connection(connection)
+    connection.close()
+
+    assert len(index) == 5
+    assert index.resolve("g2", "TechVision Enterprise") == Match(1, 1.0, "TechVision Enterprise")
+    assert index.resolve("g2", "Orphan") is None
+
+
+def _benchmark(count: int, queries: int, seed: int):
+    names = _benchmark_names(count)
+    rng = random.Random(seed)
+    keys = []
+    for _ in range(queries):
+        company_id = rng.randint(1, count)
+        name = names[company_id - 1]
+        kind = rng.randrange(3)
+        if kind == 0:
+            keys.append(("crunchbase", f"{name}, Inc.", company_id))
+        elif kind == 1:
+            position = rng.randrange(1, len(name))
+            keys.append(("crunchbase", name[:position] + name[position + 1:], company_id))
+        else:
+            keys.append(("g2", f"{name.split()[0]} Enterprise", company_id))
+    return names, keys
+
+
+def _benchmark_index(names, **options) -> EntityIndex:
+    index = EntityIndex(**options)
+    for company_id, name in enumerate(names, 1):
+        index.add_company(company_id, name, name.split()[0].lower() + ".com")
+    return index
+
+
+def test_blocking_agrees_with_exhaustive_matching():
+    names, keys = _benchmark(1000, 600, seed=1)
+    blocked = _benchmark_index(names)
+    # No key is too common and every candidate is scored
+    exhaustive = _benchmark_index(names, max_block=len(names) * 4, max_keys=1 << 30, max_candidates=1 << 30)
+
+    matches = [blocked.resolve(source, key, learn=False) for source, key, _ in keys]
+    assert matches == [exhaustive.resolve(source, key, learn=False) for source, key, _ in keys]
+    resolved = [(match, company_id) for match, (_, _, company_id) in zip(matches, keys) if match is not None]
+    assert len(resolved) >= 0.95 * len(keys)
+    assert all(match.company_id == company_id for match, company_id in resolved)
+
+
+def test_candidates_per_lookup_stay_bounded():
+    names, keys = _benchmark(3000, 200, seed=2)
+    index = _benchmark_index(names, max_candidates=25)
+    for source, key, _ in keys:
+        words = normalize_words(key)
+        assert len(index._candidates(words, "".join(words))) <= 25
@@ -0,0 +1,138 @@
+"""
+Tests for forecasting-model's ForecastCache: hits, LRU and disk tiers, invalidation, bypass
+"""
+
+import threading
+
+from conftest import load_script
+
+forecasting = load_script("forecasting-model.py")
+
+MC = "MarketForecastingModel.monte_carlo_simulation"
+ENTRY = dict(
+    investment=1e6, market_size=1e8, target_market_share=0.05, time_to_achieve_years=3,
+    avg_revenue_per_customer=2000.0, customer_acquisition_cost=500.0
+)
+
+
+def _entries(cache):
+    methods = [method for method, _ in cache._memory.values()]
+    if cache._db is not None:
+        methods += [method for (method,) in cache._db.execute("SELECT method FROM forecast_cache")]
+    return methods
+
+
+def test_seeded_hit_matches_a_fresh_run_exactly():
+    cache = forecasting.ForecastCache()
+    model = forecasting.MarketForecastingModel(cache=cache)
+    kwargs = dict(periods=4, simulations=5000, seed=42, fan_chart=True)
+
+    first = model.monte_carlo_simulation(100.0, 0.1, 0.2, **kwargs)
+    second = model.monte_carlo_simulation(100.0, 0.1, 0.2, **kwargs)
+    fresh = forecasting.MarketForecastingModel().monte_carlo_simulation(100.0, 0.1, 0.2, **kwargs)
+
+    assert first == second == fresh
+    # workers does not change the result, so it shares the entry
+    assert model.monte_carlo_simulation(100.0, 0.1, 0.2, workers=None, **kwargs) == fresh
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+    # Only the outer call is stored, not the monte_carlo_batch it runs
+    assert _entries(cache) == [MC]
+
+
+def test_hits_are_copies():
+    cache = forecasting.ForecastCache()
+    model = forecasting.MarketForecastingModel(cache=cache)
+    model.linear_forecast(100.0, 0.1, 3).append("mutated")
+    assert model.linear_forecast(100.0, 0.1, 3) == forecasting.MarketForecastingModel().linear_forecast(100.0, 0.1, 3)
+
+
+def test_counters():
+    cache = forecasting.ForecastCache()
+    model = forecasting.MarketForecastingModel(cache=cache)
+    for rate in (0.1, 0.2, 0.1, 0.1):
+        model.compound_growth_forecast(100.0, rate, 5)
+    model.monte_carlo_simulation(100.0, 0.1, 0.2, periods=2, simulations=100)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (2, 2, 1)
+    assert stats["hit_rate"] == 0.5 and stats["memory_entries"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = forecasting.ForecastCache(max_entries=2)
+    model = forecasting.MarketForecastingModel(cache=cache)
+    model.linear_forecast(1.0, 0.1, 2)
+    model.linear_forecast(2.0, 0.1, 2)
+    model.linear_forecast(1.0, 0.1, 2)
+    model.linear_forecast(3.0, 0.1, 2)
+
+    assert cache.stats()["memory_entries"] == 2
+    model.linear_forecast(1.0, 0.1, 2)
+    assert cache.stats()["hits"] == 2
+    model.linear_forecast(2.0, 0.1, 2)
+    assert cache.stats()["misses"] == 4
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = forecasting.ForecastCache(path=path)
+    expected = forecasting.InvestmentSimulator(cache=cache).simulate_market_entry(**ENTRY)
+    cache.close()
+
+    reopened = forecasting.ForecastCache(path=path)
+    assert forecasting.InvestmentSimulator(cache=reopened).simulate_market_entry(**ENTRY) == expected
+    assert reopened.stats()["disk_hits"] == 1 and reopened.stats()["misses"] == 0
+    reopened.close()
+
+
+def test_invalidate_by_method_and_entirely(tmp_path):
+    cache = forecasting.ForecastCache(path=str(tmp_path / "cache.db"))
+    simulator = forecasting.InvestmentSimulator(cache=cache)
+    simulator.simulate_market_entry(**ENTRY)
+    simulator.calculate_roi(1e6, 0.2, 3)
+
+    cache.invalidate("InvestmentSimulator.simulate_market_entry")
+    assert _entries(cache) == ["InvestmentSimulator.calculate_roi"] * 2
+    simulator.simulate_market_entry(**ENTRY)
+    assert cache.stats()["misses"] == 3
+
+    cache.invalidate()
+    assert _entries(cache) == []
+    cache.close()
+
+
+def test_unseeded_calls_leave_no_entries(tmp_path):
+    cache = forecasting.ForecastCache(path=str(tmp_path / "cache.db"))
+    model = forecasting.MarketForecastingModel(cache=cache)
+    simulator = forecasting.InvestmentSimulator(cache=cache)
+    for _ in range(3):
+        model.monte_carlo_simulation(100.0, 0.1, 0.2, periods=3, simulations=1000)
+    simulator.simulate_market_entry_stochastic(**ENTRY, paths=3000, chunk_size=1000)
+
+    assert _entries(cache) == []
+    assert cache.stats()["bypassed"] == 4
+    cache.close()
+
+
+def test_shared_between_threads(tmp_path):
+    cache = forecasting.ForecastCache(max_entries=8, path=str(tmp_path / "cache.db"))
+    model = forecasting.MarketForecastingModel(cache=cache)
+    errors = []
+
+    def work(offset):
+        try:
+            for i in range(200):
+                model.linear_forecast(float((i + offset) % 20), 0.05, 4)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert errors == []
+    assert stats["hits"] + stats["misses"] == 800
+    assert stats["memory_entries"] == 8
+    cache.close()
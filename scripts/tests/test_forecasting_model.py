@@ -0,0 +1,187 @@
+"""
+Tests for forecasting-model: growth forecasts, streamed bulk forecasts, Monte Carlo chunking and early stopping,
+stochastic market entry, online Holt-Winters
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+from streaming_io import JsonlWriter, read_records
+
+forecasting = load_script("forecasting-model.py")
+
+
+@pytest.mark.parametrize("current_value, rate", [(1_000_000, 0.155), (37.3, 0.07), (2.5e9, -0.031)])
+def test_scalar_growth_forecasts_match_the_closed_form_exactly(current_value, rate):
+    model = forecasting.MarketForecastingModel()
+    expected = [current_value] + [current_value * (1 + rate) ** i for i in range(1, 31)]
+    assert model.linear_forecast(current_value, rate, 30) == expected
+    assert model.compound_growth_forecast(current_value, rate, 30) == expected
+
+
+def test_batch_growth_forecasts_match_scalar_exactly():
+    model = forecasting.MarketForecastingModel()
+    rng = np.random.default_rng(5)
+    values = rng.uniform(1.0, 1e9, 2000)
+    rates = np.concatenate([rng.uniform(-0.5, 1.0, 1000), rng.normal(0.0, 0.05, 1000)])
+    linear = model.linear_forecast_batch(values, rates, 25)
+    compound = model.compound_growth_forecast_batch(values, rates, 25)
+    for i in range(len(values)):
+        value, rate = float(values[i]), float(rates[i])
+        assert linear[i].tolist() == model.linear_forecast(value, rate, 25)
+        assert compound[i].tolist() == model.compound_growth_forecast(value, rate, 25)
+
+
+@pytest.mark.parametrize("output_name", ["forecasts.jsonl", "forecasts.jsonl.gz"])
+def test_streamed_forecasts_match_scalar_forecasts(tmp_path, output_name):
+    rng = np.random.default_rng(6)
+    series = [(f"series-{i}", float(rng.uniform(1.0, 1e8)), float(rng.uniform(-0.2, 0.5))) for i in range(103)]
+    with open(tmp_path / "series.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "current_value", "growth_rate"])
+        writer.writerows((name, repr(value), repr(rate)) for name, value, rate in series)
+
+    model = forecasting.MarketForecastingModel()
+    with JsonlWriter(str(tmp_path / output_name)) as writer:
+        result = model.stream_forecasts(read_records(str(tmp_path / "series.csv")), 6, writer, chunk_size=10)
+
+    expected = [model.linear_forecast(value, rate, 6) for _, value, rate in series]
+    assert list(read_records(str(tmp_path / output_name))) == [
+        {"name": name, "forecast": forecast} for (name, _, _), forecast in zip(series, expected)
+    ]
+    assert result["series_count"] == 103 and result["periods"] == 6
+    np.testing.assert_allclose(result["period_totals"], np.sum(expected, axis=0), rtol=1e-12)
+
+
+def test_chunk_bounds_default_blocks_are_even():
+    assert forecasting._chunk_bounds(10, 1, 4) == [(0, 4), (4, 8), (8, 10)]
+
+
+def test_chunk_bounds_ramp_doubles_the_completed_total():
+    bounds = forecasting._chunk_bounds(100, 1, 32, first_chunk=4)
+    assert bounds[:5] == [(0, 4), (4, 8), (8, 16), (16, 32), (32, 64)]
+    # Capped at chunk_size, and still covering every path exactly once
+    assert bounds[5:] == [(64, 96), (96, 100)]
+
+
+def test_tolerance_stops_well_before_the_budget():
+    model = forecasting.MarketForecastingModel()
+    simulations = 2_000_000
+    result = model.monte_carlo_simulation(
+        1000.0, 0.1, 0.2, periods=5, simulations=simulations, seed=7, tolerance=0.01
+    )
+    convergence = result["convergence"]
+    assert convergence["converged"]
+    assert convergence["paths_used"] <= simulations // 16
+    assert max(convergence["relative_half_width"].values()) <= 0.01
+
+
+@pytest.mark.parametrize("quantile_method", ["exact", "sketch"])
+def test_tolerance_runs_are_reproducible(quantile_method):
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(periods=3, simulations=50_000, seed=11, tolerance=0.02, quantile_method=quantile_method)
+    first = model.monte_carlo_simulation(500.0, 0.05, 0.3, **kwargs)
+    second = model.monte_carlo_simulation(500.0, 0.05, 0.3, **kwargs)
+    assert first == second
+
+
+def test_stochastic_entry_reports_uniform_params_apart_from_clip_bounds():
+    simulator = forecasting.InvestmentSimulator()
+    distributions = {
+        "churn_rate": forecasting.InputDistribution("uniform", {"low": 0.02, "high": 0.08}),
+        "customer_acquisition_cost": forecasting.InputDistribution(
+            "normal", {"loc": 500.0, "scale": 100.0}, low=100.0
+        ),
+    }
+    result = simulator.simulate_market_entry_stochastic(
+        investment=1e6, market_size=1e8, target_market_share=0.05, time_to_achieve_years=3,
+        avg_revenue_per_customer=2000.0, customer_acquisition_cost=500.0,
+        distributions=distributions, paths=2000, seed=3
+    )
+    assert result["uncertain_inputs"] == {
+        "churn_rate": {
+            "distribution": "uniform", "params": {"low": 0.02, "high": 0.08},
+            "clip_low": None, "clip_high": None
+        },
+        "customer_acquisition_cost": {
+            "distribution": "normal", "params": {"loc": 500.0, "scale": 100.0},
+            "clip_low": 100.0, "clip_high": None
+        },
+    }
+
+
+def test_default_uncertainty_leaves_non_positive_inputs_at_their_point_value():
+    simulator = forecasting.InvestmentSimulator()
+    result = simulator.simulate_market_entry_stochastic(
+        investment=1e6, market_size=1e8, target_market_share=0.05, time_to_achieve_years=3,
+        avg_revenue_per_customer=2000.0, customer_acquisition_cost=0.0, churn_rate=0.0, paths=1000, seed=1
+    )
+    assert list(result["uncertain_inputs"]) == ["avg_revenue_per_customer"]
+    assert np.isfinite(result["roi"]["mean"])
+
+
+def _holt_winters_reference(values, alpha, beta, gamma, season_length, multiplicative, periods):
+    """Textbook per-observation Holt-Winters recursion and forecast for one series"""
+    level, trend = 0.0, 0.0
+    season = [1.0 if multiplicative else 0.0] * season_length
+    for count, value in enumerate(values):
+        phase = count % season_length
+        if count == 0:
+            level = value
+            continue
+        if multiplicative:
+            new_level = alpha * (value / season[phase]) + (1 - alpha) * (level + trend)
+            season[phase] = gamma * (value / new_level) + (1 - gamma) * season[phase]
+        else:
+            new_level = alpha * (value - season[phase]) + (1 - alpha) * (level + trend)
+            season[phase] = gamma * (value - new_level) + (1 - gamma) * season[phase]
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    forecast = []
+    for h in range(1, periods + 1):
+        seasonal = season[(len(values) + h - 1) % season_length]
+        trended = level + h * trend
+        forecast.append(trended * seasonal if multiplicative else trended + seasonal)
+    return forecast
+
+
+@pytest.mark.parametrize("seasonal", ["additive", "multiplicative"])
+def test_online_holt_winters_matches_the_per_series_recursion(seasonal):
+    rng = np.random.default_rng(4)
+    series = {
+        f"s{i}": list(100 + 10 * i + np.arange(n) * 2 + 5 * np.sin(np.arange(n)) + rng.normal(0, 1, n))
+        for i, n in enumerate([1, 7, 12, 30])
+    }
+    # Interleaved, with repeats of a series inside one batch
+    stream = sorted(
+        ((position, name, value) for name, values in series.items() for position, value in enumerate(values)),
+        key=lambda item: (item[0], rng.random())
+    )
+    model = forecasting.OnlineHoltWinters(season_length=4, seasonal=seasonal, capacity=2)
+    for batch in forecasting.iter_chunks(stream, 9):
+        model.update_many([name for _, name, _ in batch], [value for _, _, value in batch])
+
+    assert len(model) == 4
+    for name, values in series.items():
+        expected = _holt_winters_reference(values, 0.3, 0.1, 0.1, 4, seasonal == "multiplicative", 6)
+        np.testing.assert_allclose(model.forecast(name, 6), expected, rtol=1e-12)
+        assert model.state(name)["observations"] == len(values)
+
+
+def test_online_forecasts_fold_in_only_new_history():
+    model = forecasting.MarketForecastingModel()
+    model.record_observations(["a", "b", "a"], [10.0, 50.0, 12.0])
+    assert model.sync_online_model() == 0
+    # Entries appended straight to historical_data are picked up on the next forecast
+    model.historical_data.append({"series_id": "a", "value": 14.0})
+    forecast = model.online_forecast("a", 3)
+
+    reference = forecasting.OnlineHoltWinters()
+    for value in (10.0, 12.0, 14.0):
+        reference.update("a", value)
+    assert forecast == reference.forecast("a", 3)
+    assert model.online_model.state("a")["observations"] == 3
+    assert model.online_model.state("b")["observations"] == 1
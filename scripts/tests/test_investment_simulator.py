@@ -0,0 +1,167 @@
+"""
+Tests for forecasting-model's InvestmentSimulator: batched market entry, sweeps and tornado sensitivities,
+top-k ranking and the Pareto frontier against brute force
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+forecasting = load_script("forecasting-model.py")
+
+BASE = dict(
+    investment=5e6, market_size=1.25e9, target_market_share=0.05, time_to_achieve_years=3,
+    avg_revenue_per_customer=50000.0, customer_acquisition_cost=15000.0, churn_rate=0.05
+)
+SUMMARY_FIELDS = (
+    "final_customers", "final_revenue", "cumulative_revenue", "cumulative_cost", "net_profit", "roi"
+)
+
+
+def _assert_row_matches_scalar(results, index, inputs):
+    expected = forecasting.InvestmentSimulator().simulate_market_entry(**inputs)
+    for field in SUMMARY_FIELDS:
+        assert results[field][index] == expected[field], field
+    payback = results["payback_period"][index]
+    assert (None if np.isinf(payback) else payback) == expected["payback_period"]
+
+
+def test_batch_matches_the_scalar_simulation_row_by_row():
+    rng = np.random.default_rng(0)
+    count = 200
+    inputs = {
+        "investment": rng.uniform(1e5, 1e7, count),
+        "market_size": rng.uniform(1e7, 1e10, count),
+        "target_market_share": rng.uniform(0.001, 0.2, count),
+        # Mixed horizons: shorter scenarios keep their final-year state
+        "time_to_achieve_years": rng.integers(1, 8, count),
+        "avg_revenue_per_customer": rng.uniform(500.0, 1e5, count),
+        "customer_acquisition_cost": rng.uniform(100.0, 5e4, count),
+        "churn_rate": rng.uniform(0.0, 0.3, count),
+    }
+    results = forecasting.InvestmentSimulator().simulate_market_entry_batch(**inputs)
+    for index in range(count):
+        row = {name: values[index].item() for name, values in inputs.items()}
+        _assert_row_matches_scalar(results, index, row)
+
+
+def test_batch_rejects_horizons_under_a_year():
+    with pytest.raises(ValueError):
+        forecasting.InvestmentSimulator().simulate_market_entry_batch(**{**BASE, "time_to_achieve_years": [2, 0]})
+
+
+def test_sweep_covers_the_grid_in_c_order():
+    ranges = {
+        "target_market_share": [0.02, 0.05, 0.1],
+        "churn_rate": [0.02, 0.1],
+        "customer_acquisition_cost": [5000.0, 15000.0, 30000.0, 60000.0],
+    }
+    sweep = forecasting.InvestmentSimulator().sweep_market_entry(BASE, ranges)
+
+    assert sweep["grid_shape"] == (3, 2, 4)
+    for index, values in enumerate(itertools.product(*ranges.values())):
+        point = dict(zip(ranges, values))
+        assert {name: column[index] for name, column in sweep["parameters"].items()} == point
+        _assert_row_matches_scalar(sweep["results"], index, {**BASE, **point})
+    # The tornado spans each swept range
+    assert {
+        entry["parameter"]: (entry["low"], entry["high"]) for entry in sweep["tornado"]["sensitivities"]
+    } == {name: (min(values), max(values)) for name, values in ranges.items()}
+
+
+def test_tornado_moves_one_parameter_at_a_time_widest_first():
+    simulator = forecasting.InvestmentSimulator()
+    ranges = {
+        "churn_rate": (0.01, 0.2),
+        "customer_acquisition_cost": (10000.0, 20000.0),
+        "avg_revenue_per_customer": (40000.0, 60000.0),
+    }
+    tornado = simulator.tornado_sensitivity(BASE, ranges)
+    base = simulator.simulate_market_entry(**BASE)
+
+    assert tornado["base"] == {"roi": base["roi"], "net_profit": base["net_profit"]}
+    deltas = [abs(entry["roi"]["delta"]) for entry in tornado["sensitivities"]]
+    assert deltas == sorted(deltas, reverse=True)
+    for entry in tornado["sensitivities"]:
+        name = entry["parameter"]
+        assert (entry["low"], entry["high"], entry["base"]) == (*ranges[name], BASE[name])
+        for end in ("low", "high"):
+            moved = simulator.simulate_market_entry(**{**BASE, name: ranges[name][0 if end == "low" else 1]})
+            assert entry["roi"][end] == moved["roi"]
+            assert entry["net_profit"][end] == moved["net_profit"]
+
+
+def test_tornado_centers_parameters_missing_from_base():
+    base = {name: value for name, value in BASE.items() if name != "churn_rate"}
+    tornado = forecasting.InvestmentSimulator().tornado_sensitivity(base, {"churn_rate": (0.0, 0.1)})
+    [entry] = tornado["sensitivities"]
+    assert entry["base"] == 0.05
+    assert tornado["base"]["roi"] == forecasting.InvestmentSimulator().simulate_market_entry(**BASE)["roi"]
+
+
+def _scenario_columns(count, seed, objectives=3):
+    rng = np.random.default_rng(seed)
+    # Coarse values so ties and exact duplicates are common
+    columns = {
+        "roi": rng.integers(-20, 60, count).astype(float),
+        "risk_score": rng.integers(0, 40, count).astype(float),
+        "payback_period": rng.integers(1, 8, count).astype(float),
+        "cost": rng.integers(0, 10, count).astype(float),
+    }
+    columns["roi"][rng.random(count) < 0.05] = np.nan
+    columns["payback_period"][rng.random(count) < 0.1] = np.inf
+    return {name: columns[name] for name in list(columns)[:objectives]}
+
+
+def _brute_force_frontier(columns, objectives):
+    points = np.column_stack([
+        np.nan_to_num(-columns[name] if direction == "max" else columns[name], nan=np.inf)
+        for name, direction in objectives.items()
+    ])
+    return [
+        i for i in range(len(points))
+        if not any((points[j] <= points[i]).all() and (points[j] < points[i]).any() for j in range(len(points)))
+    ]
+
+
+@pytest.mark.parametrize("largest", [True, False])
+@pytest.mark.parametrize("k", [0, 1, 7, 500, 1000])
+def test_top_scenarios_match_a_full_sort(k, largest):
+    columns = _scenario_columns(500, seed=k)
+    ranked = forecasting.InvestmentSimulator().top_scenarios(columns, "roi", k, largest=largest)
+    # Best first, ties by index, NaN last
+    key = lambda i: (np.isnan(columns["roi"][i]), -columns["roi"][i] if largest else columns["roi"][i], i)
+    assert ranked.tolist() == sorted(range(500), key=key)[:k]
+
+
+@pytest.mark.parametrize("objectives", [
+    {"roi": "max", "risk_score": "min"},
+    {"roi": "max", "risk_score": "min", "payback_period": "min"},
+    {"roi": "max", "risk_score": "min", "payback_period": "min", "cost": "min"},
+])
+@pytest.mark.parametrize("seed", range(3))
+def test_pareto_frontier_matches_brute_force(objectives, seed):
+    columns = _scenario_columns(400, seed, len(objectives))
+    frontier = forecasting.InvestmentSimulator().pareto_frontier(columns, objectives)
+    assert frontier.tolist() == _brute_force_frontier(columns, objectives)
+
+
+def test_compare_scenarios_accepts_rows_or_columns():
+    columns = _scenario_columns(60, seed=5)
+    rows = [{name: float(values[i]) for name, values in columns.items()} for i in range(60)]
+    simulator = forecasting.InvestmentSimulator()
+    from_rows = simulator.compare_scenarios(rows, top_k=5)
+    from_columns = simulator.compare_scenarios(columns, top_k=5)
+
+    assert from_rows["rankings"] == from_columns["rankings"]
+    assert from_rows["pareto_frontier"] == from_columns["pareto_frontier"] == _brute_force_frontier(
+        columns, {"roi": "max", "risk_score": "min", "payback_period": "min"}
+    )
+    # A NaN ROI never counts as the best
+    assert from_rows["best_roi"] == rows[from_rows["rankings"]["roi"][0]]
+    assert from_rows["best_roi"]["roi"] == np.nanmax(columns["roi"])
+    assert from_rows["lowest_risk"] == rows[from_rows["rankings"]["risk_score"][0]]
+    assert from_rows["fastest_payback"] == rows[from_rows["rankings"]["payback_period"][0]]
@@ -0,0 +1,483 @@
+"""
+Tests for market-sizing-model: the correlated portfolio simulation, the columnar segment table
+and vectorized sizing, the incrementally maintained rollup cube, the broadcast assumption grid
+and streaming ingestion, each against the scalar per-segment model or a full recompute
+"""
+
+import csv
+import itertools
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+from streaming_io import JsonlWriter, read_records
+
+sizing = load_script("market-sizing-model.py")
+
+SEGMENTS = [
+    sizing.MarketSegment("Enterprise BI - North America", "Business Intelligence", "North America", "Enterprise",
+                         50000, 50000.0, 0.155),
+    sizing.MarketSegment("SMB Analytics - North America", "Business Intelligence", "North America", "SMB",
+                         200000, 12000.0, 0.182),
+    sizing.MarketSegment("Enterprise BI - Europe", "Business Intelligence", "Europe", "Enterprise",
+                         35000, 45000.0, 0.148),
+    sizing.MarketSegment("SMB CRM - Europe", "CRM", "Europe", "SMB", 120000, 9000.0, 0.21),
+]
+
+
+def _random_segments(count, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        sizing.MarketSegment(
+            name=f"Segment {i}",
+            industry=str(rng.choice(["Business Intelligence", "CRM", "Security"])),
+            geography=str(rng.choice(["North America", "Europe", "APAC", "LATAM"])),
+            customer_type=str(rng.choice(["Enterprise", "SMB"])),
+            total_companies=int(rng.integers(1, 500_000)),
+            avg_revenue_per_customer=float(rng.uniform(100.0, 100_000.0)),
+            market_growth_rate=float(rng.uniform(-0.1, 0.4))
+        )
+        for i in range(count)
+    ]
+
+
+def _scalar_som(segments, **assumptions):
+    model = sizing.MarketSizingModel()
+    return [model.calculate_full_market_sizing(segment, **assumptions)["current_year"]["som"] for segment in segments]
+
+
+def _loop_totals(segments, volatility, years, paths, seed, chunk_size, loadings=None, idiosyncratic=None):
+    """Total SOM of every path from the engine's own shocks, grown segment by segment in a plain loop"""
+    som = _scalar_som(segments)
+    bounds = [(start, min(start + chunk_size, paths)) for start in range(0, paths, chunk_size)]
+    totals = []
+    for (start, stop), chunk_seed in zip(bounds, np.random.SeedSequence(seed).spawn(len(bounds))):
+        rng = np.random.default_rng(chunk_seed)
+        values = [list(som) for _ in range(stop - start)]
+        for _ in range(years):
+            shocks = sizing._correlated_shocks(rng, stop - start, len(segments), loadings, idiosyncratic).tolist()
+            for path, path_shocks in zip(values, shocks):
+                for i, (segment, shock) in enumerate(zip(segments, path_shocks)):
+                    path[i] *= max(shock * volatility + (1 + segment.market_growth_rate), 0.0)
+        totals.extend(sum(path) for path in values)
+    return totals
+
+
+@pytest.mark.parametrize("correlation", [None, "partial"])
+def test_portfolio_matches_a_per_path_loop(correlation):
+    matrix = None
+    loadings = None
+    if correlation == "partial":
+        matrix = np.full((4, 4), 0.3) + 0.7 * np.eye(4)
+        matrix[0, 1] = matrix[1, 0] = 0.8
+        loadings = np.linalg.cholesky(matrix)
+    result = sizing.MarketSizingModel().simulate_portfolio(
+        SEGMENTS, correlation=matrix, growth_volatility=0.1, years=3, paths=2000, seed=7, chunk_size=300,
+        return_totals=True
+    )
+    totals = _loop_totals(SEGMENTS, 0.1, 3, 2000, 7, 300, loadings)
+    ordered = sorted(totals)
+
+    np.testing.assert_allclose(result["totals"], totals, rtol=1e-12)
+    assert result["current_som"] == pytest.approx(sum(_scalar_som(SEGMENTS)), rel=1e-15)
+    assert result["total_som"]["expected"] == pytest.approx(np.mean(totals), rel=1e-12)
+    assert result["total_som"]["std_dev"] == pytest.approx(np.std(totals), rel=1e-9)
+    for name, q in sizing.PERCENTILES.items():
+        assert result["total_som"]["percentiles"][name] == pytest.approx(ordered[int(2000 * q)], rel=1e-12)
+    assert result["total_som"]["min"] == pytest.approx(ordered[0], rel=1e-12)
+    assert result["total_som"]["max"] == pytest.approx(ordered[-1], rel=1e-12)
+
+
+def test_factor_loadings_match_a_per_path_loop():
+    model = sizing.MarketSizingModel()
+    loadings = model.attribute_factor_loadings(SEGMENTS)
+    idiosyncratic = np.sqrt(1 - (loadings ** 2).sum(axis=1))
+    result = model.simulate_portfolio(
+        SEGMENTS, factor_loadings=loadings, growth_volatility=0.1, years=2, paths=1500, seed=3, chunk_size=400,
+        return_totals=True
+    )
+    totals = _loop_totals(SEGMENTS, 0.1, 2, 1500, 3, 400, loadings, idiosyncratic)
+    np.testing.assert_allclose(result["totals"], totals, rtol=1e-12)
+
+
+def test_without_volatility_the_total_is_the_scalar_projection():
+    model = sizing.MarketSizingModel()
+    result = model.simulate_portfolio(SEGMENTS, growth_volatility=0.0, years=1, paths=50, seed=1)
+    projected = sum(model.calculate_full_market_sizing(segment)["next_year_projection"]["som"] for segment in SEGMENTS)
+
+    total = result["total_som"]
+    assert total["expected"] == pytest.approx(projected, rel=1e-12)
+    assert total["std_dev"] == pytest.approx(0.0, abs=1e-6 * projected)
+    for value in [*total["percentiles"].values(), total["min"], total["max"]]:
+        assert value == pytest.approx(projected, rel=1e-12)
+    for entry, segment in zip(result["segments"], SEGMENTS):
+        scalar = model.calculate_full_market_sizing(segment)
+        assert entry["current_som"] == scalar["current_year"]["som"]
+        assert entry["expected_som"] == pytest.approx(scalar["next_year_projection"]["som"], rel=1e-12)
+
+
+def test_correlation_widens_the_total_and_contributions_sum_to_one():
+    model = sizing.MarketSizingModel()
+    kwargs = dict(growth_volatility=0.1, paths=100_000, seed=11)
+    independent = model.simulate_portfolio(SEGMENTS, **kwargs)
+    # All ones is singular, so this also takes the eigendecomposition path
+    locked = model.simulate_portfolio(SEGMENTS, correlation=np.ones((4, 4)), **kwargs)
+
+    som = np.array(_scalar_som(SEGMENTS))
+    assert independent["total_som"]["std_dev"] == pytest.approx(0.1 * np.sqrt((som ** 2).sum()), rel=0.02)
+    assert locked["total_som"]["std_dev"] == pytest.approx(0.1 * som.sum(), rel=0.02)
+    assert locked["diversification_ratio"] == pytest.approx(1.0, abs=1e-6)
+    assert independent["diversification_ratio"] < 0.8
+    for result in (independent, locked):
+        assert sum(entry["variance_contribution"] for entry in result["segments"]) == pytest.approx(1.0)
+
+
+def test_attribute_loadings_correlate_segments_by_shared_attributes():
+    loadings = sizing.MarketSizingModel().attribute_factor_loadings(SEGMENTS)
+    shared = loadings @ loadings.T
+    weights = sizing.DEFAULT_ATTRIBUTE_WEIGHTS
+    for i, first in enumerate(SEGMENTS):
+        for j, second in enumerate(SEGMENTS):
+            expected = sum(
+                weight for attribute, weight in weights.items() if getattr(first, attribute) == getattr(second, attribute)
+            )
+            assert shared[i, j] == pytest.approx(expected)
+
+
+def test_results_depend_only_on_seed_and_chunk_size():
+    model = sizing.MarketSizingModel()
+    kwargs = dict(correlation=np.full((4, 4), 0.5) + 0.5 * np.eye(4), paths=3000, seed=5)
+    first = model.simulate_portfolio(SEGMENTS, chunk_size=700, **kwargs)
+    assert model.simulate_portfolio(SEGMENTS, chunk_size=700, **kwargs) == first
+    assert model.simulate_portfolio(SEGMENTS, chunk_size=1000, **kwargs) != first
+    table = sizing.SegmentTable.from_segments(SEGMENTS)
+    assert model.simulate_portfolio(table, chunk_size=700, **kwargs) == first
+
+
+def test_invalid_portfolio_arguments_are_rejected():
+    model = sizing.MarketSizingModel()
+    with pytest.raises(ValueError):
+        model.simulate_portfolio(SEGMENTS, paths=0)
+    with pytest.raises(ValueError):
+        model.simulate_portfolio(SEGMENTS, years=0)
+    with pytest.raises(ValueError):
+        model.simulate_portfolio(SEGMENTS, correlation=np.eye(4), factor_loadings=np.zeros((4, 1)))
+    with pytest.raises(ValueError):
+        model.simulate_portfolio(SEGMENTS, correlation=np.eye(3))
+    with pytest.raises(ValueError):
+        # Symmetric with a unit diagonal, but not positive semi-definite
+        model.simulate_portfolio(SEGMENTS, correlation=np.full((4, 4), -0.9) + 1.9 * np.eye(4))
+    with pytest.raises(ValueError):
+        model.simulate_portfolio(SEGMENTS, factor_loadings=np.ones((4, 2)))
+
+
+@pytest.mark.parametrize("assumptions", [{}, dict(penetration_rate=0.17, market_share=0.031, competitive_factor=0.63)])
+def test_multi_segment_sizing_matches_the_scalar_model_exactly(assumptions, capsys):
+    segments = _random_segments(300, seed=0)
+    model = sizing.MarketSizingModel()
+    expected = [model.calculate_full_market_sizing(segment, **assumptions) for segment in segments]
+    capsys.readouterr()
+
+    result = model.calculate_multi_segment_sizing(sizing.SegmentTable.from_segments(segments), **assumptions)
+    # Column-wise sizing prints nothing per segment
+    assert capsys.readouterr().out == ""
+    assert result["segments"] == expected
+    assert result["segment_count"] == 300
+    totals = {"tam": 0.0, "sam": 0.0, "som": 0.0}
+    for entry in expected:
+        for measure in totals:
+            totals[measure] += entry["current_year"][measure]
+    assert {measure: result["totals"][measure] for measure in totals} == totals
+    assert result["totals"]["som_percentage"] == totals["som"] / totals["tam"] * 100
+    # Records and a table give the same answer; the per-segment dictionaries are optional
+    assert model.calculate_multi_segment_sizing(segments, **assumptions) == result
+    assert model.calculate_multi_segment_sizing(segments, include_segments=False, **assumptions) == {
+        name: value for name, value in result.items() if name != "segments"
+    }
+
+
+def test_sizing_columns_match_the_scalar_projection():
+    segments = _random_segments(50, seed=1)
+    model = sizing.MarketSizingModel()
+    columns = model.calculate_sizing_columns(segments, 0.25, 0.1, 0.9)
+    for i, segment in enumerate(segments):
+        scalar = model.calculate_full_market_sizing(segment, 0.25, 0.1, 0.9)
+        for measure in ("tam", "sam", "som"):
+            assert columns[measure][i] == scalar["current_year"][measure]
+            assert columns[f"{measure}_next_year"][i] == scalar["next_year_projection"][measure]
+
+
+def test_segment_table_round_trips_segments():
+    segments = _random_segments(20, seed=2)
+    table = sizing.SegmentTable.from_segments(segments)
+    assert len(table) == 20
+    assert list(table) == segments
+    assert table[7] == segments[7]
+    assert type(table[7].total_companies) is int and type(table[7].market_growth_rate) is float
+
+
+def test_segment_table_reads_csv_style_records():
+    records = [
+        {"segment_name": segment.name, "industry": segment.industry, "geography": segment.geography,
+         "customer_type": segment.customer_type, "total_companies": str(segment.total_companies),
+         "avg_revenue_per_customer": repr(segment.avg_revenue_per_customer),
+         "market_growth_rate": repr(segment.market_growth_rate)}
+        for segment in SEGMENTS
+    ]
+    assert list(sizing.SegmentTable.from_records(records)) == SEGMENTS
+    # A name column takes precedence over segment_name
+    renamed = [{**record, "name": f"Renamed {i}"} for i, record in enumerate(records)]
+    assert sizing.SegmentTable.from_records(renamed).name.tolist() == [f"Renamed {i}" for i in range(4)]
+
+
+def test_segment_table_rejects_ragged_columns():
+    with pytest.raises(ValueError):
+        sizing.SegmentTable(["a", "b"], ["x", "x"], ["y", "y"], ["z", "z"], [1, 2], [1.0, 2.0], [0.1])
+
+
+def _recomputed(segments, **filters):
+    matching = [
+        segment for segment in segments
+        if all(getattr(segment, dimension) == value for dimension, value in filters.items())
+    ]
+    columns = sizing.MarketSizingModel().calculate_sizing_columns(matching)
+    return {measure: sum(columns[measure].tolist()) for measure in sizing.SizingCube.MEASURES}, len(matching)
+
+
+def _assert_cube_matches_recompute(cube, segments):
+    scale = sum(segment.total_companies * segment.avg_revenue_per_customer for segment in segments)
+    values = {
+        dimension: sorted({getattr(segment, dimension) for segment in segments})
+        for dimension in sizing.SizingCube.DIMENSIONS
+    }
+    for size in range(len(sizing.SizingCube.DIMENSIONS) + 1):
+        for dimensions in itertools.combinations(sizing.SizingCube.DIMENSIONS, size):
+            grouped = cube.group_by(*dimensions)
+            expected_groups = set()
+            for key in itertools.product(*(values[dimension] for dimension in dimensions)):
+                filters = dict(zip(dimensions, key))
+                measures, count = _recomputed(segments, **filters)
+                totals = cube.total(**filters)
+                assert totals["segment_count"] == count, filters
+                for measure, value in measures.items():
+                    assert totals[measure] == pytest.approx(value, rel=1e-12, abs=1e-12 * scale), (filters, measure)
+                if count:
+                    expected_groups.add(key)
+                    assert grouped[key] == totals
+            # Cells empty after removals are dropped rather than kept at zero
+            assert set(grouped) == expected_groups
+
+
+def test_cube_matches_a_full_recompute_through_adds_updates_and_removes():
+    rng = np.random.default_rng(4)
+    segments = _random_segments(120, seed=3)
+    cube = sizing.SizingCube(segments[:80])
+    current = {segment.name: segment for segment in segments[:80]}
+    _assert_cube_matches_recompute(cube, list(current.values()))
+
+    for segment in segments[80:]:
+        cube.add_segment(segment)
+        current[segment.name] = segment
+    for name in rng.choice(sorted(current), 30, replace=False):
+        changed = _random_segments(1, seed=int(rng.integers(1 << 30)))[0]
+        changed.name = name
+        cube.update_segment(changed)
+        current[name] = changed
+    for name in rng.choice(sorted(current), 40, replace=False):
+        cube.remove_segment(name)
+        del current[name]
+
+    assert len(cube) == len(current) == 80
+    assert all(name in cube for name in current)
+    _assert_cube_matches_recompute(cube, list(current.values()))
+
+
+def test_cube_drops_a_slice_once_its_last_segment_leaves():
+    cube = sizing.SizingCube(SEGMENTS)
+    assert set(cube.group_by("industry")) == {("Business Intelligence",), ("CRM",)}
+    cube.remove_segment("SMB CRM - Europe")
+    assert set(cube.group_by("industry")) == {("Business Intelligence",)}
+    assert cube.total(industry="CRM") == {
+        **dict.fromkeys(sizing.SizingCube.MEASURES, 0.0),
+        "segment_count": 0, "sam_percentage": 0.0, "som_percentage": 0.0
+    }
+
+
+def test_cube_group_by_respects_order_and_filters():
+    cube = sizing.SizingCube(SEGMENTS)
+    grouped = cube.group_by("customer_type", "geography", industry="Business Intelligence")
+    assert set(grouped) == {("Enterprise", "North America"), ("SMB", "North America"), ("Enterprise", "Europe")}
+    assert grouped[("Enterprise", "Europe")]["som"] == _scalar_som(SEGMENTS[2:3])[0]
+    assert cube.total()["segment_count"] == 4
+    assert cube.total()["som"] == pytest.approx(sum(_scalar_som(SEGMENTS)))
+
+
+def test_cube_uses_its_own_assumptions():
+    assumptions = dict(penetration_rate=0.2, market_share=0.1, competitive_factor=0.5)
+    cube = sizing.SizingCube(SEGMENTS, **assumptions)
+    assert cube.total(geography="Europe")["som"] == pytest.approx(sum(_scalar_som(SEGMENTS[2:], **assumptions)))
+
+
+def test_cube_rejects_invalid_changes_and_queries():
+    cube = sizing.SizingCube(SEGMENTS[:2])
+    with pytest.raises(ValueError):
+        cube.add_segment(SEGMENTS[0])
+    with pytest.raises(ValueError):
+        cube.add_segments(SEGMENTS[1:3])
+    with pytest.raises(ValueError):
+        sizing.SizingCube([SEGMENTS[0], SEGMENTS[0]])
+    with pytest.raises(KeyError):
+        cube.remove_segment("Unknown")
+    with pytest.raises(ValueError):
+        cube.total(segment="Unknown")
+    with pytest.raises(ValueError):
+        cube.group_by("geography", "geography")
+    # A failed bulk load leaves the cube unchanged
+    assert len(cube) == 2 and cube.total()["segment_count"] == 2
+
+
+PENETRATION = [0.1, 0.3, 0.45]
+SHARE = [0.01, 0.05]
+COMPETITIVE = [0.5, 0.8, 1.0, 0.65]
+
+
+def _scalar_grid_totals(segments, penetration_rate, market_share, competitive_factor):
+    model = sizing.MarketSizingModel()
+    totals = dict.fromkeys(("tam", "sam", "som", "tam_next_year", "sam_next_year", "som_next_year"), 0.0)
+    for segment in segments:
+        result = model.calculate_full_market_sizing(segment, penetration_rate, market_share, competitive_factor)
+        for measure in ("tam", "sam", "som"):
+            totals[measure] += result["current_year"][measure]
+            totals[f"{measure}_next_year"] += result["next_year_projection"][measure]
+    return totals
+
+
+def _assert_grid_point(grid, index, expected):
+    p, s, c = index
+    for suffix in ("", "_next_year"):
+        assert grid[f"tam{suffix}"] == pytest.approx(expected[f"tam{suffix}"], rel=1e-12)
+        assert grid[f"sam{suffix}"][p] == pytest.approx(expected[f"sam{suffix}"], rel=1e-12)
+        assert grid[f"som{suffix}"][p, s, c] == pytest.approx(expected[f"som{suffix}"], rel=1e-12)
+
+
+def test_grid_matches_the_scalar_model_at_every_point():
+    segments = _random_segments(40, seed=5)
+    grid = sizing.MarketSizingModel().calculate_sizing_grid(segments, PENETRATION, SHARE, COMPETITIVE)
+
+    assert grid["sam"].shape == grid["sam_next_year"].shape == (3,)
+    assert grid["som"].shape == grid["som_next_year"].shape == (3, 2, 4)
+    assert grid["tam"].shape == ()
+    assert grid["penetration_rate"].tolist() == PENETRATION
+    assert grid["market_share"].tolist() == SHARE
+    assert grid["competitive_factor"].tolist() == COMPETITIVE
+    for index in itertools.product(range(3), range(2), range(4)):
+        point = (PENETRATION[index[0]], SHARE[index[1]], COMPETITIVE[index[2]])
+        _assert_grid_point(grid, index, _scalar_grid_totals(segments, *point))
+
+
+def test_grouped_grid_matches_the_scalar_model_per_group():
+    segments = _random_segments(60, seed=6)
+    grid = sizing.MarketSizingModel().calculate_sizing_grid(
+        sizing.SegmentTable.from_segments(segments), PENETRATION, SHARE, COMPETITIVE, group_by="geography"
+    )
+
+    # Groups in first-seen order
+    assert grid["groups"] == list(dict.fromkeys(segment.geography for segment in segments))
+    assert grid["tam"].shape == (len(grid["groups"]),)
+    assert grid["som"].shape == (len(grid["groups"]), 3, 2, 4)
+    for g, geography in enumerate(grid["groups"]):
+        members = [segment for segment in segments if segment.geography == geography]
+        group = {name: values[g] for name, values in grid.items() if name in sizing.SizingCube.MEASURES}
+        for index in itertools.product(range(3), range(2), range(4)):
+            point = (PENETRATION[index[0]], SHARE[index[1]], COMPETITIVE[index[2]])
+            _assert_grid_point(group, index, _scalar_grid_totals(members, *point))
+
+
+def test_grid_accepts_single_assumption_values():
+    grid = sizing.MarketSizingModel().calculate_sizing_grid(SEGMENTS, 0.3, 0.05, 0.8)
+    assert grid["som"].shape == (1, 1, 1)
+    assert grid["som"][0, 0, 0] == pytest.approx(sum(_scalar_som(SEGMENTS)), rel=1e-12)
+
+
+def test_grid_rejects_unknown_group_dimensions():
+    with pytest.raises(ValueError):
+        sizing.MarketSizingModel().calculate_sizing_grid(SEGMENTS, PENETRATION, SHARE, COMPETITIVE, group_by="name")
+
+
+FIELDS = ("name", "industry", "geography", "customer_type", "total_companies", "avg_revenue_per_customer",
+          "market_growth_rate")
+
+
+def _write_segments(path, segments):
+    """Segments as CSV (market_segments column names) or JSONL, by extension"""
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.writer(f)
+            writer.writerow(("segment_name",) + FIELDS[1:])
+            writer.writerows([repr(getattr(segment, field)) if field in FIELDS[4:] else getattr(segment, field)
+                              for field in FIELDS] for segment in segments)
+        else:
+            for segment in segments:
+                f.write(json.dumps({field: getattr(segment, field) for field in FIELDS}) + "\n")
+
+
+@pytest.mark.parametrize("input_name", ["segments.csv", "segments.jsonl"])
+@pytest.mark.parametrize("output_name", ["results.jsonl", "results.jsonl.gz"])
+def test_streamed_sizing_matches_the_in_memory_sizing(tmp_path, input_name, output_name):
+    segments = _random_segments(250, seed=7)
+    _write_segments(str(tmp_path / input_name), segments)
+    model = sizing.MarketSizingModel()
+    expected = model.calculate_multi_segment_sizing(segments, 0.2, 0.04, 0.7)
+
+    chunks = sizing.read_segments(str(tmp_path / input_name), chunk_size=40)
+    with JsonlWriter(str(tmp_path / output_name), buffer_size=512) as writer:
+        result = model.stream_multi_segment_sizing(chunks, writer, 0.2, 0.04, 0.7)
+
+    # Totals are accumulated chunk by chunk in the same order, so they agree exactly
+    assert result == {name: value for name, value in expected.items() if name != "segments"}
+    assert writer.records_written == 250
+    assert list(read_records(str(tmp_path / output_name))) == expected["segments"]
+
+
+def test_read_segments_yields_fixed_size_tables_lazily(tmp_path):
+    path = str(tmp_path / "segments.jsonl")
+    _write_segments(path, _random_segments(25, seed=8))
+    with open(path, "a") as f:
+        f.write("not json\n")
+
+    chunks = sizing.read_segments(path, chunk_size=10)
+    # Chunks arrive before the rest of the file has been read
+    assert [len(next(chunks)), len(next(chunks))] == [10, 10]
+    with pytest.raises(json.JSONDecodeError):
+        next(chunks)
+
+
+def test_streaming_skips_empty_chunks_and_handles_no_input():
+    model = sizing.MarketSizingModel()
+    empty = model.stream_multi_segment_sizing([])
+    assert empty == {
+        "totals": {"tam": 0.0, "sam": 0.0, "som": 0.0, "sam_percentage": 0.0, "som_percentage": 0.0},
+        "segment_count": 0
+    }
+    streamed = model.stream_multi_segment_sizing([SEGMENTS[:2], [], sizing.SegmentTable.from_segments(SEGMENTS[2:])])
+    assert streamed == model.calculate_multi_segment_sizing(SEGMENTS, include_segments=False)
+
+
+def _streamed_peak(path, count):
+    _write_segments(path, _random_segments(count, seed=9))
+    tracemalloc.start()
+    try:
+        with JsonlWriter(path + ".out.jsonl", buffer_size=1 << 14) as writer:
+            sizing.MarketSizingModel().stream_multi_segment_sizing(sizing.read_segments(path, chunk_size=200), writer)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_streaming_memory_does_not_grow_with_the_input(tmp_path):
+    small = _streamed_peak(str(tmp_path / "small.csv"), 1000)
+    large = _streamed_peak(str(tmp_path / "large.csv"), 8000)
+    assert large < 1.5 * small
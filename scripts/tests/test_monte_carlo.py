@@ -0,0 +1,209 @@
+"""
+Tests for forecasting-model's Monte Carlo engine: chunked paths against a per-path loop,
+results that do not depend on the number of worker processes, per-period fan charts, and
+antithetic and quasi-random sampling
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+forecasting = load_script("forecasting-model.py")
+
+
+def _loop_outcomes(base_value, growth, volatility, periods, simulations, seed, chunk_size=None, sampling="random"):
+    """Period values of every path, from the engine's own shocks fed through a plain loop"""
+    scenario = forecasting.ForecastParameters(base_value=base_value, growth_rate=growth, volatility=volatility)
+    bounds = forecasting._chunk_bounds(simulations, periods, chunk_size)
+    chunks = forecasting._plan_chunks(
+        scenario, periods, simulations, bounds, np.random.SeedSequence(seed), sampling=sampling
+    )
+    paths = []
+    for chunk in chunks:
+        for shocks in forecasting._draw_shocks(chunk).tolist():
+            value = base_value
+            path = []
+            for shock in shocks:
+                value = value * (1 + shock)
+                path.append(value)
+            paths.append(path)
+    return paths
+
+
+def _order_statistics(values):
+    ordered = sorted(values)
+    return {name: ordered[int(len(ordered) * q)] for name, q in forecasting.PERCENTILES.items()}
+
+
+@pytest.mark.parametrize("chunk_size", [None, 64, 1000])
+def test_engine_matches_a_per_path_loop(chunk_size):
+    model = forecasting.MarketForecastingModel()
+    result = model.monte_carlo_simulation(1000.0, 0.08, 0.15, periods=6, simulations=1000, seed=3, chunk_size=chunk_size)
+    terminal = [path[-1] for path in _loop_outcomes(1000.0, 0.08, 0.15, 6, 1000, 3, chunk_size)]
+
+    assert result["simulations"] == 1000
+    assert result["percentiles"] == _order_statistics(terminal)
+    assert (result["min"], result["max"]) == (min(terminal), max(terminal))
+    assert result["mean"] == pytest.approx(sum(terminal) / len(terminal), rel=1e-12)
+
+
+def test_chunking_changes_the_draws_but_not_the_distribution():
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(periods=5, simulations=40_000, seed=8)
+    whole = model.monte_carlo_simulation(100.0, 0.05, 0.1, **kwargs)
+    chunked = model.monte_carlo_simulation(100.0, 0.05, 0.1, chunk_size=3000, **kwargs)
+
+    assert whole != chunked
+    expected_mean = 100.0 * 1.05 ** 5
+    for result in (whole, chunked):
+        assert result["mean"] == pytest.approx(expected_mean, rel=0.005)
+    for name in forecasting.PERCENTILES:
+        assert chunked["percentiles"][name] == pytest.approx(whole["percentiles"][name], rel=0.01)
+
+
+def test_zero_periods_and_zero_volatility():
+    model = forecasting.MarketForecastingModel()
+    flat = model.monte_carlo_simulation(250.0, 0.1, 0.2, periods=0, simulations=10, seed=1)
+    assert flat["percentiles"] == dict.fromkeys(forecasting.PERCENTILES, 250.0)
+    assert flat["mean"] == flat["min"] == flat["max"] == 250.0
+
+    certain = model.monte_carlo_simulation(250.0, 0.1, 0.0, periods=3, simulations=10, seed=1)
+    assert certain["min"] == certain["max"] == pytest.approx(250.0 * 1.1 ** 3)
+
+
+def test_invalid_arguments_are_rejected():
+    model = forecasting.MarketForecastingModel()
+    with pytest.raises(ValueError):
+        model.monte_carlo_simulation(1.0, 0.1, 0.1, periods=2, simulations=0)
+    with pytest.raises(ValueError):
+        model.monte_carlo_simulation(1.0, 0.1, 0.1, periods=2, quantile_method="median")
+    with pytest.raises(ValueError):
+        model.monte_carlo_simulation(1.0, 0.1, 0.1, periods=2, sampling="lhs")
+
+
+@pytest.mark.parametrize("quantile_method", ["exact", "sketch"])
+def test_results_are_identical_for_any_worker_count(quantile_method):
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(
+        periods=4, simulations=5000, seed=21, chunk_size=700, quantile_method=quantile_method, fan_chart=True
+    )
+    in_process = model.monte_carlo_simulation(100.0, 0.1, 0.2, **kwargs)
+    assert model.monte_carlo_simulation(100.0, 0.1, 0.2, workers=1, **kwargs) == in_process
+    assert model.monte_carlo_simulation(100.0, 0.1, 0.2, workers=3, **kwargs) == in_process
+
+
+def test_batch_scenarios_get_independent_reproducible_streams():
+    model = forecasting.MarketForecastingModel()
+    scenarios = [
+        forecasting.ForecastParameters(base_value=100.0, growth_rate=0.1, volatility=0.2),
+        forecasting.ForecastParameters(base_value=100.0, growth_rate=0.1, volatility=0.2),
+    ]
+    first, second = model.monte_carlo_batch(scenarios, 3, simulations=2000, seed=4, chunk_size=500)
+    # Same parameters, different spawned streams
+    assert first["percentiles"] != second["percentiles"]
+    assert model.monte_carlo_batch(scenarios, 3, simulations=2000, seed=4, chunk_size=500, workers=2) == [first, second]
+    # The tolerance stop is taken on in-order chunks, so it agrees too
+    kwargs = dict(simulations=200_000, seed=4, tolerance=0.02)
+    assert model.monte_carlo_batch(scenarios, 3, workers=2, **kwargs) == model.monte_carlo_batch(scenarios, 3, **kwargs)
+
+
+def test_fan_chart_reports_every_period_from_the_same_paths():
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(periods=4, simulations=3000, seed=13, chunk_size=800)
+    plain = model.monte_carlo_simulation(100.0, 0.06, 0.2, **kwargs)
+    result = model.monte_carlo_simulation(100.0, 0.06, 0.2, fan_chart=True, **kwargs)
+    paths = _loop_outcomes(100.0, 0.06, 0.2, 4, 3000, 13, 800)
+
+    fan_chart = result.pop("fan_chart")
+    # Adding the fan chart does not change the terminal summary
+    assert result == plain
+    assert [entry["period"] for entry in fan_chart] == [1, 2, 3, 4]
+    for period, entry in enumerate(fan_chart):
+        values = [path[period] for path in paths]
+        assert {name: entry[name] for name in forecasting.PERCENTILES} == _order_statistics(values)
+        assert entry["mean"] == pytest.approx(sum(values) / len(values), rel=1e-12)
+    assert {name: fan_chart[-1][name] for name in forecasting.PERCENTILES} == plain["percentiles"]
+
+
+def test_sketched_fan_chart_is_within_accuracy_of_exact():
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(periods=3, simulations=20_000, seed=2, fan_chart=True)
+    exact = model.monte_carlo_simulation(100.0, 0.06, 0.2, **kwargs)["fan_chart"]
+    sketched = model.monte_carlo_simulation(100.0, 0.06, 0.2, quantile_method="sketch", **kwargs)["fan_chart"]
+    for exact_entry, sketched_entry in zip(exact, sketched):
+        for name in forecasting.PERCENTILES:
+            assert sketched_entry[name] == pytest.approx(exact_entry[name], rel=0.001)
+        assert sketched_entry["mean"] == pytest.approx(exact_entry["mean"], rel=1e-12)
+
+
+def _chunk(start, stop, periods, sampling, seed=0):
+    scenario = forecasting.ForecastParameters(base_value=1.0, growth_rate=0.05, volatility=0.2)
+    [chunk] = forecasting._plan_chunks(scenario, periods, stop, [(start, stop)], np.random.SeedSequence(seed), sampling=sampling)
+    return chunk
+
+
+@pytest.mark.parametrize("paths", [10, 11])
+def test_antithetic_shocks_mirror_each_other(paths):
+    shocks = forecasting._draw_shocks(_chunk(0, paths, 3, "antithetic"))
+    half = (paths + 1) // 2
+    assert shocks.shape == (paths, 3)
+    np.testing.assert_allclose(shocks[:paths - half] + shocks[half:], 2 * 0.05, atol=1e-15)
+
+
+def test_halton_points_are_stratified_and_chunk_invariant():
+    seed = np.random.SeedSequence(5).generate_state(4)
+    points = forecasting._halton_points(0, 243, 2, seed)
+    assert ((0 < points) & (points < 1)).all()
+    # base**k consecutive points put one point in each of base**k strata (the
+    # points sit on stratum edges, so round away the 1/3 representation error)
+    assert sorted(np.floor(points[:128, 0] * 128 + 1e-9).astype(int)) == list(range(128))
+    assert sorted(np.floor(points[:, 1] * 243 + 1e-9).astype(int)) == list(range(243))
+    pieces = [forecasting._halton_points(start, stop, 2, seed) for start, stop in [(0, 100), (100, 101), (101, 243)]]
+    assert np.array_equal(np.concatenate(pieces), points)
+
+
+def test_sobol_points_are_chunk_invariant():
+    pytest.importorskip("scipy")
+    seed = np.random.SeedSequence(5).generate_state(4)
+    points = forecasting._sobol_points(0, 256, 3, seed)
+    pieces = [forecasting._sobol_points(start, stop, 3, seed) for start, stop in [(0, 64), (64, 100), (100, 256)]]
+    assert np.array_equal(np.concatenate(pieces), points)
+    assert sorted(np.floor(points[:, 0] * 256).astype(int)) == list(range(256))
+
+
+@pytest.mark.parametrize("sampling", ["halton", "sobol"])
+def test_quasi_random_results_do_not_depend_on_chunking(sampling):
+    if sampling == "sobol":
+        pytest.importorskip("scipy")
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(periods=4, simulations=4096, seed=6, sampling=sampling)
+    whole = model.monte_carlo_simulation(100.0, 0.05, 0.2, **kwargs)
+    chunked = model.monte_carlo_simulation(100.0, 0.05, 0.2, chunk_size=1000, **kwargs)
+    assert chunked["percentiles"] == whole["percentiles"]
+    assert chunked["mean"] == pytest.approx(whole["mean"], rel=1e-12)
+
+
+@pytest.mark.parametrize("sampling", ["antithetic", "halton", "sobol"])
+def test_variance_reduced_sampling_tightens_the_mean_estimate(sampling):
+    if sampling == "sobol":
+        pytest.importorskip("scipy")
+    model = forecasting.MarketForecastingModel()
+
+    def spread(method):
+        means = [
+            model.monte_carlo_simulation(100.0, 0.05, 0.2, periods=3, simulations=1024, seed=seed, sampling=method)["mean"]
+            for seed in range(20)
+        ]
+        return np.std(means)
+
+    # Antithetic pairs only cancel the linear part of the payoff
+    assert spread(sampling) < spread("random") / (1.5 if sampling == "antithetic" else 3)
+
+
+def test_norm_ppf_matches_the_standard_library():
+    u = np.concatenate([np.linspace(1e-6, 1 - 1e-6, 2001), [1e-12, 0.02, 0.0243, 0.0245, 0.9757, 1 - 1e-12]])
+    expected = np.array([NormalDist().inv_cdf(p) for p in u])
+    np.testing.assert_allclose(forecasting._norm_ppf(u), expected, rtol=1e-8, atol=1e-12)
@@ -0,0 +1,92 @@
+"""
+Tests for forecasting-model's QuantileSketch: relative accuracy, exact merges and tail means
+"""
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+forecasting = load_script("forecasting-model.py")
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999, 1.0]
+
+
+def _assert_within_accuracy(sketch, values, accuracy):
+    ordered = np.sort(values)
+    for q in QUANTILES:
+        true = ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+        assert abs(sketch.quantile(q) - true) <= accuracy * abs(true) * (1 + 1e-9), q
+
+
+@pytest.mark.parametrize("accuracy", [0.001, 0.01])
+def test_quantiles_are_within_relative_accuracy(accuracy):
+    rng = np.random.default_rng(0)
+    positive = rng.lognormal(3.0, 1.5, 100_000)
+    mixed = np.concatenate([rng.normal(0.0, 50.0, 50_000), np.zeros(1000)])
+    for values in (positive, mixed):
+        sketch = forecasting.QuantileSketch(accuracy)
+        sketch.update(values)
+        _assert_within_accuracy(sketch, values, accuracy)
+        assert (sketch.count, sketch.min, sketch.max) == (len(values), values.min(), values.max())
+        assert not sketch.collapsed
+
+
+def test_merged_parts_equal_one_sketch_over_everything():
+    values = np.random.default_rng(1).normal(100.0, 40.0, 60_000)
+    whole = forecasting.QuantileSketch()
+    whole.update(values)
+    merged = forecasting.QuantileSketch()
+    for part in np.array_split(values, 7):
+        sketch = forecasting.QuantileSketch()
+        sketch.update(part)
+        merged.merge(sketch)
+
+    assert [merged.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+    assert (merged.count, merged.min, merged.max, merged.zero_count) == (whole.count, whole.min, whole.max, whole.zero_count)
+    assert merged.total == pytest.approx(whole.total)
+
+
+def test_memory_is_bounded_and_collapse_is_reported():
+    # About 4300 buckets' worth of values; the 2000 kept span the top e**4
+    values = np.random.default_rng(2).lognormal(0.0, 1.0, 20_000)
+    sketch = forecasting.QuantileSketch(0.001, max_bins=2000)
+    sketch.update(values)
+    assert len(sketch._positive.counts) <= 2000
+    assert sketch.collapsed
+    # Upper quantiles keep their guarantee; the folded low tail stays within range
+    ordered = np.sort(values)
+    for q in (0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(ordered[int(q * len(values))], rel=0.001)
+    assert values.min() <= sketch.quantile(0.01) <= values.max()
+
+
+def test_lower_tail_mean_matches_the_exact_expected_shortfall():
+    values = np.random.default_rng(3).lognormal(1.0, 0.8, 50_000)
+    sketch = forecasting.QuantileSketch(0.005)
+    sketch.update(values)
+    for fraction in (0.01, 0.05, 0.25):
+        tail = np.sort(values)[:int(np.ceil(len(values) * fraction))]
+        assert sketch.lower_tail_mean(fraction) == pytest.approx(tail.mean(), rel=0.005)
+
+
+def test_invalid_use_is_rejected():
+    with pytest.raises(ValueError):
+        forecasting.QuantileSketch(0.0)
+    with pytest.raises(ValueError):
+        forecasting.QuantileSketch().quantile(0.5)
+    with pytest.raises(ValueError):
+        forecasting.QuantileSketch(0.01).merge(forecasting.QuantileSketch(0.02))
+
+
+def test_sketched_monte_carlo_is_within_accuracy_of_exact():
+    model = forecasting.MarketForecastingModel()
+    kwargs = dict(periods=5, simulations=30_000, seed=9, chunk_size=4000)
+    exact = model.monte_carlo_simulation(500.0, 0.07, 0.25, **kwargs)
+    sketched = model.monte_carlo_simulation(500.0, 0.07, 0.25, quantile_method="sketch", relative_accuracy=0.001, **kwargs)
+
+    assert sketched["accuracy"] == {"relative_error": 0.001, "guaranteed": True}
+    for name, value in exact["percentiles"].items():
+        assert sketched["percentiles"][name] == pytest.approx(value, rel=0.001)
+    assert (sketched["min"], sketched["max"]) == (exact["min"], exact["max"])
+    assert sketched["mean"] == pytest.approx(exact["mean"], rel=1e-12)
@@ -0,0 +1,199 @@
+"""
+Tests for results_store: batched upserts into SQLite and, when a DSN is given, Postgres
+Set RESULTS_STORE_TEST_DSN to a scratch database to run the Postgres tests
+"""
+
+import csv
+import io
+import json
+import math
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+import results_store
+from results_store import (
+    PostgresResultsStore, ResultsStore, SQLiteResultsStore, _benchmark_rows, _copy_csv, _to_json,
+    open_results_store, scenario_row
+)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(results_store.__file__), "01-create-schema.sql")
+TEST_DSN = os.environ.get("RESULTS_STORE_TEST_DSN")
+
+
+def _scenarios(prefix: str):
+    return [
+        {"scenario_name": f"{prefix} base", "investment_amount": 1e6, "expected_roi": 12.5,
+         "time_horizon_months": 36, "risk_level": None, "assumptions": {"share": 0.1}, "results": None},
+        {"scenario_name": f"{prefix} quoted", "investment_amount": 2e6, "expected_roi": -3.0,
+         "time_horizon_months": 24, "risk_level": "", "assumptions": {"note": 'says "hi", twice'},
+         "results": {"roi": [1, 2]}},
+    ]
+
+
+def test_results_store_is_abstract():
+    with pytest.raises(TypeError):
+        ResultsStore()
+
+
+def test_sqlite_upserts_segments_in_batches():
+    with SQLiteResultsStore(batch_size=3) as store:
+        assert store.upsert_segments(_benchmark_rows(10), 2024) == 10
+        assert store.upsert_segments(_benchmark_rows(4), 2024) == 4
+        store.upsert_segments(_benchmark_rows(2), 2025)
+
+        rows = store.connection.execute(
+            "SELECT year, COUNT(*) FROM market_segments GROUP BY year ORDER BY year"
+        ).fetchall()
+        assert rows == [(2024, 10), (2025, 2)]
+        assert store.rows_written["market_segments"] == 16
+
+
+def test_sqlite_last_duplicate_in_a_batch_wins():
+    results = list(_benchmark_rows(2))
+    results[1]["segment_name"] = results[0]["segment_name"]
+    with SQLiteResultsStore() as store:
+        store.upsert_segments(results, 2024)
+        rows = store.connection.execute("SELECT segment_name, tam_value FROM market_segments").fetchall()
+    assert rows == [("Segment 0", results[1]["current_year"]["tam"])]
+
+
+def test_sqlite_scenarios_keep_null_and_empty_apart():
+    with open_results_store(":memory:") as store:
+        store.upsert_scenarios(_scenarios("S"))
+        rows = store.connection.execute(
+            "SELECT risk_level, assumptions, results FROM investment_scenarios ORDER BY scenario_name"
+        ).fetchall()
+    assert rows == [
+        (None, '{"share": 0.1}', None),
+        ("", '{"note": "says \\"hi\\", twice"}', '{"roi": [1, 2]}'),
+    ]
+
+
+def test_segment_writer_flushes_on_close():
+    with SQLiteResultsStore(batch_size=4) as store:
+        with store.segment_writer(2024) as writer:
+            writer.write_many(_benchmark_rows(6))
+            assert store.rows_written["market_segments"] == 4
+        assert store.rows_written["market_segments"] == 6
+
+
+def test_scenario_row_leaves_risk_level_null_without_risk_score():
+    inputs = {"investment": 5e5, "time_to_achieve_years": 3}
+    assert scenario_row("deterministic", inputs, {"roi": 40.0})["risk_level"] is None
+    assert scenario_row("stochastic", inputs, {"roi": {"mean": 40.0}, "risk_score": 30})["risk_level"] == "Medium-High"
+
+
+def test_copy_csv_writes_none_as_unquoted_empty_field():
+    text = _copy_csv([("a", None, "", 1.5, 3), ('say "x"', "x,y", None, None, None)])
+    assert text == '"a",,"",1.5,3\n"say ""x""","x,y",,,\n'
+    # Still valid CSV for the reader side
+    assert list(csv.reader(io.StringIO(text)))[1] == ['say "x"', "x,y", "", "", ""]
+
+
+def test_to_json_stores_non_finite_numbers_as_null():
+    value = {"mean": math.nan, "bounds": (-math.inf, 1.5), "p": np.float64(np.inf), "paths": np.array([1.0, np.nan])}
+    assert json.loads(_to_json(value)) == {"mean": None, "bounds": [None, 1.5], "p": None, "paths": [1.0, None]}
+
+
+def test_sqlite_scenarios_with_nan_results_load_as_valid_json():
+    scenario = dict(_scenarios("S")[0], results={"roi": {"mean": math.nan, "std": 2.0}})
+    with SQLiteResultsStore() as store:
+        store.upsert_scenarios([scenario])
+        [(results,)] = store.connection.execute("SELECT results FROM investment_scenarios").fetchall()
+    assert json.loads(results) == {"roi": {"mean": None, "std": 2.0}}
+
+
+class _RecordingCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, sql):
+        self.log.append(("execute", sql))
+
+    def copy_expert(self, sql, buffer):
+        self.log.append(("copy", sql, buffer.read()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class _RecordingPool:
+    """Stands in for ThreadedConnectionPool, logging what each connection is sent"""
+
+    def __init__(self):
+        self.log = []
+
+    def getconn(self):
+        pool = self
+
+        class Connection:
+            def cursor(self):
+                return _RecordingCursor(pool.log)
+
+            def commit(self):
+                pool.log.append(("commit",))
+
+            def rollback(self):
+                pool.log.append(("rollback",))
+
+        return Connection()
+
+    def putconn(self, connection):
+        pass
+
+
+def test_postgres_batches_copy_into_a_staging_table_without_the_id_default():
+    store = PostgresResultsStore.__new__(PostgresResultsStore)
+    ResultsStore.__init__(store, batch_size=2)
+    store.pool = _RecordingPool()
+    store.upsert_scenarios(_scenarios("S"))
+
+    [create, copy, upsert, commit] = store.pool.log
+    assert create == ("execute",
+        "CREATE TEMP TABLE IF NOT EXISTS investment_scenarios_staging ON COMMIT DELETE ROWS AS "
+        "SELECT scenario_name, investment_amount, expected_roi, time_horizon_months, risk_level, "
+        "assumptions, results FROM investment_scenarios WITH NO DATA")
+    assert "DEFAULT" not in create[1] and "LIKE" not in create[1]
+    assert copy[1].startswith("COPY investment_scenarios_staging (scenario_name, ")
+    assert copy[2].splitlines()[0] == '"S base",1000000.0,12.5,36,,"{""share"": 0.1}",'
+    assert upsert[1].startswith("INSERT INTO investment_scenarios (scenario_name, ")
+    assert "SELECT scenario_name, " in upsert[1] and "FROM investment_scenarios_staging ON CONFLICT" in upsert[1]
+    assert commit == ("commit",)
+
+
+@pytest.mark.skipif(not TEST_DSN, reason="RESULTS_STORE_TEST_DSN not set")
+def test_postgres_upserts_null_and_json_columns():
+    psycopg2 = pytest.importorskip("psycopg2")
+    prefix = f"test-{uuid.uuid4().hex[:8]}"
+    connection = psycopg2.connect(TEST_DSN)
+    try:
+        with connection, connection.cursor() as cursor:
+            with open(SCHEMA_PATH) as f:
+                cursor.execute(f.read())
+
+        with open_results_store(TEST_DSN, batch_size=1) as store:
+            store.upsert_scenarios(_scenarios(prefix))
+            # Second pass exercises the ON CONFLICT branch
+            store.upsert_scenarios(_scenarios(prefix))
+
+        with connection, connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT risk_level, assumptions, results FROM investment_scenarios "
+                "WHERE scenario_name LIKE %s ORDER BY scenario_name",
+                (prefix + "%",)
+            )
+            rows = cursor.fetchall()
+            cursor.execute("DELETE FROM investment_scenarios WHERE scenario_name LIKE %s", (prefix + "%",))
+    finally:
+        connection.close()
+
+    assert rows == [
+        (None, {"share": 0.1}, None),
+        ("", {"note": 'says "hi", twice'}, {"roi": [1, 2]}),
+    ]
@@ -0,0 +1,154 @@
+"""
+Tests for scraper_cache: freshness, conditional revalidation, change detection, eviction and keys
+"""
+
+from scraper_cache import ResponseCache
+from scraper_http import urllib_transport
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(tmp_path, clock, **kwargs) -> ResponseCache:
+    return ResponseCache(str(tmp_path / "cache.db"), ttls={"test": 60}, clock=clock, **kwargs)
+
+
+def test_fresh_entries_are_served_without_a_request(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {}, b"page " + path.encode())
+    clock = Clock()
+    cache = _cache(tmp_path, clock)
+    get = cache.wrap("test", urllib_transport)
+
+    first = get(stub_server.url + "/a", {}, 5)
+    clock.now += 30
+    second = get(stub_server.url + "/a", {}, 5)
+
+    assert (first.cache_status, second.cache_status) == ("miss", "hit")
+    assert second.body == b"page /a" and second.unchanged
+    assert len(stub_server.requests) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entries_revalidate_with_validators(stub_server, tmp_path):
+    def handler(method, path, headers, body):
+        if headers.get("if-none-match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, b"payload"
+
+    stub_server.handler = handler
+    clock = Clock()
+    cache = _cache(tmp_path, clock)
+    get = cache.wrap("test", urllib_transport)
+
+    get(stub_server.url + "/a", {}, 5)
+    clock.now += 61
+    response = get(stub_server.url + "/a", {}, 5)
+
+    assert response.cache_status == "revalidated"
+    assert response.body == b"payload" and response.unchanged
+    headers = stub_server.requests[1][3]
+    assert headers["if-none-match"] == '"v1"'
+    assert headers["if-modified-since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    # Revalidation renews freshness
+    clock.now += 30
+    assert get(stub_server.url + "/a", {}, 5).cache_status == "hit"
+    assert len(stub_server.requests) == 2
+
+
+def test_content_hash_flags_unchanged_bodies_without_validators(stub_server, tmp_path):
+    bodies = iter([b"same", b"same", b"different"])
+    stub_server.handler = lambda method, path, headers, body: (200, {}, next(bodies))
+    clock = Clock()
+    cache = _cache(tmp_path, clock)
+    get = cache.wrap("test", urllib_transport)
+
+    flags = []
+    for _ in range(3):
+        flags.append(get(stub_server.url + "/a", {}, 5).unchanged)
+        clock.now += 61
+    assert flags == [False, True, False]
+    assert cache.stats()["unchanged"] == 1 and cache.stats()["changed"] == 2
+
+
+def test_errors_are_not_cached(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (503, {}, b"")
+    cache = _cache(tmp_path, Clock())
+    get = cache.wrap("test", urllib_transport)
+    assert get(stub_server.url + "/a", {}, 5).status == 503
+    assert get(stub_server.url + "/a", {}, 5).status == 503
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_bodies_are_evicted(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {}, b"x" * 100)
+    clock = Clock()
+    cache = _cache(tmp_path, clock, max_bytes=250)
+    get = cache.wrap("test", urllib_transport)
+
+    for path in ("/a", "/b"):
+        get(stub_server.url + path, {}, 5)
+        clock.now += 1
+    # Touch /a so /b is the least recently used when /c arrives
+    get(stub_server.url + "/a", {}, 5)
+    clock.now += 1
+    get(stub_server.url + "/c", {}, 5)
+
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 200
+    assert get(stub_server.url + "/a", {}, 5).cache_status == "hit"
+    assert get(stub_server.url + "/b", {}, 5).cache_status == "miss"
+
+
+def test_entries_are_partitioned_per_credential(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {}, headers.get("x-cb-user-key", "").encode())
+    cache = _cache(tmp_path, Clock())
+    get = cache.wrap("test", urllib_transport)
+    url = stub_server.url + "/org"
+
+    assert get(url, {"X-cb-user-key": "alice"}, 5).body == b"alice"
+    assert get(url, {"X-cb-user-key": "bob"}, 5).body == b"bob"
+    assert get(url, {"X-cb-user-key": "alice"}, 5).cache_status == "hit"
+    assert len(stub_server.requests) == 2
+
+
+def test_make_key():
+    key = ResponseCache.make_key
+    assert key("g2", "u", {"User-Agent": "a", "If-None-Match": "x"}) == key("g2", "u", {})
+    assert key("g2", "u", {"Accept": "a"}) != key("g2", "u", {})
+    assert key("g2", "u", {"Authorization": "t1"}) != key("g2", "u", {"Authorization": "t2"})
+    assert key("g2", "u", {"Authorization": "t1"}) == key("g2", "u", {"authorization": "t1"})
+    assert key("g2", "u", {}) != key("linkedin", "u", {})
+
+
+def test_entries_survive_reopening(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {}, b"kept")
+    clock = Clock()
+    cache = _cache(tmp_path, clock)
+    cache.wrap("test", urllib_transport)(stub_server.url + "/a", {}, 5)
+    cache.close()
+
+    reopened = _cache(tmp_path, clock)
+    response = reopened.wrap("test", urllib_transport)(stub_server.url + "/a", {}, 5)
+    assert response.cache_status == "hit" and response.body == b"kept"
+    assert reopened.stats()["bytes"] == 4
+    reopened.invalidate("test")
+    assert reopened.stats()["entries"] == 0
+
+
+def test_fresh_answers_only_without_a_request(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {"ETag": '"e"'}, b"body")
+    clock = Clock()
+    cache = _cache(tmp_path, clock)
+    url = stub_server.url + "/a"
+
+    assert cache.fresh("test", url, {}) is None
+    cache.wrap("test", urllib_transport)(url, {}, 5)
+    hit = cache.fresh("test", url, {"User-Agent": "x"})
+    assert hit.cache_status == "hit" and hit.body == b"body"
+    clock.now += 61
+    assert cache.fresh("test", url, {}) is None
+    assert cache.stats()["hits"] == 1 and len(stub_server.requests) == 1
@@ -0,0 +1,118 @@
+"""
+Tests for scraper-crunchbase against a stub of the v4 organization endpoint
+"""
+
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from conftest import load_script
+from scraper_http import HttpError, PooledSession
+
+crunchbase = load_script("scraper-crunchbase.py")
+
+ENTITY = {
+    "properties": {
+        "identifier": {"value": "TechVision Analytics", "permalink": "techvision-analytics"},
+        "funding_total": {"value_usd": 45000000},
+        "last_funding_type": "series_b"
+    },
+    "cards": {
+        "raised_funding_rounds": [
+            {"investment_type": "series_b", "announced_on": "2023-06-15", "money_raised": {"value_usd": 15000000},
+             "lead_investor_identifiers": [{"value": "Accel"}]},
+            {"investment_type": "seed", "announced_on": "2019-03-01", "money_raised": {"value_usd": 2000000},
+             "post_money_valuation": {"value_usd": 9000000}},
+        ],
+        "investors": [{"investor_identifier": {"value": "Accel"}}, {"investor_identifier": {"value": "YC"}}]
+    }
+}
+
+
+def _organization_handler(method, path, headers, body):
+    if urlsplit(path).path == "/entities/organizations/techvision-analytics":
+        return 200, {"Content-Type": "application/json"}, json.dumps(ENTITY).encode()
+    return 404, {}, b'{"error": "not found"}'
+
+
+def _scraper(stub_server, **kwargs) -> "crunchbase.CrunchbaseScraper":
+    session = PooledSession(max_retries=3, sleep=lambda delay: None)
+    return crunchbase.CrunchbaseScraper(api_key="secret", base_url=stub_server.url, session=session, **kwargs)
+
+
+def test_fetches_one_organization_per_company(stub_server):
+    stub_server.handler = _organization_handler
+    scraper = _scraper(stub_server)
+    data = scraper.get_company_financials("TechVision Analytics")
+    scraper.close()
+
+    assert data["total_funding"] == 45000000
+    assert data["last_funding_round"] == {
+        "round_type": "Series B", "amount": 15000000, "date": "2023-06-15", "lead_investor": "Accel"
+    }
+    assert data["valuation"] == 9000000
+    assert data["investors"] == ["Accel", "YC"]
+    assert [r["round"] for r in data["funding_rounds"]] == ["Seed", "Series B"]
+
+    [(_, method, path, headers, _)] = stub_server.requests
+    query = parse_qs(urlsplit(path).query)
+    assert query["field_ids"] == [",".join(crunchbase.ORGANIZATION_FIELDS)]
+    assert query["card_ids"] == [",".join(crunchbase.ORGANIZATION_CARDS)]
+    assert headers["x-cb-user-key"] == "secret"
+
+
+def test_retries_transient_statuses(stub_server):
+    failures = iter([(503, {}, b""), (429, {"Retry-After": "0"}, b"")])
+    stub_server.handler = lambda *request: next(failures, None) or _organization_handler(*request)
+    scraper = _scraper(stub_server)
+    data = scraper.get_company_financials("TechVision Analytics")
+
+    assert data["total_funding"] == 45000000
+    assert len(stub_server.requests) == 3
+    assert scraper.session.retries == 2
+
+
+def test_missing_company_raises_and_batch_skips_it(stub_server):
+    stub_server.handler = _organization_handler
+    scraper = _scraper(stub_server)
+    with pytest.raises(HttpError):
+        scraper.get_company_financials("Nobody Inc")
+
+    results = scraper.batch_fetch(["Nobody Inc", "TechVision Analytics"])
+    assert [r["company_name"] for r in results] == ["TechVision Analytics"]
+
+
+def test_threads_share_one_lazily_created_session(stub_server, monkeypatch):
+    created = []
+
+    class SlowSession(PooledSession):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            # Widen the window in which a second thread could also see no session
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(crunchbase, "PooledSession", SlowSession)
+    stub_server.handler = _organization_handler
+    scraper = crunchbase.CrunchbaseScraper(api_key="secret", base_url=stub_server.url)
+    threads = [
+        threading.Thread(target=scraper.get_company_financials, args=("TechVision Analytics",))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scraper.close()
+
+    assert len(created) == 1
+    assert len(stub_server.requests) == 4
+
+
+def test_without_api_key_no_request_is_made(stub_server):
+    scraper = crunchbase.CrunchbaseScraper(base_url=stub_server.url)
+    assert scraper.get_company_financials("TechVision Analytics")["total_funding"] == 45000000
+    assert stub_server.requests == []
@@ -0,0 +1,110 @@
+"""
+Tests for scraper-g2 against a stub of the data API's paged reviews endpoint
+"""
+
+import json
+import threading
+import time
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from conftest import load_script
+
+g2 = load_script("scraper-g2.py")
+
+
+def _reviews_handler(total: int, delay: float = 0.0):
+    """Serves total reviews per product, newest first, pausing delay seconds per page"""
+    def handler(method, path, headers, body):
+        query = parse_qs(urlsplit(path).query)
+        number, size = int(query["page[number]"][0]), int(query["page[size]"][0])
+        time.sleep(delay)
+        data = [
+            {"attributes": {"star_rating": 5, "title": f"Review {i}", "text": "Great tool",
+                            "submitted_at": "2024-03-10T12:00:00Z"}}
+            for i in range((number - 1) * size, min(number * size, total))
+        ]
+        return 200, {"Content-Type": "application/vnd.api+json"}, json.dumps({"data": data}).encode()
+    return handler
+
+
+def _pages(stub_server, slug: str = "product"):
+    return [
+        int(parse_qs(urlsplit(path).query)["page[number]"][0])
+        for path in stub_server.paths() if urlsplit(path).path == f"/products/{slug}/reviews"
+    ]
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _scraper(stub_server, **kwargs) -> "g2.G2Scraper":
+    return g2.G2Scraper(api_token="token", api_url=stub_server.url, **kwargs)
+
+
+def test_prefetch_requests_pages_ahead_of_the_consumer(stub_server):
+    stub_server.handler = _reviews_handler(total=1000)
+    with _scraper(stub_server, page_size=10) as scraper:
+        reviews = scraper.iter_reviews("Product", prefetch=2)
+        assert next(reviews)["title"] == "Review 0"
+        _wait_for(lambda: len(stub_server.requests) >= 3)
+        time.sleep(0.1)
+        # The page being read plus two ahead, and nothing further yet
+        assert sorted(_pages(stub_server)) == [1, 2, 3]
+        reviews.close()
+
+
+def test_a_short_page_ends_the_stream(stub_server):
+    stub_server.handler = _reviews_handler(total=23)
+    with _scraper(stub_server, page_size=10) as scraper:
+        reviews = list(scraper.iter_reviews("Product", prefetch=0))
+        assert [review["title"] for review in reviews] == [f"Review {i}" for i in range(23)]
+        assert _pages(stub_server) == [1, 2, 3]
+        # With prefetch the stream still ends at the short page
+        assert len(list(scraper.iter_reviews("Product", prefetch=3))) == 23
+
+
+def test_closing_early_cancels_pages_not_yet_started(stub_server):
+    stub_server.handler = _reviews_handler(total=1000, delay=0.2)
+    # One page worker, so prefetched pages queue behind the one in flight
+    with _scraper(stub_server, page_size=10, max_workers=1) as scraper:
+        assert len(list(islice(scraper.iter_reviews("Product", prefetch=3), 5))) == 5
+        time.sleep(0.5)
+        # Page 2 was already running when the generator closed; 3 and 4 never start
+        assert _pages(stub_server) == [1, 2]
+
+
+def test_concurrent_products_read_each_page_once(stub_server):
+    stub_server.handler = _reviews_handler(total=45, delay=0.02)
+    with _scraper(stub_server, page_size=10, recent_review_count=12) as scraper:
+        results = scraper.batch_scrape(["Alpha One", "Beta Two", "Gamma Three"], concurrency=3)
+
+    assert [result["product_name"] for result in results] == ["Alpha One", "Beta Two", "Gamma Three"]
+    for result, slug in zip(results, ["alpha-one", "beta-two", "gamma-three"]):
+        assert result["total_reviews"] == 45
+        assert result["sentiment_analysis"]["reviews_scored"] == 45
+        assert [review["title"] for review in result["recent_reviews"]] == [f"Review {i}" for i in range(12)]
+        # Recent reviews, the count and the sentiment share one stream (prefetch
+        # may still look past the short last page)
+        pages = _pages(stub_server, slug)
+        assert len(pages) == len(set(pages)) and set(range(1, 6)) <= set(pages)
+    assert stub_server.requests[0][3]["authorization"] == "Token token=token"
+
+
+def test_lookups_run_while_reviews_stream(stub_server, monkeypatch):
+    page_requested = threading.Event()
+    serve = _reviews_handler(total=5)
+
+    def handler(*request):
+        page_requested.set()
+        return serve(*request)
+
+    # Only answers if the review stream is already running alongside it
+    monkeypatch.setattr(g2.G2Scraper, "_get_overall_rating", lambda self, name: page_requested.wait(5) and 4.8)
+    stub_server.handler = handler
+    with _scraper(stub_server) as scraper:
+        result = scraper.scrape_product_reviews("Product")
+    assert result["overall_rating"] == 4.8 and result["total_reviews"] == 5
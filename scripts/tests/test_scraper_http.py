@@ -0,0 +1,205 @@
+"""
+Tests for scraper_http: rate limiting, async fetching, and the LinkedIn fetch paths on top of them
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from conftest import load_script
+from scraper_cache import ResponseCache
+from scraper_http import AsyncFetcher, HostThrottle, HttpError, TokenBucket
+
+linkedin = load_script("scraper-linkedin.py")
+
+# Fraction of the nominal interval two requests must be apart on arrival.
+# The stub server stamps requests on its handler threads, which can start
+# a few tens of milliseconds late on a busy machine; requests the limiter
+# let through back to back would arrive almost together.
+SPACING_SLACK = 0.5
+
+
+def _slow(delay: float, body: bytes = b"<html></html>"):
+    def handler(method, path, headers, body_in):
+        time.sleep(delay)
+        return 200, {}, body
+    return handler
+
+
+def test_token_bucket_spaces_acquisitions():
+    async def main():
+        bucket = TokenBucket(rate=20.0)
+        stamps = []
+        for _ in range(4):
+            await bucket.acquire()
+            stamps.append(time.monotonic())
+        return stamps
+
+    stamps = asyncio.run(main())
+    assert all(later - earlier >= 0.04 for earlier, later in zip(stamps, stamps[1:]))
+
+
+def test_fetch_respects_rate_and_concurrency(stub_server):
+    stub_server.handler = _slow(0.15)
+    rate = 10.0
+
+    async def main():
+        async with AsyncFetcher(concurrency=2, requests_per_host_per_second=rate) as fetcher:
+            return await asyncio.gather(*(fetcher.fetch(f"{stub_server.url}/p{i}") for i in range(8)))
+
+    responses = asyncio.run(main())
+    assert [response.status for response in responses] == [200] * 8
+    assert stub_server.max_in_flight <= 2
+    starts = sorted(stamp for stamp, *_ in stub_server.requests)
+    # Requests reach the host no closer together than the rate allows
+    assert min(later - earlier for earlier, later in zip(starts, starts[1:])) >= SPACING_SLACK / rate
+
+
+def test_requests_queued_behind_a_slow_one_stay_spaced(stub_server):
+    def handler(method, path, headers, body):
+        if path == "/slow":
+            time.sleep(0.5)
+        return 200, {}, b""
+
+    stub_server.handler = handler
+    rate = 10.0
+
+    async def main():
+        async with AsyncFetcher(concurrency=1, requests_per_host_per_second=rate) as fetcher:
+            paths = ["/slow", "/a", "/b", "/c", "/d"]
+            await asyncio.gather(*(fetcher.fetch(stub_server.url + path) for path in paths))
+
+    asyncio.run(main())
+    starts = [stamp for stamp, *_ in stub_server.requests]
+    # Tokens reserved while waiting for the slot would all be due by now
+    assert min(later - earlier for earlier, later in zip(starts[1:], starts[2:])) >= SPACING_SLACK / rate
+
+
+def test_fetch_sends_default_and_extra_headers(stub_server):
+    async def main():
+        async with AsyncFetcher(requests_per_host_per_second=100.0) as fetcher:
+            return await fetcher.fetch(stub_server.url + "/x", headers={"X-Test": "1"})
+
+    asyncio.run(main())
+    headers = stub_server.requests[0][3]
+    assert headers["user-agent"] == "MarketIntelligenceBot/1.0"
+    assert headers["x-test"] == "1"
+
+
+def test_map_keeps_order_isolates_errors_and_bounds_tasks():
+    running = 0
+    peak = 0
+    consumed = []
+    errors = []
+
+    def items():
+        for i in range(40):
+            consumed.append(i)
+            yield i
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        # Never more than one item per task taken ahead of the ones running
+        assert len(consumed) <= item + 3
+        await asyncio.sleep(0.001 * (item % 3))
+        running -= 1
+        if item % 7 == 0:
+            raise ValueError(item)
+        return item * 2
+
+    async def main():
+        async with AsyncFetcher(concurrency=3) as fetcher:
+            return await fetcher.map(items(), worker, on_error=lambda item, e: errors.append(item))
+
+    results = asyncio.run(main())
+    assert results == [None if i % 7 == 0 else i * 2 for i in range(40)]
+    assert sorted(errors) == [0, 7, 14, 21, 28, 35]
+    assert peak == 3
+
+
+def test_map_of_nothing():
+    async def main():
+        async with AsyncFetcher() as fetcher:
+            return await fetcher.map([], None)
+
+    assert asyncio.run(main()) == []
+
+
+def test_linkedin_batch_parses_fetched_pages(stub_server):
+    def handler(method, path, headers, body):
+        if path == "/company/broken":
+            return 500, {}, b""
+        count = {"/company/techvision": b"1,234", "/company/datastream": b"56"}[path]
+        return 200, {"Content-Type": "text/html"}, b"<html><span>" + count + b" employees</span></html>"
+
+    stub_server.handler = handler
+    scraper = linkedin.LinkedInScraper(base_url=stub_server.url)
+    domains = ["techvision.com", "broken.com", "datastream.io"]
+    results = asyncio.run(scraper.batch_scrape_async(domains, concurrency=2, requests_per_second=100.0))
+
+    assert [(r["domain"], r["employee_count"]) for r in results] == [("techvision.com", 1234), ("datastream.io", 56)]
+    assert sorted(stub_server.paths()) == ["/company/broken", "/company/datastream", "/company/techvision"]
+
+
+def test_linkedin_async_raises_on_error_status(stub_server):
+    stub_server.handler = lambda method, path, headers, body: (404, {}, b"")
+    scraper = linkedin.LinkedInScraper(base_url=stub_server.url)
+
+    async def main():
+        async with AsyncFetcher(requests_per_host_per_second=100.0) as fetcher:
+            await scraper.scrape_company_profile_async("missing.com", fetcher)
+
+    with pytest.raises(HttpError):
+        asyncio.run(main())
+
+
+def test_host_throttle_spaces_each_host_separately():
+    now = [0.0]
+    slept = []
+
+    def sleep(delay):
+        slept.append(delay)
+
+    throttle = HostThrottle(2.0, clock=lambda: now[0], sleep=sleep)
+    for url in ("http://a/1", "http://a/2", "http://b/1", "http://a/3"):
+        throttle.wait(url)
+    assert slept == [0.5, 1.0]
+    now[0] = 5.0
+    throttle.wait("http://a/4")
+    assert slept == [0.5, 1.0]
+
+
+def test_fresh_cache_hits_skip_the_rate_limit(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {}, b"<html>10 employees</html>")
+    scraper = linkedin.LinkedInScraper(base_url=stub_server.url, cache=ResponseCache(str(tmp_path / "cache.db")))
+    domains = [f"company{i}.com" for i in range(6)]
+    asyncio.run(scraper.batch_scrape_async(domains, concurrency=2, requests_per_second=100.0))
+
+    start = time.monotonic()
+    results = asyncio.run(scraper.batch_scrape_async(domains, concurrency=2, requests_per_second=0.5))
+    # Six requests at 0.5/s would take ten seconds
+    assert time.monotonic() - start < 1.0
+    assert [r["employee_count"] for r in results] == [10] * 6
+    assert len(stub_server.requests) == 6
+    assert scraper.cache.stats()["hits"] == 6
+
+
+def test_job_mode_fetch_uses_cache_and_throttle(stub_server, tmp_path):
+    stub_server.handler = lambda method, path, headers, body: (200, {}, b"<html>3,000 employees</html>")
+    scraper = linkedin.LinkedInScraper(
+        base_url=stub_server.url, cache=ResponseCache(str(tmp_path / "cache.db")), requests_per_second=5.0
+    )
+    first = [scraper.fetch_company_profile(f"c{i}.com") for i in range(3)]
+    start = time.monotonic()
+    second = [scraper.fetch_company_profile(f"c{i}.com") for i in range(3)]
+
+    assert [r["employee_count"] for r in first + second] == [3000] * 6
+    assert time.monotonic() - start < 0.15
+    starts = [stamp for stamp, *_ in stub_server.requests]
+    assert len(starts) == 3
+    assert min(later - earlier for earlier, later in zip(starts, starts[1:])) >= SPACING_SLACK / 5.0
+    assert stub_server.requests[0][3]["user-agent"] == "MarketIntelligenceBot/1.0"
+    assert scraper.fetch_company_profile("c0.com", skip_unchanged=True) is None
@@ -0,0 +1,128 @@
+"""
+Tests for scraper_jobs: checkpointed runs, retries and resuming after a kill
+"""
+
+import json
+import signal
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import time
+from contextlib import closing
+
+from conftest import SCRIPTS_DIR
+from scraper_jobs import DONE, ScrapeJob, read_items
+from streaming_io import read_records
+
+
+def _done_items(path: str, name: str):
+    with closing(sqlite3.connect(path)) as connection:
+        return {item for (item,) in connection.execute(
+            "SELECT item FROM job_items WHERE job = ? AND status = ?", (name, DONE)
+        )}
+
+
+def test_run_stores_results_in_queue_order(tmp_path):
+    path = str(tmp_path / "job.db")
+    with ScrapeJob(path, "t", workers=4, batch_size=3) as job:
+        assert job.enqueue(f"d{i}" for i in range(20)) == 20
+        assert job.enqueue(["d0", "d20"]) == 1
+        # None means "nothing to store" but still counts as done
+        progress = job.run(lambda item: None if item == "d5" else {"item": item})
+        assert progress == {"pending": 0, "done": 21, "failed": 0, "total": 21}
+        assert [r["item"] for r in job.iter_results()] == [f"d{i}" for i in range(21) if i != 5]
+
+        assert job.export(str(tmp_path / "out.jsonl.gz")) == 20
+        assert len(list(read_records(str(tmp_path / "out.jsonl.gz")))) == 20
+        assert job.export(str(tmp_path / "out.json")) == 20
+        with open(tmp_path / "out.json") as f:
+            assert json.load(f)[0] == {"item": "d0"}
+
+
+def test_failures_are_retried_up_to_max_attempts(tmp_path):
+    attempts = {}
+    errors = []
+
+    def worker(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == "bad" or (item == "flaky" and attempts[item] == 1):
+            raise RuntimeError(item)
+        return {"item": item}
+
+    with ScrapeJob(str(tmp_path / "job.db"), "t", workers=2, max_attempts=2) as job:
+        job.enqueue(["ok", "flaky", "bad"])
+        assert job.run(worker, on_error=lambda item, e: errors.append(item))["failed"] == 2
+        assert job.run(worker)["failed"] == 1
+        # Out of attempts: a third run leaves it alone until retry_failed
+        job.run(worker)
+        assert attempts == {"ok": 1, "flaky": 2, "bad": 2}
+        assert job.retry_failed() == 1
+        job.run(worker)
+        assert attempts["bad"] == 3
+    assert sorted(errors) == ["bad", "flaky"]
+
+
+def test_drain_checkpoints_on_time(tmp_path):
+    path = str(tmp_path / "job.db")
+    seen_done = {}
+
+    def worker(item):
+        time.sleep(0.2)
+        # Read what the runner has committed so far, from another connection
+        seen_done[item] = len(_done_items(path, "t"))
+        return {"item": item}
+
+    with ScrapeJob(path, "t", workers=1, batch_size=1000, checkpoint_seconds=0.05) as job:
+        job.enqueue(["a", "b", "c"])
+        job.run(worker)
+    # "c" runs while the queue drains; "a" and "b" are on disk by then
+    assert seen_done["c"] == 2
+
+
+def test_resume_after_kill_skips_checkpointed_items(tmp_path):
+    path = str(tmp_path / "job.db")
+    script = textwrap.dedent(f"""
+        import sys, time
+        sys.path.insert(0, {SCRIPTS_DIR!r})
+        from scraper_jobs import ScrapeJob
+
+        def worker(item):
+            time.sleep(0.005)
+            return {{"item": item}}
+
+        with ScrapeJob({path!r}, "t", workers=4, batch_size=20, checkpoint_seconds=0.1) as job:
+            job.enqueue(f"d{{i}}" for i in range(2000))
+            job.run(worker)
+    """)
+    process = subprocess.Popen([sys.executable, "-c", script])
+    try:
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            try:
+                if len(_done_items(path, "t")) >= 100:
+                    break
+            except sqlite3.OperationalError:
+                # The child has not created the schema yet
+                pass
+    finally:
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+
+    checkpointed = _done_items(path, "t")
+    assert 100 <= len(checkpointed) < 2000
+
+    resumed = []
+    with ScrapeJob(path, "t", workers=4) as job:
+        progress = job.run(lambda item: resumed.append(item) or {"item": item})
+        assert progress["done"] == 2000
+        assert [r["item"] for r in job.iter_results()] == [f"d{i}" for i in range(2000)]
+    assert not checkpointed & set(resumed)
+    assert len(resumed) == 2000 - len(checkpointed)
+
+
+def test_read_items_skips_blanks_and_comments(tmp_path):
+    path = tmp_path / "items.txt"
+    path.write_text("# domains\na.com\n\n  b.com  \n")
+    assert list(read_items(str(path))) == ["a.com", "b.com"]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from sentiment_engine import SentimentAggregator, SentimentEngine, label
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return SentimentEngine()
+
+
+def test_polarity(engine):
+    scores = engine.score([
+        "Great visualizations and easy to use",
+        "Terrible, slow and buggy",
+        "It works"
+    ])
+    assert scores[0] > 0.5
+    assert scores[1] < -0.5
+    assert scores[2] == 0.0
+    assert list(label(scores)) == ["positive", "negative", "neutral"]
+
+
+def test_negation_and_contrast(engine):
+    good, not_good = engine.score(["good", "not good"])
+    assert not_good < 0 < good
+    # What follows "but" outweighs what precedes it
+    assert engine.score(["good but slow"])[0] < 0
+    assert engine.score(["slow but good"])[0] > 0
+
+
+@pytest.mark.parametrize("apostrophe", ["'", "\u2019", "\u02bc", "\uff07"])
+def test_unicode_apostrophes_still_negate(engine, apostrophe):
+    text = f"I don{apostrophe}t like it"
+    assert engine.tokenize(text) == engine.tokenize("I don't like it")
+    assert engine.score([text])[0] < 0
+
+
+def test_unicode_punctuation_separates_words(engine):
+    assert engine.tokenize("good\u2014not great") == engine.tokenize("good - not great")
+    assert engine.tokenize("\u201cgreat\u201d\u2026really\u00a0fast") == engine.tokenize('"great"... really fast')
+
+
+def test_bigram_uses_up_its_negator(engine):
+    not_bad, great, not_bad_great = engine.score(["not bad", "great", "not bad, great"])
+    # "great" is outside the negation that "not bad" already accounts for
+    assert not_bad_great > max(not_bad, great)
+    assert engine.score(["not bad, not great"])[0] < not_bad
+
+
+@pytest.mark.parametrize("blank", ["", None, "!!!"])
+def test_blank_texts_next_to_contrast_words(engine, blank):
+    texts = [blank, "good but slow", blank, "fine, however buggy", blank]
+    scores = engine.score(texts)
+    assert scores.shape == (5,)
+    assert scores[0] == scores[2] == scores[4] == 0.0
+    assert np.allclose(scores, [engine.score([text])[0] for text in texts])
+
+
+def test_batch_matches_single_texts(engine):
+    texts = ["I don't love it but it is very reliable", "'Great' tool!!", "not bad", "a\x00b great"]
+    assert np.allclose(engine.score(texts), [engine.score([text])[0] for text in texts])
+
+
+def test_score_stream_keeps_order(engine):
+    texts = ["good", "bad", "", "great but slow"] * 7
+    expected = engine.score(texts)
+    streamed = np.concatenate(list(engine.score_stream(texts, batch_size=5, workers=1)))
+    pooled = np.concatenate(list(engine.score_stream(texts, batch_size=5, workers=2)))
+    assert np.allclose(streamed, expected)
+    assert np.allclose(pooled, expected)
+
+
+def test_aggregator_summaries():
+    aggregator = SentimentAggregator()
+    aggregator.add("A", np.array([0.5, -0.5, 0.0]))
+    aggregator.add(["A", "B"], np.array([0.5, 0.2]))
+    assert aggregator.summary("A") == {
+        "positive": 50.0, "neutral": 25.0, "negative": 25.0,
+        "average_sentiment_score": 0.12, "reviews_scored": 4
+    }
+    assert aggregator.summary("B")["reviews_scored"] == 1
+    assert aggregator.summary("missing")["reviews_scored"] == 0
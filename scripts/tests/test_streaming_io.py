@@ -0,0 +1,130 @@
+"""
+Tests for streaming_io: record readers, the incremental JSONL writer, sharded JSONL output and its manifest
+"""
+
+import gzip
+import os
+
+import numpy as np
+import pytest
+
+from streaming_io import (
+    JsonlWriter, ShardedJsonlWriter, iter_chunks, iter_shard_paths, read_manifest, read_records, read_sharded
+)
+
+
+def _records(count: int):
+    return [{"domain": f"d{i}.com", "employees": np.int64(i), "locations": ["SF, CA"]} for i in range(count)]
+
+
+@pytest.mark.parametrize("name", ["out.jsonl", "out.jsonl.gz"])
+def test_jsonl_writer_streams_compact_lines(tmp_path, name):
+    path = str(tmp_path / name)
+    with JsonlWriter(path, buffer_size=64) as writer:
+        writer.write_many(_records(3))
+        writer.write({"values": np.arange(3), "ratio": np.float64(0.5)})
+        # Buffered lines are handed to the file once they pass buffer_size
+        assert writer._buffer.tell() < 64
+
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == '{"domain":"d0.com","employees":0,"locations":["SF, CA"]}'
+    assert lines[3] == '{"values":[0,1,2],"ratio":0.5}'
+    assert writer.records_written == 4
+    assert list(read_records(path))[3] == {"values": [0, 1, 2], "ratio": 0.5}
+
+
+def test_read_records_streams_csv_and_jsonl(tmp_path):
+    with gzip.open(tmp_path / "rows.csv.gz", "wt", newline="") as f:
+        f.write("name,value\r\na,1\r\nb,2\r\n")
+    with open(tmp_path / "rows.jsonl", "w") as f:
+        f.write('{"name": "a", "value": 1}\n\n{"name": "b", "value": 2}\n')
+    (tmp_path / "rows.json").write_text("[]")
+
+    # CSV values stay strings; blank JSONL lines are skipped
+    assert list(read_records(str(tmp_path / "rows.csv.gz"))) == [
+        {"name": "a", "value": "1"}, {"name": "b", "value": "2"}
+    ]
+    assert list(read_records(str(tmp_path / "rows.jsonl"))) == [{"name": "a", "value": 1}, {"name": "b", "value": 2}]
+    with pytest.raises(ValueError):
+        list(read_records(str(tmp_path / "rows.json")))
+
+
+def test_iter_chunks_batches_lazily():
+    consumed = []
+    source = (consumed.append(i) or i for i in range(7))
+    chunks = iter_chunks(source, 3)
+    assert next(chunks) == [0, 1, 2] and consumed == [0, 1, 2]
+    assert list(chunks) == [[3, 4, 5], [6]]
+    with pytest.raises(ValueError):
+        next(iter_chunks([], 0))
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd", None])
+def test_sharded_round_trip(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    directory = str(tmp_path / "out")
+    with ShardedJsonlWriter(directory, max_shard_bytes=2000, compression=compression, buffer_size=256) as writer:
+        writer.write_many(_records(500))
+
+    manifest = read_manifest(directory)
+    shards = manifest["shards"]
+    assert manifest["records"] == 500 and len(shards) > 1
+    assert all(shard["uncompressed_bytes"] <= 2000 for shard in shards)
+    for previous, shard in zip(shards, shards[1:]):
+        assert shard["first_record"] == previous["first_record"] + previous["records"]
+        assert shard["uncompressed_offset"] == previous["uncompressed_offset"] + previous["uncompressed_bytes"]
+
+    records = list(read_sharded(directory, verify=True))
+    assert [record["domain"] for record in records] == [f"d{i}.com" for i in range(500)]
+    assert records[123]["employees"] == 123
+
+    # Jump straight to the shard holding a record
+    shard = next(s for s in shards if s["first_record"] <= 321 < s["first_record"] + s["records"])
+    shard_records = list(read_records(os.path.join(directory, shard["path"])))
+    assert shard_records[321 - shard["first_record"]]["domain"] == "d321.com"
+
+
+def test_max_shard_records(tmp_path):
+    directory = str(tmp_path)
+    with ShardedJsonlWriter(directory, max_shard_records=3) as writer:
+        writer.write_many(_records(7))
+    assert [shard["records"] for shard in read_manifest(directory)["shards"]] == [3, 3, 1]
+
+
+def test_verify_detects_corrupt_shard(tmp_path):
+    directory = str(tmp_path)
+    with ShardedJsonlWriter(directory, compression=None) as writer:
+        writer.write_many(_records(10))
+    path = next(iter_shard_paths(directory))
+    with open(path, "ab") as f:
+        f.write(b"\n")
+
+    assert len(list(read_sharded(directory))) == 10
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        list(read_sharded(directory, verify=True))
+
+
+def test_reopening_removes_stale_shards(tmp_path):
+    directory = str(tmp_path)
+    with ShardedJsonlWriter(directory, max_shard_records=2) as writer:
+        writer.write_many(_records(9))
+    with ShardedJsonlWriter(directory, max_shard_records=2) as writer:
+        writer.write_many(_records(3))
+    assert sorted(os.listdir(directory)) == ["manifest.json", "part-00000.jsonl.gz", "part-00001.jsonl.gz"]
+
+
+def test_exception_leaves_no_manifest(tmp_path):
+    directory = str(tmp_path)
+    with pytest.raises(RuntimeError):
+        with ShardedJsonlWriter(directory, max_shard_records=2) as writer:
+            writer.write_many(_records(5))
+            raise RuntimeError("scrape failed")
+
+    assert not os.path.exists(writer.manifest_path)
+    # Shards are closed, so what was written so far is still readable
+    shards = sorted(os.listdir(directory))
+    assert len(shards) == 3
+    assert len(list(read_records(os.path.join(directory, shards[-1])))) == 1